@@ -51,6 +51,7 @@ class PremiumTestRunner:
         # Get project root
         self.project_root = Path(__file__).parent.parent
         self.run_script = self.project_root / "scripts" / "Run" / "run.py"
+        self.report_script = self.project_root / "scripts" / "generate_coverage_report.py"
         
         # Theme state
         self.dark_mode = tk.BooleanVar(value=True)
@@ -903,8 +904,15 @@ class PremiumTestRunner:
         os.startfile(str(logs_path))
         
     def open_coverage(self):
-        """Open coverage report."""
-        report_path = self.project_root / "deliverables" / "modern_report.html"
+        """Open the modern coverage report that run.py --modern-report writes."""
+        coverage_dir = self.project_root / "coverage"
+        report_path = coverage_dir / "modern_report.html"
+        saved_reports = coverage_dir / "reports"
+        # No vcover here: render from text reports saved with --save-reports
+        if not report_path.exists() and saved_reports.is_dir():
+            subprocess.run(["python", str(self.report_script), "--reports", str(saved_reports),
+                            "-o", str(report_path)],
+                           cwd=str(self.project_root), capture_output=True)
         if report_path.exists():
             os.startfile(str(report_path))
         else:
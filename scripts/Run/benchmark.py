@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Simulation Throughput Benchmark
+Measures how fast the testbench simulates and flags slowdowns against
+earlier benchmark runs.
+
+CpmBenchTest runs one CpmStressSeq whose size, MODE and drop enable come
+from plusargs (+CPM_BENCH_PACKETS, +CPM_BENCH_MODE, +CPM_BENCH_DROP). Each
+point of the sweep (packets x mode x drop) is simulated --repeat times on
+the fast snapshot without coverage, and every run records wall time,
+simulated cycles, packets/s, cycles/s and the simulator's peak RSS in the
+bench_runs table of the results database.
+
+Each point's wall times are compared with the same point in the last
+benchmark sessions (or the sessions of a --baseline label) using a
+one-sided permutation test; a point is flagged when it is significantly
+slower by more than --min-slowdown. The wall time vs packets slope on a
+log-log scale shows superlinear scaling (e.g. an O(n^2) scoreboard search)
+even without a baseline.
+
+Usage:
+    python benchmark.py                                   # 1e2..1e6 packets x 4 modes x drop on/off
+    python benchmark.py --packets 1000,100000 --modes XOR --drop 0 --repeat 5
+    python benchmark.py --label main-2026-10 ; python benchmark.py --baseline main-2026-10
+    python benchmark.py --history
+
+Author: Assaf Afriat
+Date: 2026-10-16
+"""
+
+import argparse
+import itertools
+import math
+import random
+import re
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import compile_cache
+import regression
+import results_db
+from run import SNAPSHOT_FAST, build_sim_command
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent.resolve()
+TEST = 'CpmBenchTest'
+MODES = ('PASS', 'XOR', 'ADD', 'ROT')
+DEFAULT_PACKETS = (100, 1000, 10000, 100000, 1000000)
+# tb_top clock period (CpmParamsPkg::CPM_CLK_PERIOD_NS)
+CLK_PERIOD_NS = 10
+# Below this many packets start-up dominates, so scaling ignores the point
+SCALING_MIN_PACKETS = 1000
+# Exhaustive permutation test up to this many splits, random sampling above
+MAX_PERMUTATIONS = 20000
+
+# UVM_INFO ... [BENCH] packets=1000 mode=CPM_MODE_XOR drop=0 cycles=12345 traffic_cycles=11000
+RE_BENCH = re.compile(r'\[BENCH\]\s+packets=(\d+)\s+mode=(\S+)\s+drop=(\d)\s+cycles=(\d+)\s+traffic_cycles=(\d+)')
+
+
+def parse_bench_line(log_file):
+    """Return the [BENCH] report of a run as a dict, or None if it is missing."""
+    try:
+        with open(log_file, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                match = RE_BENCH.search(line)
+                if match:
+                    return {'packets': int(match.group(1)), 'cycles': int(match.group(4)),
+                            'traffic_cycles': int(match.group(5))}
+    except OSError:
+        pass
+    return None
+
+
+def make_jobs(points, repeat, seed, project_root):
+    """One job per (point, repetition); every repetition uses the same seed."""
+    jobs = []
+    for packets, mode, drop in points:
+        for rep in range(repeat):
+            log_file, wlf_file, ucdb_file = regression.get_job_paths(
+                project_root, TEST, seed, f"_{packets}_{mode}_drop{drop}_r{rep}")
+            log_file = log_file.parent / "bench" / log_file.name
+            jobs.append({'test': TEST, 'seed': seed, 'log': log_file, 'wlf': wlf_file, 'ucdb': ucdb_file,
+                         'point': (packets, mode, drop),
+                         'plusargs': [f"CPM_BENCH_PACKETS={packets}", f"CPM_BENCH_MODE={mode}",
+                                      f"CPM_BENCH_DROP={drop}"]})
+    return jobs
+
+
+def measure(job):
+    """Benchmark metrics of a finished job."""
+    bench = parse_bench_line(job['log']) or {}
+    analyzer = job['analyzer']
+    cycles = bench.get('cycles')
+    if cycles is None and analyzer.sim_time is not None:
+        cycles = int(analyzer.sim_time / CLK_PERIOD_NS)
+    packets_in = analyzer.scoreboard.get('packets_in', bench.get('packets'))
+    wall = job['elapsed']
+    return {
+        'wall_time': wall,
+        'sim_time_ns': analyzer.sim_time,
+        'cycles': cycles,
+        'packets_in': packets_in,
+        'packets_per_sec': packets_in / wall if packets_in and wall else None,
+        'cycles_per_sec': cycles / wall if cycles and wall else None,
+        'peak_rss_mb': job.get('peak_rss_mb'),
+    }
+
+
+def permutation_pvalue(current, baseline, max_permutations=MAX_PERMUTATIONS):
+    """One-sided p-value that mean(current) exceeds mean(baseline) by chance."""
+    pooled = list(current) + list(baseline)
+    k = len(current)
+    observed = sum(current) / k - sum(baseline) / len(baseline)
+    total = sum(pooled)
+
+    def diff(indices):
+        picked = sum(pooled[i] for i in indices)
+        return picked / k - (total - picked) / (len(pooled) - k)
+
+    if math.comb(len(pooled), k) <= max_permutations:
+        splits = list(itertools.combinations(range(len(pooled)), k))
+    else:
+        rng = random.Random(0)
+        splits = [rng.sample(range(len(pooled)), k) for _ in range(max_permutations)]
+    # Small tolerance so the observed split itself always counts
+    return sum(1 for s in splits if diff(s) >= observed - 1e-12) / len(splits)
+
+
+def compare(current, baseline, alpha, min_slowdown):
+    """Compare a point's wall times with its baseline.
+
+    Returns {'slowdown': relative change of the mean, 'p': p-value,
+    'flagged': bool}, or None with fewer than two samples on either side.
+    """
+    if len(current) < 2 or len(baseline) < 2:
+        return None
+    slowdown = (sum(current) / len(current)) / (sum(baseline) / len(baseline)) - 1.0
+    p = permutation_pvalue(current, baseline)
+    return {'slowdown': slowdown, 'p': p, 'flagged': p <= alpha and slowdown > min_slowdown}
+
+
+def scaling_exponent(samples):
+    """Least-squares slope of log(wall time) over log(packets), or None.
+
+    samples: [(packets, mean wall time)]. About 1.0 is linear; well above
+    1.0 means the cost per packet grows with the run length.
+    """
+    points = [(math.log(p), math.log(w)) for p, w in samples if p >= SCALING_MIN_PACKETS and w > 0]
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    var = sum((x - mean_x) ** 2 for x, _ in points)
+    if var == 0:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / var
+
+
+def _parse_list(text, cast=str):
+    return [cast(item) for item in text.split(',') if item.strip()]
+
+
+def print_history(conn, sessions):
+    rows = results_db.bench_history(conn, sessions)
+    if not rows:
+        print("[*] No benchmark runs recorded")
+        return
+    print(f"{'Session':<21}{'Label':<16}{'Packets':>9} {'Mode':<5}{'Drop':>5}{'Runs':>5}"
+          f"{'Wall (s)':>10}{'Pkt/s':>11}{'RSS (MB)':>10}")
+    for r in rows:
+        print(f"{r['session']:<21}{(r['label'] or '-'):<16}{r['packets']:>9} {r['mode']:<5}{r['drop_en']:>5}"
+              f"{r['runs']:>5}{r['wall_time']:>10.2f}{r['packets_per_sec'] or 0:>11.0f}"
+              f"{r['peak_rss_mb'] or 0:>10.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark simulation throughput and flag slowdowns")
+    parser.add_argument('--packets', default=','.join(str(p) for p in DEFAULT_PACKETS),
+                        help="Comma-separated CpmStressSeq packet counts.")
+    parser.add_argument('--modes', default=','.join(MODES), help="Comma-separated MODEs (PASS, XOR, ADD, ROT).")
+    parser.add_argument('--drop', default='0,1', help="Comma-separated drop enables (0, 1).")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per point (for the significance test).")
+    parser.add_argument('--seed', type=int, default=1, help="Seed of every run.")
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help="Parallel simulations (more than 1 skews the wall times).")
+    parser.add_argument('--timeout', type=int, default=3600, help="Per-simulation timeout in seconds.")
+    parser.add_argument('--verbosity', default='UVM_LOW', help="UVM verbosity of the benchmark runs.")
+    parser.add_argument('--label', help="Name this session (e.g. a branch or release) for later --baseline.")
+    parser.add_argument('--baseline', help="Compare against the runs recorded with this label.")
+    parser.add_argument('--baseline-sessions', type=int, default=5,
+                        help="Without --baseline, compare against this many previous sessions.")
+    parser.add_argument('--alpha', type=float, default=0.05, help="Significance level of the slowdown test.")
+    parser.add_argument('--min-slowdown', type=float, default=0.05,
+                        help="Only flag slowdowns larger than this fraction (0.05 = 5%%).")
+    parser.add_argument('--db', type=Path, default=results_db.DEFAULT_DB, help="Results database path.")
+    parser.add_argument('--no-compile', action='store_true', help="Skip the incremental compile.")
+    parser.add_argument('--history', action='store_true', help="Print the recorded benchmark sessions and exit.")
+    args = parser.parse_args()
+
+    conn = results_db.connect(args.db)
+    if args.history:
+        print_history(conn, args.baseline_sessions * 2)
+        return 0
+
+    modes = [m.upper() for m in _parse_list(args.modes)]
+    unknown = [m for m in modes if m not in MODES]
+    if unknown:
+        parser.error(f"unknown mode(s): {', '.join(unknown)}")
+    points = list(itertools.product(_parse_list(args.packets, int), modes, _parse_list(args.drop, int)))
+
+    run_dir = Path(__file__).parent.resolve()
+    if args.no_compile:
+        build = {'design_hash': compile_cache.get_design_hash(run_dir, PROJECT_ROOT)}
+    else:
+        build = compile_cache.incremental_build(run_dir, PROJECT_ROOT)
+        if not build['ok']:
+            return 1
+
+    session = datetime.now().isoformat(timespec='seconds')
+    jobs = make_jobs(points, args.repeat, args.seed, PROJECT_ROOT)
+    (PROJECT_ROOT / "logs" / "bench").mkdir(parents=True, exist_ok=True)
+    print(f"[*] Benchmark session {session}: {len(points)} points x {args.repeat} runs")
+
+    def build_cmd(job):
+        return build_sim_command(job['test'], job['seed'], job['log'], job['wlf'], job['ucdb'], PROJECT_ROOT,
+                                 verbosity=args.verbosity, plusargs=job['plusargs'], snapshot=SNAPSHOT_FAST,
+                                 coverage=False)
+
+    def record(job):
+        packets, mode, drop = job['point']
+        job['metrics'] = measure(job)
+        results_db.record_bench(conn, dict(
+            session=session, run_date=datetime.now().isoformat(timespec='seconds'), label=args.label,
+            source_hash=build.get('design_hash'), packets=packets, mode=mode, drop_en=drop, seed=job['seed'],
+            status=job['status'], log_path=str(job['log']), **job['metrics']))
+
+    results = regression.run_regression(jobs, build_cmd, PROJECT_ROOT, args.jobs, timeout=args.timeout,
+                                        on_done=record)
+
+    by_point = {}
+    for job in results:
+        by_point.setdefault(job['point'], []).append(job)
+
+    print(f"\n[*] Results (mean of passing runs; baseline: "
+          f"{('label ' + args.baseline) if args.baseline else f'last {args.baseline_sessions} sessions'})")
+    print(f"{'Packets':>9} {'Mode':<5}{'Drop':>5}{'Wall (s)':>10}{'Cycles':>12}{'Pkt/s':>11}{'Cyc/s':>12}"
+          f"{'RSS (MB)':>10}{'vs base':>9}{'p':>7}")
+    flagged = []
+    scaling = {}
+    for point in points:
+        packets, mode, drop = point
+        ok = [j['metrics'] for j in by_point.get(point, []) if j['status'] == 'ok']
+        if not ok:
+            print(f"{packets:>9} {mode:<5}{drop:>5}  no passing run")
+            flagged.append((point, "no passing run"))
+            continue
+        walls = [m['wall_time'] for m in ok]
+
+        def mean(key):
+            values = [m[key] for m in ok if m[key] is not None]
+            return sum(values) / len(values) if values else 0
+
+        rss = max((m['peak_rss_mb'] for m in ok if m['peak_rss_mb'] is not None), default=0)
+        scaling.setdefault((mode, drop), []).append((packets, mean('wall_time')))
+        baseline = results_db.bench_baseline(conn, packets, mode, drop, session, args.baseline,
+                                             args.baseline_sessions)
+        result = compare(walls, baseline, args.alpha, args.min_slowdown)
+        versus = f"{100 * result['slowdown']:+8.1f}%{result['p']:>7.3f}" if result else f"{'n/a':>9}{'':>7}"
+        print(f"{packets:>9} {mode:<5}{drop:>5}{mean('wall_time'):>10.2f}{mean('cycles'):>12.0f}"
+              f"{mean('packets_per_sec'):>11.0f}{mean('cycles_per_sec'):>12.0f}{rss:>10.0f}{versus}")
+        if result and result['flagged']:
+            flagged.append((point, f"{100 * result['slowdown']:.1f}% slower (p={result['p']:.3f})"))
+
+    print(f"\n[*] Scaling (slope of log wall time over log packets, >= {SCALING_MIN_PACKETS} packets; 1.0 = linear)")
+    for (mode, drop), samples in scaling.items():
+        exponent = scaling_exponent(samples)
+        note = "" if exponent is None or exponent < 1.2 else "  [!] superlinear"
+        print(f"    {mode:<5} drop={drop}: " + ("n/a" if exponent is None else f"{exponent:.2f}") + note)
+
+    if flagged:
+        print(f"\n[!] {len(flagged)} point(s) flagged:")
+        for (packets, mode, drop), reason in flagged:
+            print(f"    {packets} packets, {mode}, drop={drop}: {reason}")
+        return 1
+    print(f"\n[+] No significant slowdown. Results stored in {args.db} (session {session})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""
+Post-Configuration Checkpoints
+Simulates reset and RAL configuration once per build and test, saves a
+simulator checkpoint there, and runs every seed from that checkpoint.
+
+With +CPM_CHECKPOINT the virtual sequence triggers EVT_POST_CONFIG after
+CpmConfigSeq, and tb_top stops the simulation ($stop) with a [CHECKPOINT]
+message. The checkpoint run saves the state with the `checkpoint` command.
+Restored runs set tb_top.traffic_seed to the job's seed before continuing.
+The virtual sequence makes it the UVM global random seed (and clears UVM's
+per-name seed table), which is what start_item() reseeds every packet
+from, so each seed drives its own traffic. The -sv_seed, plusargs and
+everything before the checkpoint are those of the checkpoint run.
+tb_top_fast gets write access (+acc) to traffic_seed only, for 'change'.
+After a regression, repeated_traffic() compares the traffic signature
+CpmTopVirtualSeq logs, so a restore that did not reseed is an error.
+
+Checkpoints are kept in sim/checkpoints/, named by the optimized snapshot
+(tb_top_fast or tb_top_debug) and a hash of the snapshot key (design and
+vopt options), test, verbosity, plusargs and coverage setting, so a
+rebuild or a different plusarg set makes a new one.
+
+Author: Assaf Afriat
+Date: 2026-10-16
+"""
+
+import hashlib
+import json
+from pathlib import Path
+
+import profiler
+import sim_process
+from log_analyzer import RE_REPORT, UvmLogAnalyzer, to_ns
+
+PLUSARG = 'CPM_CHECKPOINT'
+# -sv_seed of the run that creates the checkpoint
+CHECKPOINT_SEED = 1
+
+
+def checkpoint_path(project_root, snapshot_hash, test, verbosity, plusargs, snapshot, coverage=True):
+    """Checkpoint file for a build/test/snapshot, or None if the snapshot key is unknown."""
+    if not snapshot_hash:
+        return None
+    fields = [snapshot_hash, test, verbosity, sorted(plusargs), coverage]
+    key = hashlib.sha256(json.dumps(fields).encode('utf-8')).hexdigest()[:16]
+    return Path(project_root) / "sim" / "checkpoints" / f"{test}_{snapshot}_{key}.cpt"
+
+
+def create_command(sim_args, cpt_file, log_file, project_root):
+    """vsim command that runs up to the checkpoint point and saves it."""
+    rel_cpt = Path(cpt_file).relative_to(project_root).as_posix()
+    rel_log = Path(log_file).relative_to(project_root).as_posix()
+    return (f'vsim -c {sim_args} +{PLUSARG} -logfile {rel_log} '
+            f'-do "run -all; checkpoint {rel_cpt}; quit -f"')
+
+
+def restore_command(cpt_file, seed, log_file, wlf_file, ucdb_file, project_root, run_do="run -all"):
+    """vsim command that restores a checkpoint and runs the rest with a new traffic seed.
+
+    wlf_file / ucdb_file may be None to write no waveform / coverage file.
+    run_do replaces the default 'run -all' (e.g. a windowed wave capture).
+    """
+    rel = {name: Path(path).relative_to(project_root).as_posix()
+           for name, path in (('cpt', cpt_file), ('log', log_file), ('wlf', wlf_file), ('ucdb', ucdb_file))
+           if path is not None}
+    cmd = f'vsim -c -restore {rel["cpt"]} -logfile {rel["log"]}'
+    do = f"change /tb_top/traffic_seed {seed}; "
+    if 'wlf' in rel:
+        cmd += f' -wlf {rel["wlf"]}'
+    if 'ucdb' in rel:
+        do += f"coverage save -onexit {rel['ucdb']}; "
+    return cmd + f' -do "{do}{run_do}; quit -f"'
+
+
+def ensure_checkpoint(cpt_file, sim_args, project_root, timeout=None):
+    """Create cpt_file unless it exists. Returns True if the checkpoint is usable.
+
+    The run must reach the [CHECKPOINT] stop; a test that never does (it
+    does not use CpmTopVirtualSeq) gets no checkpoint.
+    """
+    cpt_file = Path(cpt_file)
+    no_checkpoint = cpt_file.with_suffix('.none')
+    if cpt_file.exists():
+        print(f"--- INFO: Using checkpoint {cpt_file.name} ---")
+        return True
+    if no_checkpoint.exists():
+        return False
+    cpt_file.parent.mkdir(parents=True, exist_ok=True)
+    log_file = cpt_file.with_suffix('.log')
+    cmd = create_command(sim_args, cpt_file, log_file, project_root)
+    print(f"\n--- INFO: Creating checkpoint {cpt_file.name} ---")
+    print(f"Executing: {cmd}")
+
+    analyzer = UvmLogAnalyzer()
+    with profiler.span(f"checkpoint {cpt_file.stem}", 'checkpoint') as meta:
+        result = sim_process.run_sim(cmd, project_root, timeout=timeout, log_file=log_file,
+                                     on_line=analyzer.feed, echo=False)
+        meta.update(returncode=result['returncode'], status=result['status'])
+    reached = analyzer.ids.get(('UVM_INFO', 'CHECKPOINT'), 0) > 0
+    if result['status'] != 'ok' or not analyzer.passed() or not reached or not cpt_file.exists():
+        print(f"--- WARNING: No checkpoint for this test ({result['status']}, "
+              f"{'stop reached' if reached else 'checkpoint point never reached'}), see {log_file} ---")
+        cpt_file.unlink(missing_ok=True)
+        if result['status'] == 'ok' and not reached:
+            # Remember it so later runs of this build do not try again
+            no_checkpoint.touch()
+        return False
+    print(f"Checkpoint saved after {result['elapsed']:.1f}s: {cpt_file}")
+    return True
+
+
+def traffic_signature(log_file):
+    """Traffic signature CpmTopVirtualSeq logged in log_file ([TRAFFIC]), or None."""
+    try:
+        with open(log_file, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                match = RE_REPORT.match(line.rstrip('\r\n'))
+                if match and match.group(7) == 'TRAFFIC':
+                    return match.group(8).split()[2]
+    except (OSError, TypeError, IndexError):
+        pass
+    return None
+
+
+def repeated_traffic(jobs):
+    """(test, seed, other_seed) for restored seeds of a test that drove the same traffic.
+
+    Jobs whose log has no signature (cache hits without a log, tests that
+    stop before the traffic) are not compared.
+    """
+    seen = {}
+    repeats = []
+    for job in sorted(jobs, key=lambda j: (j['test'], j['seed'])):
+        signature = traffic_signature(job.get('log'))
+        if signature is None:
+            continue
+        other = seen.setdefault((job['test'], signature), job['seed'])
+        if other != job['seed']:
+            repeats.append((job['test'], other, job['seed']))
+    return repeats
+
+
+def stop_time(cpt_file):
+    """Sim time in ns the checkpoint was saved at, from its creation log, or None."""
+    try:
+        with open(Path(cpt_file).with_suffix('.log'), 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                match = RE_REPORT.match(line.rstrip('\r\n'))
+                if match and match.group(7) == 'CHECKPOINT':
+                    return to_ns(float(match.group(4)), match.group(5))
+    except OSError:
+        pass
+    return None
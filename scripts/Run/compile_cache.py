@@ -0,0 +1,462 @@
+"""
+Incremental Compilation Cache
+Content-hashed, parallel compile/elaborate step for run.py.
+
+compile.do stays the single list of compilation units and elaborate.do the
+vopt commands (one per optimized snapshot). Each unit is hashed together with its `include closure; only
+units whose hash changed - plus every unit that imports them - are
+re-vlogged, and a snapshot's vopt is skipped when neither the design nor
+its vopt command line changed.
+
+The package import graph is derived from the sources. Units on the same
+level of that DAG are compiled concurrently, each into its own library
+under sim/units/ (the top module stays in work), and vopt links them all
+with -L.
+
+Author: Assaf Afriat
+Date: 2026-10-16
+"""
+
+import hashlib
+import json
+import re
+import shlex
+import shutil
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import profiler
+
+# Bump when the cache layout or hashing scheme changes
+CACHE_VERSION = 4
+
+RE_INCLUDE = re.compile(r'^\s*`include\s+"([^"]+)"', re.MULTILINE)
+RE_DECLARE = re.compile(r'^\s*(?:package|module|interface)\s+(\w+)', re.MULTILINE)
+RE_IMPORT = re.compile(r'\bimport\s+(\w+)\s*::')
+RE_VIRTUAL_IF = re.compile(r'\bvirtual\s+(?:interface\s+)?(\w+)')
+RE_LINE_COMMENT = re.compile(r'//.*')
+RE_BLOCK_COMMENT = re.compile(r'/\*.*?\*/', re.DOTALL)
+
+
+def parse_compile_script(do_path):
+    """Read the vlog lines of compile.do into a list of unit dicts.
+
+    Each unit has 'src' (project-relative source), 'args' (vlog arguments
+    without the source) and 'incdirs'.
+    """
+    units = []
+    with open(do_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line.startswith('vlog '):
+                continue
+            tokens = shlex.split(line)[1:]
+            incdirs = [t[len('+incdir+'):] for t in tokens if t.startswith('+incdir+')]
+            units.append({
+                'src': tokens[-1],
+                'args': tokens[:-1],
+                'incdirs': incdirs,
+            })
+    return units
+
+
+def parse_elaborate_script(do_path):
+    """Return the argument list of every vopt command in elaborate.do (top unit last)."""
+    commands = []
+    with open(do_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith('vopt '):
+                commands.append(shlex.split(line)[1:])
+    if not commands:
+        raise ValueError(f"No vopt command found in {do_path}")
+    return commands
+
+
+def snapshot_name(vopt_args):
+    """Name of the optimized design a vopt command writes (-o)."""
+    return vopt_args[vopt_args.index('-o') + 1]
+
+
+def _resolve_include(name, including_file, incdirs, project_root):
+    """Resolve an `include the way vlog does: local dir first, then +incdir."""
+    candidates = [Path(including_file).parent / name]
+    candidates += [project_root / d / name for d in incdirs]
+    for candidate in candidates:
+        if candidate.is_file():
+            return candidate.resolve()
+    # Not part of the project (e.g. uvm_macros.svh from the simulator install)
+    return None
+
+
+def scan_unit(unit, project_root):
+    """Walk a unit's `include closure and record its files, names and hash.
+
+    Adds 'files', 'provides', 'uses' and 'hash' to the unit dict.
+    """
+    project_root = Path(project_root)
+    root_file = (project_root / unit['src']).resolve()
+    files = []
+    seen = set()
+    pending = [root_file]
+    text_parts = []
+
+    while pending:
+        path = pending.pop(0)
+        if path in seen:
+            continue
+        seen.add(path)
+        files.append(path)
+        text = path.read_text(encoding='utf-8', errors='replace')
+        text_parts.append(text)
+        for name in RE_INCLUDE.findall(text):
+            resolved = _resolve_include(name, path, unit['incdirs'], project_root)
+            if resolved is not None:
+                pending.append(resolved)
+
+    code = RE_BLOCK_COMMENT.sub('', RE_LINE_COMMENT.sub('', '\n'.join(text_parts)))
+    provides = set(RE_DECLARE.findall(code))
+    uses = (set(RE_IMPORT.findall(code)) | set(RE_VIRTUAL_IF.findall(code))) - provides
+
+    digest = hashlib.sha256()
+    digest.update(' '.join(unit['args']).encode('utf-8'))
+    for path in files:
+        digest.update(path.relative_to(project_root).as_posix().encode('utf-8'))
+        digest.update(path.read_bytes())
+
+    unit['files'] = [p.relative_to(project_root).as_posix() for p in files]
+    unit['provides'] = sorted(provides)
+    unit['uses'] = sorted(uses)
+    unit['hash'] = digest.hexdigest()
+    return unit
+
+
+def build_dependency_graph(units):
+    """Map each unit's src to the set of unit srcs it depends on.
+
+    A unit depends on another when it imports one of its packages or
+    references one of its interfaces through a virtual interface handle.
+    """
+    owner = {}
+    for unit in units:
+        for name in unit['provides']:
+            owner[name] = unit['src']
+
+    graph = {}
+    for unit in units:
+        graph[unit['src']] = {owner[name] for name in unit['uses']
+                              if name in owner and owner[name] != unit['src']}
+    return graph
+
+
+def get_dependents(graph, changed):
+    """Return changed plus every unit that transitively depends on it."""
+    dirty = set(changed)
+    grew = True
+    while grew:
+        grew = False
+        for src, deps in graph.items():
+            if src not in dirty and deps & dirty:
+                dirty.add(src)
+                grew = True
+    return dirty
+
+
+def build_hash(units):
+    """Hash of the whole design (every unit's source hash)."""
+    digest = hashlib.sha256()
+    for unit in units:
+        digest.update(unit['hash'].encode('utf-8'))
+    return digest.hexdigest()
+
+
+def snapshot_hashes(vopt_commands, design_hash):
+    """{snapshot name: key} for elaborate.do's vopt commands.
+
+    A snapshot's key is the design hash plus its vopt command line, so a
+    changed option (+acc, +cover, -o) re-elaborates it.
+    """
+    return {snapshot_name(args): hashlib.sha256(json.dumps([design_hash, args]).encode('utf-8')).hexdigest()
+            for args in vopt_commands}
+
+
+def new_state():
+    """Return an empty cache state."""
+    return {'version': CACHE_VERSION, 'units': {}, 'snapshots': {}}
+
+
+def load_state(state_file):
+    """Load the cache state, or an empty state if missing or outdated."""
+    try:
+        with open(state_file, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get('version') == CACHE_VERSION:
+            return state
+    except (OSError, ValueError):
+        pass
+    return new_state()
+
+
+def save_state(state_file, state):
+    """Write the cache state atomically."""
+    state_file = Path(state_file)
+    tmp_file = state_file.with_suffix('.tmp')
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    tmp_file.replace(state_file)
+
+
+def assign_libraries(units, top):
+    """Give every unit its own library; the unit declaring top stays in work."""
+    for unit in units:
+        if top in unit['provides']:
+            unit['lib'] = 'work'
+            unit['lib_dir'] = 'sim/work'
+        else:
+            unit['lib'] = Path(unit['src']).stem
+            unit['lib_dir'] = f"sim/units/{unit['lib']}"
+    return units
+
+
+def get_ancestors(graph, src):
+    """Return every unit src reaches through its dependencies."""
+    ancestors = set()
+    pending = list(graph[src])
+    while pending:
+        dep = pending.pop()
+        if dep not in ancestors:
+            ancestors.add(dep)
+            pending.extend(graph[dep])
+    return ancestors
+
+
+def get_levels(units, graph):
+    """Split units into DAG levels; a unit only depends on earlier levels.
+
+    Units keep their compile.do order inside each level.
+    """
+    depth = {}
+
+    def visit(src, stack=()):
+        if src in stack:
+            raise ValueError(f"Circular package dependency: {' -> '.join(stack + (src,))}")
+        if src not in depth:
+            depth[src] = 1 + max((visit(d, stack + (src,)) for d in graph[src]), default=-1)
+        return depth[src]
+
+    for unit in units:
+        visit(unit['src'])
+    levels = [[] for _ in range(max(depth.values(), default=-1) + 1)]
+    for unit in units:
+        levels[depth[unit['src']]].append(unit)
+    return levels
+
+
+def vlog_command(unit, units, graph):
+    """Build the vlog command for a unit compiled into its own library."""
+    args = []
+    skip = False
+    for arg in unit['args']:
+        if skip:
+            skip = False
+        elif arg == '-work':
+            skip = True
+        else:
+            args.append(arg)
+    cmd = ['vlog'] + args + ['-work', unit['lib']]
+    ancestors = get_ancestors(graph, unit['src'])
+    for other in units:
+        if other['src'] in ancestors:
+            cmd += ['-L', other['lib']]
+    return cmd + [unit['src']]
+
+
+def vopt_command(vopt_args, units):
+    """Build the vopt command, linking every per-unit library with -L."""
+    libs = []
+    for unit in units:
+        if unit['lib'] != 'work':
+            libs += ['-L', unit['lib']]
+    return ['vopt'] + vopt_args[:-1] + libs + vopt_args[-1:]
+
+
+def plan_compile(units, state, project_root):
+    """Return the units (in compile.do order) that need to be re-vlogged."""
+    cached = state['units']
+    changed = {u['src'] for u in units
+               if cached.get(u['src']) != u['hash']
+               or not (Path(project_root) / u['lib_dir']).is_dir()}
+    dirty = get_dependents(build_dependency_graph(units), changed)
+    return [u for u in units if u['src'] in dirty]
+
+
+def _run(cmd, cwd):
+    print(f"Executing: {' '.join(cmd)}")
+    return subprocess.run(cmd, cwd=str(cwd)).returncode
+
+
+def _run_captured(cmd, cwd):
+    """Run a command and return (returncode, combined output)."""
+    result = subprocess.run(cmd, cwd=str(cwd), stdout=subprocess.PIPE,
+                            stderr=subprocess.STDOUT, text=True, errors='replace')
+    return result.returncode, result.stdout
+
+
+def _run_traced(cmd, cwd, name, cat):
+    """_run_captured, recorded as a profiler span."""
+    with profiler.span(name, cat, cmd=' '.join(cmd)) as meta:
+        return_code, output = _run_captured(cmd, cwd)
+        meta['returncode'] = return_code
+    return return_code, output
+
+
+def _create_libraries(units, project_root):
+    """vlib/vmap every library whose directory is missing."""
+    for unit in units:
+        if (project_root / unit['lib_dir']).is_dir():
+            continue
+        (project_root / unit['lib_dir']).parent.mkdir(parents=True, exist_ok=True)
+        if _run(['vlib', unit['lib_dir']], project_root) != 0 or \
+           _run(['vmap', unit['lib'], unit['lib_dir']], project_root) != 0:
+            print(f"\n--- ERROR: Could not create library {unit['lib_dir']} ---")
+            return False
+    return True
+
+
+def load_units(run_dir, project_root):
+    """Scan every compile.do unit and assign its library.
+
+    Returns (units, vopt commands); every vopt command has the same top.
+    """
+    vopt_commands = parse_elaborate_script(Path(run_dir) / "elaborate.do")
+    top = vopt_commands[0][-1].split('.')[-1]
+    units = [scan_unit(u, project_root) for u in parse_compile_script(Path(run_dir) / "compile.do")]
+    return assign_libraries(units, top), vopt_commands
+
+
+def get_design_hash(run_dir, project_root):
+    """Content hash of the current sources, without compiling anything."""
+    units, _ = load_units(run_dir, project_root)
+    return build_hash(units)
+
+
+def get_snapshot_hashes(run_dir, project_root):
+    """{snapshot name: key} of the elaborate.do snapshots last built by incremental_build.
+
+    The key is None for a snapshot that was never built (or whose build failed).
+    """
+    names = [snapshot_name(args) for args in parse_elaborate_script(Path(run_dir) / "elaborate.do")]
+    snapshots = load_state(Path(project_root) / "sim" / "compile_cache.json")['snapshots']
+    return {name: snapshots.get(name) for name in names}
+
+
+def incremental_build(run_dir, project_root, jobs=1):
+    """Compile changed units level by level and elaborate if the design changed.
+
+    Up to jobs vlog processes run at once within a DAG level, and up to
+    jobs vopt processes (one per elaborate.do snapshot) after that.
+    Returns a dict with 'ok' (False if a vlog or vopt step failed),
+    'design_hash', 'snapshots' ({snapshot name: key}, see snapshot_hashes),
+    'compile_time' and 'elab_time' (seconds).
+    """
+    run_dir = Path(run_dir)
+    project_root = Path(project_root)
+    sim_dir = project_root / "sim"
+    state_file = sim_dir / "compile_cache.json"
+
+    build = {'ok': False, 'design_hash': None, 'snapshots': {}, 'compile_time': 0.0, 'elab_time': 0.0}
+    start_time = time.time()
+    units, vopt_commands = load_units(run_dir, project_root)
+    graph = build_dependency_graph(units)
+    levels = get_levels(units, graph)
+    design_hash = build_hash(units)
+    build['design_hash'] = design_hash
+    keys = snapshot_hashes(vopt_commands, design_hash)
+
+    state = load_state(state_file)
+    if not state['units']:
+        # No usable cache: libraries may hold units from compile.do or an
+        # older layout, so start from empty libraries.
+        shutil.rmtree(sim_dir / "work", ignore_errors=True)
+        shutil.rmtree(sim_dir / "units", ignore_errors=True)
+        state = new_state()
+    to_compile = {u['src'] for u in plan_compile(units, state, project_root)}
+
+    print(f"\n--- INFO: Starting Step: Compile ({len(to_compile)}/{len(units)} units out of date, "
+          f"{len(levels)} levels) ---")
+    sim_dir.mkdir(exist_ok=True)
+    if not _create_libraries(units, project_root):
+        return build
+
+    if to_compile:
+        # Forget old hashes first so an interrupted compile is retried
+        for src in to_compile:
+            state['units'].pop(src, None)
+        state['snapshots'] = {}
+        save_state(state_file, state)
+
+    for depth, level in enumerate(levels):
+        pending = [u for u in level if u['src'] in to_compile]
+        if not pending:
+            continue
+        print(f"\n--- INFO: Compile level {depth}: {', '.join(u['lib'] for u in pending)} ---")
+        failed = []
+        with ThreadPoolExecutor(max_workers=max(1, min(jobs, len(pending))), thread_name_prefix='vlog') as pool:
+            futures = {}
+            for unit in pending:
+                cmd = vlog_command(unit, units, graph)
+                print(f"Executing: {' '.join(cmd)}")
+                futures[pool.submit(_run_traced, cmd, project_root, f"vlog {unit['lib']}", 'compile')] = unit
+            for future in as_completed(futures):
+                unit = futures[future]
+                return_code, output = future.result()
+                print(output, end='')
+                if return_code != 0:
+                    failed.append(unit['src'])
+                else:
+                    state['units'][unit['src']] = unit['hash']
+        save_state(state_file, state)
+        if failed:
+            print(f"\n--- ERROR: Step 'Compile' failed on {', '.join(failed)}! ---")
+            return build
+    build['compile_time'] = time.time() - start_time
+    profiler.record("Compile", 'compile', start_time, time.time(), units=len(to_compile))
+
+    stale = [args for args in vopt_commands
+             if state['snapshots'].get(snapshot_name(args)) != keys[snapshot_name(args)]]
+    if not stale:
+        print(f"\n--- INFO: Design unchanged, skipping Elaborate ---")
+        build['snapshots'] = keys
+        build['ok'] = True
+        return build
+
+    # Each snapshot is an independent vopt run over the same libraries
+    print(f"\n--- INFO: Starting Step: Elaborate ({', '.join(snapshot_name(a) for a in stale)}) ---")
+    start_time = time.time()
+    failed = []
+    with ThreadPoolExecutor(max_workers=max(1, min(jobs, len(stale))), thread_name_prefix='vopt') as pool:
+        futures = {}
+        for args in stale:
+            cmd = vopt_command(args, units)
+            print(f"Executing: {' '.join(cmd)}")
+            futures[pool.submit(_run_traced, cmd, project_root, f"vopt {snapshot_name(args)}",
+                                'elaborate')] = snapshot_name(args)
+        for future in as_completed(futures):
+            name = futures[future]
+            return_code, output = future.result()
+            print(output, end='')
+            if return_code != 0:
+                failed.append(name)
+            else:
+                state['snapshots'][name] = keys[name]
+    save_state(state_file, state)
+    if failed:
+        print(f"\n--- ERROR: Step 'Elaborate' failed on {', '.join(failed)}! ---")
+        return build
+    build['elab_time'] = time.time() - start_time
+    profiler.record("Elaborate", 'elaborate', start_time, time.time(), snapshots=[snapshot_name(a) for a in stale])
+    build['snapshots'] = keys
+    build['ok'] = True
+    return build
@@ -0,0 +1,188 @@
+"""
+Streaming UVM Log Analyzer
+Parses simulator output line by line while the simulation is running.
+
+Keeps running counts per severity and per report ID (SCOREBOARD, MON,
+VIRT_SEQ, TEST, ...), remembers the first error, and picks up the
+scoreboard summary table and UVM report summary at the end of the run.
+
+Author: Assaf Afriat
+Date: 2026-10-16
+"""
+
+import re
+
+SEVERITIES = ('UVM_INFO', 'UVM_WARNING', 'UVM_ERROR', 'UVM_FATAL')
+
+# UVM_ERROR verification/scoreboard/CpmScoreboard.sv(219) @ 1234 ns: uvm_test_top.m_env.m_scoreboard [SCOREBOARD] msg
+RE_REPORT = re.compile(
+    r'^#?\s*(UVM_INFO|UVM_WARNING|UVM_ERROR|UVM_FATAL)\s+'
+    r'(?:(\S+)\((\d+)\)\s+)?@\s+(\d+(?:\.\d+)?)\s*([munpf]?s)?:\s+(\S+)\s+\[([^\]]+)\]\s?(.*)$')
+# UVM_ERROR :    0   (UVM report summary at the end of the run)
+RE_SUMMARY = re.compile(r'^#?\s*(UVM_INFO|UVM_WARNING|UVM_ERROR|UVM_FATAL)\s*:\s*(\d+)\s*$')
+# ** Error: Assertion error.   /   ** Fatal: ...
+RE_SIM_MESSAGE = re.compile(r'^#?\s*\*\*\s+(Error|Fatal)(?:\s*\([^)]*\))?:\s*(.*)$')
+# |  Total Input          |     200                           |
+RE_SB_ROW = re.compile(r'^#?\s*\|\s+([A-Za-z_ ()]+?)\s+\|\s+(\d+)\s+\|\s*$')
+#    Time: 5000 ns  Iteration: 0  Instance: /tb_top
+#    Time: 1230 ns Started: 1220 ns  Scope: tb_top.stream_if.assert__p_output_stability File: ...
+RE_SIM_TIME = re.compile(r'^#?\s*Time:\s+(\d+(?:\.\d+)?)\s*(\w+)(?:.*\bScope:\s+(\S+))?')
+
+# UVM prints report times with %0t. tb_top sets $timeformat so they carry
+# an ' ns' suffix; without one (no $timeformat) they are in the simulation
+# precision, 1ps under `timescale 1ns/1ps, not in ns.
+REPORT_UNIT = 'ps'
+UNIT_SCALE = {'fs': 1e-6, 'ps': 1e-3, 'ns': 1.0, 'us': 1e3, 'ms': 1e6, 'sec': 1e9, 's': 1e9}
+
+# Scoreboard summary table rows -> result keys
+SCOREBOARD_ROWS = {
+    'Total Input': 'packets_in',
+    'Total Output': 'packets_out',
+    'Matched': 'matched',
+    'Mismatched': 'mismatched',
+    'Dropped (expected)': 'dropped',
+}
+
+
+def to_ns(time, unit):
+    """A report or simulator time in ns."""
+    return time * UNIT_SCALE.get(unit or REPORT_UNIT, 1.0)
+
+
+class UvmLogAnalyzer:
+    """Incremental parser for one simulation's output.
+
+    Call feed(line) for every line; it returns True the first time a line
+    shows a failure (UVM_ERROR, UVM_FATAL or a simulator ** Error), which
+    is what fail-fast mode acts on.
+    """
+
+    def __init__(self):
+        self.counts = {severity: 0 for severity in SEVERITIES}
+        self.ids = {}
+        self.sim_errors = 0
+        self.first_error = None
+        self.scoreboard = {}
+        self.summary = {}
+        # Simulated time in ns (from the simulator's 'Time:' lines)
+        self.sim_time = None
+        self.lines = 0
+
+    def feed(self, line):
+        """Parse one output line. Returns True on the first failure seen."""
+        self.lines += 1
+        line = line.rstrip('\r\n')
+
+        match = RE_REPORT.match(line)
+        if match:
+            severity, _, _, time, unit, _, report_id, message = match.groups()
+            self.counts[severity] += 1
+            key = (severity, report_id)
+            self.ids[key] = self.ids.get(key, 0) + 1
+            if severity in ('UVM_ERROR', 'UVM_FATAL'):
+                return self._record_error(severity, report_id, float(time), unit or REPORT_UNIT, message, line)
+            return False
+
+        match = RE_SIM_MESSAGE.match(line)
+        if match:
+            self.sim_errors += 1
+            # The time (and assertion scope) follow on the next 'Time:' line
+            return self._record_error(f"** {match.group(1)}", 'SIM', None, None, match.group(2), line)
+
+        match = RE_SB_ROW.match(line)
+        if match and match.group(1) in SCOREBOARD_ROWS:
+            self.scoreboard[SCOREBOARD_ROWS[match.group(1)]] = int(match.group(2))
+            return False
+
+        match = RE_SUMMARY.match(line)
+        if match:
+            self.summary[match.group(1)] = int(match.group(2))
+            return False
+
+        match = RE_SIM_TIME.match(line)
+        if match:
+            time, unit = float(match.group(1)), match.group(2)
+            self.sim_time = to_ns(time, unit)
+            if self.first_error and self.first_error['time'] is None:
+                self.first_error['time'] = time
+                self.first_error['unit'] = unit
+                self.first_error['scope'] = match.group(3)
+        return False
+
+    def _record_error(self, severity, report_id, time, unit, message, line):
+        if self.first_error is not None:
+            return False
+        self.first_error = {
+            'severity': severity,
+            'id': report_id,
+            'time': time,
+            'message': message.strip(),
+            'line': line.strip(),
+            'unit': unit,
+            'scope': None,
+        }
+        return True
+
+    @property
+    def errors(self):
+        """Number of UVM_ERROR/UVM_FATAL reports plus simulator errors."""
+        counts = dict(self.counts)
+        # The end-of-run report summary is authoritative when present
+        counts.update(self.summary)
+        return counts['UVM_ERROR'] + counts['UVM_FATAL'] + self.sim_errors
+
+    def passed(self):
+        """True when the output shows no errors and no scoreboard mismatches."""
+        return self.errors == 0 and self.scoreboard.get('mismatched', 0) == 0
+
+    def report(self):
+        """Return a short multi-line summary of what was seen."""
+        lines = ["UVM: " + "  ".join(f"{s}={self.summary.get(s, self.counts[s])}" for s in SEVERITIES)]
+        if self.sim_errors:
+            lines.append(f"Simulator errors: {self.sim_errors}")
+        for (severity, report_id), count in sorted(self.ids.items()):
+            if severity != 'UVM_INFO':
+                lines.append(f"  {severity} [{report_id}]: {count}")
+        if self.scoreboard:
+            lines.append("Scoreboard: " + "  ".join(f"{k}={v}" for k, v in self.scoreboard.items()))
+        if self.first_error:
+            lines.append(f"First error: {self.describe_first_error()}")
+        return '\n'.join(lines)
+
+    def describe_first_error(self):
+        """One-line description of the first error, or None."""
+        e = self.first_error
+        if e is None:
+            return None
+        time = f"{e['time']:.15g} {e['unit']}" if e['time'] is not None else "?"
+        scope = f" ({e['scope']})" if e['scope'] else ""
+        return f"{e['severity']} [{e['id']}] @ {time}{scope}: {e['message']}"
+
+
+def combine(analyzers):
+    """One analyzer summing the results of several (e.g. the shards of a run).
+
+    Counts and scoreboard rows are summed; the simulated time is that of
+    the longest run, since the shards run side by side and each repeats
+    the reset and configuration. The first error is the first one of the
+    first analyzer that has any.
+    """
+    combined = UvmLogAnalyzer()
+    for analyzer in analyzers:
+        for severity in SEVERITIES:
+            combined.counts[severity] += analyzer.counts[severity]
+        for key, count in analyzer.ids.items():
+            combined.ids[key] = combined.ids.get(key, 0) + count
+        for key, count in analyzer.scoreboard.items():
+            combined.scoreboard[key] = combined.scoreboard.get(key, 0) + count
+        combined.sim_errors += analyzer.sim_errors
+        combined.lines += analyzer.lines
+        if analyzer.sim_time is not None:
+            combined.sim_time = max(combined.sim_time or 0, analyzer.sim_time)
+        if combined.first_error is None and analyzer.first_error is not None:
+            combined.first_error = dict(analyzer.first_error)
+    # The report summary only stands in for the counts if every run printed it
+    for severity in SEVERITIES:
+        if analyzers and all(severity in a.summary for a in analyzers):
+            combined.summary[severity] = sum(a.summary[severity] for a in analyzers)
+    return combined
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Time-Budgeted Regression Planner
+Chooses which tests to run, and how many seeds of each, to get the most
+functional coverage out of a fixed wall-clock budget on a given number of
+cores.
+
+Per-test yield comes from the seed hit matrix of seed_minimizer.py (the
+functional bins each past seed of a test hit, parsed with
+get_functional_coverage): a bin hit by h of a test's n seeds is taken to
+be hit by a new seed with probability h/n, so the expected number of bins
+covered by a plan is the sum over bins of 1 - prod(1 - p)^seeds. Per-test
+run times are the medians recorded in the results database.
+
+Every test first gets one seed (it may check things coverage does not
+see); the rest of the budget goes, one seed at a time, to the test with
+the largest expected gain in bins per second of sim time, as long as the
+planned jobs still pack onto the cores (longest first) within the budget.
+
+The plan lists explicit seeds: the lowest ones from the base seed up that
+are neither in the hit matrix nor recorded in the results database, so
+the planned runs are new seeds (the yield model assumes so) rather than
+repeats of seeds already measured or served from the result cache.
+
+Usage:
+    python planner.py --budget 20                   # minutes, cores = CPU count
+    python planner.py --budget 20 --cores 16 -o ci.list
+    python run.py --regress --budget 20 --plan      # plan and run in one go
+
+Author: Assaf Afriat
+Date: 2026-10-16
+"""
+
+import argparse
+import heapq
+import json
+import math
+import os
+import sys
+from pathlib import Path
+
+import regression
+import results_db
+import scheduler
+import seed_minimizer
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent.resolve()
+DEFAULT_MATRIX = PROJECT_ROOT / "coverage" / "seed_matrix.json"
+# Fraction of the budget kept free for sims running long, merges and reports
+PLAN_MARGIN = 0.1
+# Sim time assumed for a test with no recorded runs when nothing is known
+DEFAULT_DURATION = 60.0
+
+
+def load_matrix(matrix_path=DEFAULT_MATRIX, jobs=None):
+    """The seed hit matrix: the saved JSON if present, else parsed from coverage/<test>_<seed>.ucdb."""
+    if matrix_path and Path(matrix_path).exists():
+        with open(matrix_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    ucdbs = sorted(p for p in (PROJECT_ROOT / "coverage").glob("*_*.ucdb") if seed_minimizer.parse_ucdb_name(p))
+    if not ucdbs:
+        return {'seeds': []}
+    return seed_minimizer.build_matrix(ucdbs, jobs)
+
+
+def bin_probabilities(matrix):
+    """Return {test: {bin: probability a new seed of test hits it}}."""
+    seeds = {}
+    hits = {}
+    for entry in matrix['seeds']:
+        test = entry['test']
+        seeds[test] = seeds.get(test, 0) + 1
+        counts = hits.setdefault(test, {})
+        for item in entry['functional']:
+            counts[item] = counts.get(item, 0) + 1
+    return {test: {item: h / seeds[test] for item, h in counts.items()} for test, counts in hits.items()}
+
+
+def expected_bins(probabilities, counts):
+    """Expected number of distinct bins covered by counts[test] new seeds of each test."""
+    miss = {}
+    for test, n in counts.items():
+        for item, p in probabilities.get(test, {}).items():
+            miss[item] = miss.get(item, 1.0) * (1.0 - p) ** n
+    return sum(1.0 - m for m in miss.values())
+
+
+def makespan(durations, cores):
+    """Wall time of the jobs packed longest first onto cores."""
+    loads = [0.0] * max(1, cores)
+    for duration in sorted(durations, reverse=True):
+        heapq.heapreplace(loads, loads[0] + duration)
+    return max(loads)
+
+
+def plan(tests, durations, probabilities, budget, cores, keep_all_tests=True):
+    """Pick a seed count per test for budget seconds on cores.
+
+    tests: candidate tests, in preference order. durations: {test: seconds}.
+    Returns {'counts': {test: seeds}, 'expected_bins', 'total_bins',
+    'makespan'}; tests that got no seed are left out of counts.
+    """
+    counts = {test: 0 for test in tests}
+    jobs = []
+
+    def fits(test):
+        return durations[test] <= budget and makespan(jobs + [durations[test]], cores) <= budget
+
+    def add(test):
+        counts[test] += 1
+        jobs.append(durations[test])
+
+    if keep_all_tests:
+        for test in sorted(tests, key=lambda t: durations[t]):
+            if fits(test):
+                add(test)
+    current = expected_bins(probabilities, counts)
+    while True:
+        best, best_rate, best_bins = None, 0.0, current
+        for test in tests:
+            if not probabilities.get(test) or not fits(test):
+                continue
+            counts[test] += 1
+            bins = expected_bins(probabilities, counts)
+            counts[test] -= 1
+            rate = (bins - current) / durations[test]
+            if rate > best_rate:
+                best, best_rate, best_bins = test, rate, bins
+        # Stop once another seed would add less than a hundredth of a bin
+        if best is None or best_bins - current < 0.01:
+            break
+        add(best)
+        current = best_bins
+    total = set()
+    for bins in probabilities.values():
+        total.update(bins)
+    return {
+        'counts': {test: n for test, n in counts.items() if n},
+        'expected_bins': current,
+        'total_bins': len(total),
+        'makespan': makespan(jobs, cores) if jobs else 0.0,
+    }
+
+
+def used_seeds(db_path, matrix):
+    """Seeds already run per test, from the results database and the hit matrix."""
+    used = {}
+    if db_path and Path(db_path).exists():
+        conn = results_db.connect(db_path)
+        used = results_db.recorded_seeds(conn)
+        conn.close()
+    for entry in matrix['seeds']:
+        used.setdefault(entry['test'], set()).add(entry['seed'])
+    return used
+
+
+def fresh_seeds(count, used, base_seed=1):
+    """The count lowest seeds from base_seed up that are not in used."""
+    seeds = []
+    seed = base_seed
+    while len(seeds) < count:
+        if seed not in used:
+            seeds.append(seed)
+        seed += 1
+    return seeds
+
+
+def test_durations(tests, db_path, source_hash=None):
+    """Median sim time per test from the results database (see scheduler.load_history)."""
+    history = {}
+    if db_path and Path(db_path).exists():
+        conn = results_db.connect(db_path)
+        history = scheduler.load_history(conn, tests, source_hash)
+        conn.close()
+    known = sorted(h['duration'] for h in history.values())
+    default = known[len(known) // 2] if known else DEFAULT_DURATION
+    # Zero-length runs (e.g. a crash at start-up) would look free
+    return {test: max(history[test]['duration'] if test in history else default, 0.1) for test in tests}
+
+
+def make_plan(tests, budget, cores, db_path=results_db.DEFAULT_DB, matrix_path=DEFAULT_MATRIX,
+              source_hash=None, keep_all_tests=True, jobs=None, base_seed=1):
+    """Plan budget seconds of regression over tests; see plan() for the result.
+
+    The result also holds 'seeds': {test: [seed, ...]}, counts[test] seeds
+    per test that have not been run yet (see fresh_seeds).
+    """
+    durations = test_durations(tests, db_path, source_hash)
+    matrix = load_matrix(matrix_path, jobs)
+    probabilities = bin_probabilities(matrix)
+    result = plan(tests, durations, probabilities, budget * (1 - PLAN_MARGIN), cores, keep_all_tests)
+    used = used_seeds(db_path, matrix)
+    result['seeds'] = {test: fresh_seeds(n, used.get(test, set()), base_seed) for test, n in result['counts'].items()}
+    result['durations'] = durations
+    result['no_yield'] = [t for t in tests if not probabilities.get(t)]
+    return result
+
+
+def print_plan(result, budget, cores):
+    print(f"[+] Plan for {budget / 60:.1f} min on {cores} core(s):")
+    for test, n in result['counts'].items():
+        print(f"    {test:<24}{n:>4} seed(s)  ~{result['durations'][test]:.0f}s each")
+    print(f"[+] Estimated wall time: {result['makespan'] / 60:.1f} min")
+    if result['total_bins']:
+        print(f"[+] Expected functional bins: {result['expected_bins']:.1f}/{result['total_bins']} "
+              f"({100.0 * result['expected_bins'] / result['total_bins']:.1f}% of the bins seen so far)")
+    if result['no_yield']:
+        print(f"[*] No coverage history for {', '.join(result['no_yield'])}: one seed each")
+
+
+def write_plan(list_path, result, header=None):
+    """Write a plan as a regression list with its explicit seeds."""
+    regression.write_test_list(list_path, result['seeds'], header)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plan the regression with the most expected coverage in a time budget")
+    parser.add_argument('--budget', type=float, required=True, help="Wall-clock budget in minutes.")
+    parser.add_argument('--cores', type=int, default=os.cpu_count(), help="Simulations that can run at once.")
+    parser.add_argument('--tests', type=Path, default=Path(__file__).parent / "regress.list",
+                        help="Regression list whose tests are the candidates (its seed counts are ignored).")
+    parser.add_argument('--matrix', type=Path, default=DEFAULT_MATRIX,
+                        help="Seed hit matrix from seed_minimizer.py --save-matrix (default: parse coverage/*.ucdb).")
+    parser.add_argument('--db', type=Path, default=results_db.DEFAULT_DB,
+                        help="Results database used for per-test sim times and the seeds already run.")
+    parser.add_argument('--seed', type=int, default=1,
+                        help="Lowest seed to plan; seeds already run are skipped.")
+    parser.add_argument('--allow-drop-tests', action='store_true',
+                        help="Do not reserve a seed for tests with no expected coverage gain.")
+    parser.add_argument('--output', '-o', type=Path, default=Path(__file__).parent / "regress_plan.list",
+                        help="Regression list to write.")
+    args = parser.parse_args()
+
+    tests = list(dict.fromkeys(t for t, _, _ in regression.parse_test_list(args.tests)))
+    budget = args.budget * 60
+    result = make_plan(tests, budget, args.cores, args.db, args.matrix, keep_all_tests=not args.allow_drop_tests,
+                       base_seed=args.seed)
+    if not result['counts']:
+        print(f"[!] No test fits in {args.budget} min")
+        return 1
+    print_plan(result, budget, args.cores)
+    header = (f"Time-budgeted regression plan generated by planner.py\n"
+              f"{args.budget:g} min on {args.cores} core(s), est. {math.ceil(result['makespan'] / 60)} min, "
+              f"{result['expected_bins']:.0f}/{result['total_bins']} expected functional bins")
+    write_plan(args.output, result, header)
+    print(f"[+] Test list: {args.output}")
+    print(f"    Run it with: python run.py --regress {args.output} --budget {args.budget:g}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+"""
+Simulator Resource Sampling
+Samples RSS, CPU time and I/O of a simulator process tree from /proc while
+it runs.
+
+The simulator is started in its own process group (sim_process), so the
+tree is every live process in that group. Each sample sums the group's
+resident memory, CPU time (including reaped children) and storage I/O;
+the peak RSS also takes each process's own high-water mark (VmHWM) into
+account, so a spike between two samples is not missed.
+
+On systems without /proc (Windows, macOS) no samples are taken.
+
+Author: Assaf Afriat
+Date: 2026-10-16
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+
+PROC = Path('/proc')
+CLK_TCK = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+MB = 1024.0 * 1024.0
+
+
+def available():
+    return PROC.is_dir()
+
+
+def group_pids(pgid):
+    """PIDs of the live processes in process group pgid."""
+    pids = []
+    for stat_file in PROC.glob('[0-9]*/stat'):
+        try:
+            # pid (comm) state ppid pgrp ... - comm may contain spaces
+            fields = stat_file.read_text().rpartition(')')[2].split()
+        except OSError:
+            continue
+        if int(fields[2]) == pgid:
+            pids.append(int(stat_file.parent.name))
+    return pids
+
+
+def read_process(pid):
+    """Return {'rss_mb', 'hwm_mb', 'cpu_time', 'read_mb', 'write_mb'} of one process, or None."""
+    try:
+        fields = (PROC / str(pid) / 'stat').read_text().rpartition(')')[2].split()
+        # utime, stime, cutime, cstime (fields 14-17 of stat)
+        cpu_time = sum(int(f) for f in fields[11:15]) / CLK_TCK
+        stats = {'rss_mb': 0.0, 'hwm_mb': 0.0, 'cpu_time': cpu_time, 'read_mb': 0.0, 'write_mb': 0.0}
+        for line in (PROC / str(pid) / 'status').read_text().splitlines():
+            if line.startswith('VmRSS:'):
+                stats['rss_mb'] = int(line.split()[1]) / 1024.0
+            elif line.startswith('VmHWM:'):
+                stats['hwm_mb'] = int(line.split()[1]) / 1024.0
+    except (OSError, ValueError, IndexError):
+        return None
+    try:
+        for line in (PROC / str(pid) / 'io').read_text().splitlines():
+            key, _, value = line.partition(':')
+            if key == 'read_bytes':
+                stats['read_mb'] = int(value) / MB
+            elif key == 'write_bytes':
+                stats['write_mb'] = int(value) / MB
+    except (OSError, ValueError):
+        # /proc/<pid>/io needs the same user (or ptrace access)
+        pass
+    return stats
+
+
+def sample_group(pgid):
+    """One sample of a process group: summed RSS/CPU/I/O and the largest VmHWM."""
+    total = {'rss_mb': 0.0, 'hwm_mb': 0.0, 'cpu_time': 0.0, 'read_mb': 0.0, 'write_mb': 0.0}
+    for pid in group_pids(pgid):
+        stats = read_process(pid)
+        if stats is None:
+            continue
+        for key in ('rss_mb', 'cpu_time', 'read_mb', 'write_mb'):
+            total[key] += stats[key]
+        total['hwm_mb'] = max(total['hwm_mb'], stats['hwm_mb'])
+    return total
+
+
+class ResourceSampler:
+    """Samples a process group every interval seconds on a background thread.
+
+    samples holds [seconds since start, RSS MB, CPU s, read MB, written MB]
+    rows. With relative=True (a long-lived warm session running one job)
+    CPU and I/O are counted from start() instead of from process start.
+    """
+
+    def __init__(self, pgid, interval, relative=False):
+        self.pgid = pgid
+        self.interval = interval
+        self.relative = relative
+        self.samples = []
+        self.peak_rss_mb = None
+        self._base = None
+        self._start = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._start = time.time()
+        if self.relative:
+            self._base = sample_group(self.pgid)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            self.sample()
+            if self._stop.wait(self.interval):
+                return
+
+    def sample(self):
+        stats = sample_group(self.pgid)
+        if self._base is not None:
+            for key in ('cpu_time', 'read_mb', 'write_mb'):
+                stats[key] = max(0.0, stats[key] - self._base[key])
+        if not stats['rss_mb'] and not stats['cpu_time']:
+            # Nothing left in the group (exited) or not started yet
+            return
+        self.samples.append([round(time.time() - self._start, 3), round(stats['rss_mb'], 2),
+                             round(stats['cpu_time'], 2), round(stats['read_mb'], 3),
+                             round(stats['write_mb'], 3)])
+        # A warm session's high-water mark covers earlier jobs too
+        peak = stats['rss_mb'] if self.relative else max(stats['rss_mb'], stats['hwm_mb'])
+        self.peak_rss_mb = peak if self.peak_rss_mb is None else max(self.peak_rss_mb, peak)
+
+    def stop(self):
+        """Stop sampling and return the summary (see summarize)."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return summarize(self.samples, self.peak_rss_mb, time.time() - self._start)
+
+
+def summarize(samples, peak_rss_mb, elapsed):
+    """Peaks and totals of a sample series.
+
+    Returns {'peak_rss_mb', 'cpu_time', 'cpu_util', 'read_mb', 'write_mb',
+    'samples'}; the values are None when nothing was sampled.
+    """
+    if not samples:
+        return {'peak_rss_mb': None, 'cpu_time': None, 'cpu_util': None, 'read_mb': None,
+                'write_mb': None, 'samples': []}
+    last = samples[-1]
+    return {
+        'peak_rss_mb': peak_rss_mb,
+        'cpu_time': last[2],
+        # Average number of busy cores over the run
+        'cpu_util': last[2] / elapsed if elapsed > 0 else None,
+        'read_mb': last[3],
+        'write_mb': last[4],
+        'samples': samples,
+    }
+
+
+def describe(resources):
+    """One-line resource summary, or None if nothing was sampled."""
+    if not resources or resources.get('peak_rss_mb') is None:
+        return None
+    return (f"peak RSS {resources['peak_rss_mb']:.0f} MB, CPU {resources['cpu_time']:.1f}s "
+            f"({100 * (resources['cpu_util'] or 0):.0f}% of one core), "
+            f"I/O read {resources['read_mb']:.1f} MB / written {resources['write_mb']:.1f} MB")
@@ -0,0 +1,121 @@
+"""
+Run-Phase Profiler
+Records compile, elaborate, simulate, merge and report steps as spans and
+writes them as a Chrome trace (JSON Trace Event Format), which opens in
+chrome://tracing or https://ui.perfetto.dev.
+
+Spans are recorded per thread, and every thread gets its own lane named
+after it, so the workers of a parallel regression (sim_0, sim_1, ...) or
+compile level (vlog_0, ...) show up side by side. Each span carries its
+metadata (test, seed, return code, ...) as trace args.
+
+Recording is off until enable() is called; span() is then a no-op.
+
+Author: Assaf Afriat
+Date: 2026-10-16
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+_enabled = False
+_origin = time.time()
+_events = []
+_lanes = {}
+_lock = threading.Lock()
+
+
+def enable():
+    """Start recording spans; timestamps are relative to this call."""
+    global _enabled, _origin
+    with _lock:
+        _enabled = True
+        _origin = time.time()
+        _events.clear()
+        _lanes.clear()
+        _lanes['main'] = 0
+
+
+def _lane():
+    # Called with the lock held; lanes are keyed by thread name so
+    # successive pools with the same worker names share lanes
+    name = threading.current_thread().name
+    if name == 'MainThread':
+        name = 'main'
+    return _lanes.setdefault(name, len(_lanes))
+
+
+def record(name, cat, start, end, **meta):
+    """Record a span that was timed elsewhere (time.time() start and end)."""
+    if not _enabled:
+        return
+    with _lock:
+        _events.append({
+            'name': name,
+            'cat': cat,
+            'ph': 'X',
+            'ts': round((start - _origin) * 1e6),
+            'dur': round((end - start) * 1e6),
+            'pid': os.getpid(),
+            'tid': _lane(),
+            'args': meta,
+        })
+
+
+@contextmanager
+def span(name, cat, **meta):
+    """Time the enclosed block as one span.
+
+    Yields the span's metadata dict, so results known only at the end
+    (return code, status) can be added to it.
+    """
+    start = time.time()
+    try:
+        yield meta
+    finally:
+        record(name, cat, start, time.time(), **meta)
+
+
+def summary():
+    """Return {category: (spans, wall seconds)} over the recorded spans.
+
+    Wall time is the union of a category's spans, so parallel lanes and
+    nested spans (each vlog inside "Compile") are not counted twice.
+    """
+    by_cat = {}
+    with _lock:
+        for event in _events:
+            by_cat.setdefault(event['cat'], []).append((event['ts'], event['ts'] + event['dur']))
+    totals = {}
+    for cat, spans in by_cat.items():
+        wall = 0
+        end = None
+        for start, stop in sorted(spans):
+            if end is None or start > end:
+                wall += stop - start
+                end = stop
+            elif stop > end:
+                wall += stop - end
+                end = stop
+        totals[cat] = (len(spans), wall / 1e6)
+    return totals
+
+
+def save(path):
+    """Write the recorded spans as a Chrome trace JSON file."""
+    with _lock:
+        events = list(_events)
+        lanes = dict(_lanes)
+    pid = os.getpid()
+    metadata = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'args': {'name': 'run.py'}}]
+    for name, tid in lanes.items():
+        metadata.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}})
+        metadata.append({'name': 'thread_sort_index', 'ph': 'M', 'pid': pid, 'tid': tid,
+                         'args': {'sort_index': tid}})
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': metadata + events, 'displayTimeUnit': 'ms'}, f, default=str)
@@ -0,0 +1,278 @@
+"""
+Parallel Regression Engine
+Runs a list of (test, seed) simulation jobs through a bounded worker pool.
+
+Each job gets its own log, waveform and UCDB path so parallel simulations
+never overwrite each other's results.
+
+Author: Assaf Afriat
+Date: 2026-10-16
+"""
+
+import os
+import time
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+import profiler
+import sim_process
+from log_analyzer import UvmLogAnalyzer
+
+# Tests whose virtual sequence is only reset, configure and the stress step
+# (CpmBenchVirtualSeq). Their stress packets can be split over shards; other
+# tests would repeat their fixed traffic, drop and readback steps in every
+# shard and count those packets once per shard.
+SHARDABLE_TESTS = ('CpmBenchTest',)
+
+def parse_test_list(list_path):
+    """Parse a regression list file into [(test, seed_count, seeds), ...].
+
+    Each non-empty line holds a test name and either an optional seed count
+    or an explicit list of seeds:
+        CpmSmokeTest      5
+        CpmMainTest       seeds=3,17,42
+    seeds is None for counted entries (seeds start at the base seed).
+    Lines starting with '#' are comments.
+    """
+    tests = []
+    with open(list_path, 'r', encoding='utf-8') as f:
+        for line_num, line in enumerate(f, 1):
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            fields = line.split()
+            seeds = None
+            if len(fields) == 2 and fields[1].startswith('seeds='):
+                seed_list = fields[1][len('seeds='):].split(',')
+                if all(s.isdigit() for s in seed_list):
+                    seeds = [int(s) for s in seed_list]
+            if len(fields) > 2 or (len(fields) == 2 and seeds is None and not fields[1].isdigit()):
+                raise ValueError(f"{list_path}:{line_num}: expected '<test> [count | seeds=N,N,...]', "
+                                 f"got '{line}'")
+            if seeds is not None:
+                count = len(seeds)
+            else:
+                count = int(fields[1]) if len(fields) == 2 else 1
+            tests.append((fields[0], count, seeds))
+    return tests
+
+
+def write_test_list(list_path, seeds_by_test, header=None):
+    """Write {test: [seed, ...]} as a regression list with explicit seeds."""
+    with open(list_path, 'w', encoding='utf-8') as f:
+        for line in (header or '').splitlines():
+            f.write(f"# {line}\n" if line else "#\n")
+        for test, seeds in seeds_by_test.items():
+            f.write(f"{test:<24}seeds={','.join(str(s) for s in sorted(seeds))}\n")
+
+
+def get_job_paths(project_root, test, seed=None, suffix=''):
+    """Return (log, wlf, ucdb) paths for a job.
+
+    Single runs (seed=None) keep the historical logs/{test}.log naming;
+    regression jobs are suffixed with the seed (and suffix, e.g. '_debug').
+    """
+    stem = (test if seed is None else f"{test}_{seed}") + suffix
+    logs_dir = Path(project_root) / "logs"
+    coverage_dir = Path(project_root) / "coverage"
+    return (logs_dir / f"{stem}.log",
+            logs_dir / f"{stem}.wlf",
+            coverage_dir / f"{stem}.ucdb")
+
+
+def expand_jobs(tests, base_seed, project_root):
+    """Expand parse_test_list() entries into one job dict per (test, seed)."""
+    jobs = []
+    for test, count, seeds in tests:
+        if seeds is None:
+            seeds = [base_seed + i for i in range(count)]
+        for seed in seeds:
+            log_file, wlf_file, ucdb_file = get_job_paths(project_root, test, seed)
+            jobs.append({
+                'test': test,
+                'seed': seed,
+                'log': log_file,
+                'wlf': wlf_file,
+                'ucdb': ucdb_file,
+            })
+    return jobs
+
+
+def shard_seed(seed, index):
+    """Seed of shard index of a run with seed; shard 0 keeps the seed itself."""
+    if index == 0:
+        return seed
+    return zlib.crc32(f"{seed}.{index}".encode()) & 0x7fffffff
+
+
+def shard_jobs(test, seed, shards, packets, project_root):
+    """Split one run of a test into shards jobs of packets / shards stress packets each.
+
+    test must be one of SHARDABLE_TESTS. Each shard has a derived seed (shard_seed), its share of the packets
+    as +CPM_STRESS_PACKETS in job['plusargs'], and logs/coverage named
+    <test>_shard<i>.
+    """
+    jobs = []
+    for index in range(shards):
+        count = packets // shards + (1 if index < packets % shards else 0)
+        log_file, wlf_file, ucdb_file = get_job_paths(project_root, test, suffix=f"_shard{index}")
+        jobs.append({
+            'test': test,
+            'seed': shard_seed(seed, index),
+            'log': log_file,
+            'wlf': wlf_file,
+            'ucdb': ucdb_file,
+            'shard': index,
+            'packets': count,
+            'plusargs': [f"CPM_STRESS_PACKETS={count}"],
+        })
+    return jobs
+
+
+def run_job(job, build_cmd, project_root, timeout=None, idle_timeout=None, fail_fast=False,
+            session_pool=None, category='simulate', deadline=None):
+    """Run one simulation job and fill in its return code, status and elapsed time.
+
+    The output is streamed through a UvmLogAnalyzer (job['analyzer']); a
+    job passes only if vsim exits cleanly and the log shows no errors.
+    With a session_pool the job runs in a warm vsim session instead of a
+    new vsim process. The run is recorded as a profiler span of category.
+    A job still running at deadline (a time.time() value) is killed with
+    status 'budget'.
+    """
+    analyzer = UvmLogAnalyzer()
+    if deadline is not None:
+        remaining = max(1, deadline - time.time())
+        timeout = min(timeout, remaining) if timeout else remaining
+
+    def on_line(line):
+        return analyzer.feed(line) and fail_fast
+
+    with profiler.span(f"{job['test']} seed={job['seed']}", category, test=job['test'],
+                       seed=job['seed']) as meta:
+        if session_pool is not None:
+            result = session_pool.run(job, on_line, timeout=timeout, idle_timeout=idle_timeout)
+        else:
+            # vsim already writes the full transcript to -logfile, so the console
+            # echo is off to keep parallel jobs from interleaving.
+            result = sim_process.run_sim(build_cmd(job), project_root, timeout=timeout,
+                                         idle_timeout=idle_timeout, log_file=job['log'], on_line=on_line,
+                                         echo=False)
+        job.update(result)
+        job['analyzer'] = analyzer
+        if result['status'] == 'ok' and not analyzer.passed():
+            job['status'] = 'uvm_error'
+        elif result['status'] == 'timeout' and deadline is not None and time.time() >= deadline:
+            job['status'] = 'budget'
+        job['passed'] = job['status'] == 'ok'
+        meta.update(returncode=job['returncode'], status=job['status'], errors=analyzer.errors)
+    return job
+
+
+def run_regression(jobs, build_cmd, project_root, max_workers=None, timeout=None, idle_timeout=None,
+                   fail_fast=False, on_done=None, session_pool=None, category='simulate', scheduler=None,
+                   deadline=None, skip=None):
+    """Run all jobs through a pool of at most max_workers concurrent sims.
+
+    build_cmd(job) returns the shell command for a job. Each sim is bounded
+    by the timeout / idle_timeout watchdogs of sim_process.run_sim and, with
+    fail_fast, killed at its first UVM_ERROR/UVM_FATAL. Jobs are returned in
+    completion order with 'returncode', 'status', 'elapsed', 'analyzer' and
+    'passed' set; on_done(job) is called for each as it finishes.
+    session_pool (a sim_pool.SessionPool with max_workers sessions) runs
+    the jobs in warm vsim sessions. Each worker is one profiler lane, and
+    the jobs are recorded as spans of category.
+    A scheduler (scheduler.JobScheduler) decides the start order and holds
+    jobs back while the license count or memory budget is used up; without
+    one, jobs start in list order as workers free up.
+    With a deadline (a time.time() value) no job starts that is not
+    expected to finish by then, and jobs still running at it are killed
+    with status 'budget'. skip(job) may return a reason (e.g. the test's
+    coverage saturated) for not starting a job. Jobs that never started
+    are not returned.
+    """
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if scheduler is not None:
+        max_workers = scheduler.workers(max_workers)
+    max_workers = max(1, min(max_workers, len(jobs)))
+
+    print(f"\n--- INFO: Starting Regression: {len(jobs)} jobs, {max_workers} workers ---")
+    pending = list(jobs)
+    if scheduler is not None:
+        pending = scheduler.order(pending)
+        print(f"Schedule: {scheduler.describe(pending)}")
+
+    done = []
+    running = {}
+    skipped = {}
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='sim') as pool:
+        while pending or running:
+            # Start jobs while a worker (and the scheduler's limits) allow
+            while pending and len(running) < max_workers:
+                index = 0 if scheduler is None else scheduler.next_job(pending, list(running.values()))
+                if index is None:
+                    break
+                job = pending.pop(index)
+                reason = None
+                if deadline is not None and time.time() + job.get('estimate', 0) > deadline:
+                    reason = "time budget"
+                elif skip is not None:
+                    reason = skip(job)
+                if reason:
+                    skipped[reason] = skipped.get(reason, 0) + 1
+                    continue
+                running[pool.submit(run_job, job, build_cmd, project_root, timeout, idle_timeout, fail_fast,
+                                    session_pool, category, deadline)] = job
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                del running[future]
+                job = future.result()
+                done.append(job)
+                status = "PASS" if job['passed'] else job['status'].upper()
+                print(f"[{len(done)}/{len(jobs)}] {status}  {job['test']} seed={job['seed']} "
+                      f"({job['elapsed']:.1f}s)  {job['log']}")
+                if on_done is not None:
+                    on_done(job)
+    for reason, count in skipped.items():
+        print(f"\n--- INFO: {count} job(s) not started: {reason} ---")
+    return done
+
+
+def print_summary(results):
+    """Print a per-test pass/fail summary of a finished regression."""
+    print(f"\n--- INFO: Regression Summary ---")
+    by_test = {}
+    for job in results:
+        by_test.setdefault(job['test'], []).append(job)
+
+    print(f"{'Test':<24}{'Pass':>6}{'Fail':>6}{'Avg (s)':>10}{'CPU (s)':>10}{'Peak RSS MB':>13}")
+    for test, jobs in by_test.items():
+        passed = sum(1 for j in jobs if j['passed'])
+        failed = sum(1 for j in jobs if not j['passed'] and j['status'] != 'budget')
+        avg = sum(j['elapsed'] for j in jobs) / len(jobs)
+        sampled = [j['resources'] for j in jobs if (j.get('resources') or {}).get('peak_rss_mb') is not None]
+        if sampled:
+            cpu = f"{sum(r['cpu_time'] for r in sampled) / len(sampled):.1f}"
+            rss = f"{max(r['peak_rss_mb'] for r in sampled):.0f}"
+        else:
+            cpu = rss = '-'
+        print(f"{test:<24}{passed:>6}{failed:>6}{avg:>10.1f}{cpu:>10}{rss:>13}")
+
+    stopped = [j for j in results if j['status'] == 'budget']
+    if stopped:
+        names = ', '.join(f"{j['test']} seed={j['seed']}" for j in stopped)
+        print(f"Stopped at the time budget: {names}")
+    failed = [j for j in results if not j['passed'] and j['status'] != 'budget']
+    for job in sorted(failed, key=lambda j: (j['test'], j['seed'])):
+        print(f"FAILED ({job['status']}): {job['test']} seed={job['seed']}  log: {job['log']}")
+        first_error = job['analyzer'].describe_first_error()
+        if first_error:
+            print(f"    {first_error}")
+        debug = job.get('debug')
+        if debug:
+            print(f"    debug rerun ({debug['status']}): {debug['log']}  waves: {debug['wlf']} ({debug['window']})")
+    return not failed
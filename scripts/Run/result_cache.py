@@ -0,0 +1,160 @@
+"""
+Simulation Result Cache
+Memoizes passing simulations so an identical run is not simulated twice.
+
+A simulation is deterministic for a given elaborated snapshot (design and
+vopt options), test, seed, verbosity and set of plusargs; those, plus run
+options that change the outputs (optimized snapshot, vsim arguments, the
+checkpoint a run is restored from, coverage off), form the cache key. A hit restores the stored log, UCDB and (for debug-snapshot
+runs) waveform to the job's paths and replays the log through a
+UvmLogAnalyzer, so callers see the same verdict and counts as a real run.
+
+Entries live in sim/result_cache/<key>/ and are evicted least recently
+used first once the directory exceeds its size cap.
+
+Author: Assaf Afriat
+Date: 2026-10-16
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+from log_analyzer import UvmLogAnalyzer
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent.resolve()
+DEFAULT_DIR = PROJECT_ROOT / "sim" / "result_cache"
+DEFAULT_MAX_MB = 2048
+
+# Bump when the entry layout or key fields change
+CACHE_VERSION = 3
+META_FILE = "result.json"
+
+
+def make_key(snapshot, test, seed, verbosity='UVM_MEDIUM', plusargs=(), options=()):
+    """Return the cache key for a run, or None if the snapshot is unknown."""
+    if not snapshot:
+        return None
+    fields = [CACHE_VERSION, snapshot, test, int(seed), verbosity, sorted(plusargs), sorted(options)]
+    return hashlib.sha256(json.dumps(fields).encode('utf-8')).hexdigest()
+
+
+def lookup(cache_dir, key):
+    """Return the stored entry for key, or None on a miss.
+
+    A hit refreshes the entry's access time for LRU eviction.
+    """
+    if key is None:
+        return None
+    entry_dir = Path(cache_dir) / key
+    try:
+        with open(entry_dir / META_FILE, 'r', encoding='utf-8') as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not (entry_dir / entry['log']).is_file():
+        return None
+    os.utime(entry_dir / META_FILE)
+    entry['dir'] = entry_dir
+    return entry
+
+
+def restore(entry, job, wlf=None):
+    """Copy a cached entry's log/UCDB (and WLF to wlf) to the job's paths and fill in its result."""
+    start_time = time.time()
+    entry_dir = entry['dir']
+    Path(job['log']).parent.mkdir(parents=True, exist_ok=True)
+    shutil.copyfile(entry_dir / entry['log'], job['log'])
+    if entry.get('ucdb') and job.get('ucdb'):
+        Path(job['ucdb']).parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(entry_dir / entry['ucdb'], job['ucdb'])
+    if entry.get('wlf') and wlf:
+        Path(wlf).parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(entry_dir / entry['wlf'], wlf)
+
+    analyzer = UvmLogAnalyzer()
+    with open(job['log'], 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            analyzer.feed(line)
+    job.update(returncode=0, status='cached', passed=analyzer.passed(), analyzer=analyzer,
+               elapsed=time.time() - start_time, cached_elapsed=entry['elapsed'])
+    return job
+
+
+def store(cache_dir, key, job, max_mb=DEFAULT_MAX_MB, wlf=None):
+    """Store a passing job's log, UCDB and waveform (wlf) under key, then enforce the size cap.
+
+    Failing, aborted or timed-out runs are never cached.
+    """
+    if key is None or not job.get('passed') or job.get('status') != 'ok':
+        return False
+    cache_dir = Path(cache_dir)
+    entry_dir = cache_dir / key
+    # Build the entry beside its final name so readers never see half of it
+    tmp_dir = cache_dir / f".{key}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+    entry = {
+        'test': job['test'],
+        'seed': job['seed'],
+        'elapsed': job['elapsed'],
+        'stored': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'log': 'sim.log',
+        'ucdb': None,
+        'wlf': None,
+    }
+    try:
+        shutil.copyfile(job['log'], tmp_dir / entry['log'])
+        if job.get('ucdb') and Path(job['ucdb']).is_file():
+            entry['ucdb'] = 'sim.ucdb'
+            shutil.copyfile(job['ucdb'], tmp_dir / entry['ucdb'])
+        if wlf and Path(wlf).is_file():
+            entry['wlf'] = 'sim.wlf'
+            shutil.copyfile(wlf, tmp_dir / entry['wlf'])
+        with open(tmp_dir / META_FILE, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, indent=2)
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        tmp_dir.replace(entry_dir)
+    except OSError as e:
+        print(f"--- WARNING: Could not cache result for {job['test']} seed={job['seed']}: {e} ---")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        return False
+    evict(cache_dir, max_mb)
+    return True
+
+
+def _dir_size(path):
+    return sum(p.stat().st_size for p in Path(path).rglob('*') if p.is_file())
+
+
+def evict(cache_dir, max_mb=DEFAULT_MAX_MB):
+    """Remove least recently used entries until the cache fits in max_mb.
+
+    Returns the number of entries removed.
+    """
+    cache_dir = Path(cache_dir)
+    if not cache_dir.is_dir():
+        return 0
+    entries = []
+    for entry_dir in cache_dir.iterdir():
+        if not entry_dir.is_dir() or entry_dir.name.startswith('.'):
+            continue
+        try:
+            last_used = (entry_dir / META_FILE).stat().st_mtime
+        except OSError:
+            last_used = 0
+        entries.append((last_used, _dir_size(entry_dir), entry_dir))
+
+    total = sum(size for _, size, _ in entries)
+    max_bytes = max_mb * 1024 * 1024
+    removed = 0
+    for _, size, entry_dir in sorted(entries, key=lambda e: e[0]):
+        if total <= max_bytes:
+            break
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        total -= size
+        removed += 1
+    return removed
@@ -0,0 +1,583 @@
+#!/usr/bin/env python3
+"""
+Regression Results Database
+SQLite record of every simulation run by run.py, with a small query CLI.
+
+Usage:
+    python results_db.py query [--test T] [--seed S] [--failed] [--since DATE] [--limit N]
+    python results_db.py stats [--test T] [--since DATE]
+    python results_db.py export-csv [--tracking-dir DIR]
+    python results_db.py resources RUN_ID [--csv FILE]
+
+Author: Assaf Afriat
+Date: 2026-10-16
+"""
+
+import argparse
+import csv
+import re
+import sqlite3
+import sys
+from datetime import datetime
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent.resolve()
+DEFAULT_DB = PROJECT_ROOT / "results" / "results.db"
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (
+    id            INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_date      TEXT NOT NULL,
+    test          TEXT NOT NULL,
+    seed          INTEGER NOT NULL,
+    source_hash   TEXT,
+    status        TEXT NOT NULL,
+    passed        INTEGER NOT NULL,
+    returncode    INTEGER,
+    compile_time  REAL,
+    elab_time     REAL,
+    sim_time      REAL,
+    sim_time_ns   REAL,
+    packets_in    INTEGER,
+    packets_out   INTEGER,
+    dropped       INTEGER,
+    matched       INTEGER,
+    mismatched    INTEGER,
+    uvm_infos     INTEGER,
+    uvm_warnings  INTEGER,
+    uvm_errors    INTEGER,
+    uvm_fatals    INTEGER,
+    sim_errors    INTEGER,
+    first_error   TEXT,
+    log_path      TEXT,
+    ucdb_path     TEXT,
+    peak_rss_mb   REAL,
+    cpu_time      REAL,
+    read_mb       REAL,
+    write_mb      REAL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_test ON runs(test);
+CREATE INDEX IF NOT EXISTS idx_runs_seed ON runs(seed);
+CREATE INDEX IF NOT EXISTS idx_runs_date ON runs(run_date);
+
+CREATE TABLE IF NOT EXISTS report_ids (
+    run_id     INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    severity   TEXT NOT NULL,
+    report_id  TEXT NOT NULL,
+    count      INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_report_ids_run ON report_ids(run_id);
+
+CREATE TABLE IF NOT EXISTS resource_samples (
+    run_id     INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    t          REAL NOT NULL,
+    rss_mb     REAL,
+    cpu_time   REAL,
+    read_mb    REAL,
+    write_mb   REAL
+);
+CREATE INDEX IF NOT EXISTS idx_resource_samples_run ON resource_samples(run_id);
+
+CREATE TABLE IF NOT EXISTS bench_runs (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    session         TEXT NOT NULL,
+    run_date        TEXT NOT NULL,
+    label           TEXT,
+    source_hash     TEXT,
+    packets         INTEGER NOT NULL,
+    mode            TEXT NOT NULL,
+    drop_en         INTEGER NOT NULL,
+    seed            INTEGER NOT NULL,
+    status          TEXT NOT NULL,
+    wall_time       REAL,
+    sim_time_ns     REAL,
+    cycles          INTEGER,
+    packets_in      INTEGER,
+    packets_per_sec REAL,
+    cycles_per_sec  REAL,
+    peak_rss_mb     REAL,
+    log_path        TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_bench_point ON bench_runs(packets, mode, drop_en);
+CREATE INDEX IF NOT EXISTS idx_bench_session ON bench_runs(session);
+'''
+
+
+# Columns added to runs after the first release, in order
+ADDED_COLUMNS = [
+    ('peak_rss_mb', 'REAL'),
+    ('cpu_time', 'REAL'),
+    ('read_mb', 'REAL'),
+    ('write_mb', 'REAL'),
+]
+
+
+def connect(db_path=DEFAULT_DB):
+    """Open (and create if needed) the results database."""
+    db_path = Path(db_path)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    # Several run.py invocations may write at the same time
+    conn = sqlite3.connect(str(db_path), timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+    # Databases created before a column was added get it here
+    existing = {row['name'] for row in conn.execute('PRAGMA table_info(runs)')}
+    with conn:
+        for column, sql_type in ADDED_COLUMNS:
+            if column not in existing:
+                conn.execute(f'ALTER TABLE runs ADD COLUMN {column} {sql_type}')
+    return conn
+
+
+def record_run(conn, job, analyzer=None, build=None):
+    """Insert one finished run and return its row id.
+
+    job: dict with 'test', 'seed', 'status', 'passed', 'returncode',
+        'elapsed', 'log' and 'ucdb' (as produced by run.py / regression).
+    analyzer: the UvmLogAnalyzer that watched the run.
+    build: dict with 'design_hash', 'compile_time' and 'elab_time'.
+    The job's 'resources' (proc_sampler summary), if any, are stored as
+    peaks in the run and as a time series in resource_samples.
+    """
+    build = build or {}
+    resources = job.get('resources') or {}
+    counts = {}
+    scoreboard = {}
+    if analyzer is not None:
+        counts = dict(analyzer.counts)
+        # The end-of-run report summary is authoritative when present
+        counts.update(analyzer.summary)
+        scoreboard = analyzer.scoreboard
+
+    row = {
+        'run_date': datetime.now().isoformat(timespec='seconds'),
+        'test': job['test'],
+        'seed': job['seed'],
+        'source_hash': build.get('design_hash'),
+        'status': job['status'],
+        'passed': int(bool(job['passed'])),
+        'returncode': job.get('returncode'),
+        'compile_time': build.get('compile_time'),
+        'elab_time': build.get('elab_time'),
+        'sim_time': job.get('elapsed'),
+        'sim_time_ns': analyzer.sim_time if analyzer else None,
+        'packets_in': scoreboard.get('packets_in'),
+        'packets_out': scoreboard.get('packets_out'),
+        'dropped': scoreboard.get('dropped'),
+        'matched': scoreboard.get('matched'),
+        'mismatched': scoreboard.get('mismatched'),
+        'uvm_infos': counts.get('UVM_INFO'),
+        'uvm_warnings': counts.get('UVM_WARNING'),
+        'uvm_errors': counts.get('UVM_ERROR'),
+        'uvm_fatals': counts.get('UVM_FATAL'),
+        'sim_errors': analyzer.sim_errors if analyzer else None,
+        'first_error': analyzer.describe_first_error() if analyzer else None,
+        'log_path': str(job['log']) if job.get('log') else None,
+        'ucdb_path': str(job['ucdb']) if job.get('ucdb') else None,
+        'peak_rss_mb': resources.get('peak_rss_mb'),
+        'cpu_time': resources.get('cpu_time'),
+        'read_mb': resources.get('read_mb'),
+        'write_mb': resources.get('write_mb'),
+    }
+    columns = ', '.join(row)
+    placeholders = ', '.join(f':{c}' for c in row)
+    with conn:
+        cursor = conn.execute(f'INSERT INTO runs ({columns}) VALUES ({placeholders})', row)
+        run_id = cursor.lastrowid
+        if analyzer is not None:
+            conn.executemany(
+                'INSERT INTO report_ids (run_id, severity, report_id, count) VALUES (?, ?, ?, ?)',
+                [(run_id, sev, rid, n) for (sev, rid), n in analyzer.ids.items()])
+        if resources.get('samples'):
+            conn.executemany(
+                'INSERT INTO resource_samples (run_id, t, rss_mb, cpu_time, read_mb, write_mb) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                [(run_id, *sample) for sample in resources['samples']])
+    return run_id
+
+
+def query_runs(conn, test=None, seed=None, failed=False, since=None, limit=50):
+    """Return matching runs, newest first."""
+    where = []
+    params = []
+    if test:
+        where.append('test = ?')
+        params.append(test)
+    if seed is not None:
+        where.append('seed = ?')
+        params.append(seed)
+    if failed:
+        where.append('passed = 0')
+    if since:
+        where.append('run_date >= ?')
+        params.append(since)
+    sql = 'SELECT * FROM runs'
+    if where:
+        sql += ' WHERE ' + ' AND '.join(where)
+    sql += ' ORDER BY run_date DESC, id DESC LIMIT ?'
+    params.append(limit)
+    return conn.execute(sql, params).fetchall()
+
+
+def test_stats(conn, test=None, since=None):
+    """Per-test and per-day run counts, pass rates and sim times."""
+    where = []
+    params = []
+    if test:
+        where.append('test = ?')
+        params.append(test)
+    if since:
+        where.append('run_date >= ?')
+        params.append(since)
+    clause = (' WHERE ' + ' AND '.join(where)) if where else ''
+    return conn.execute(f'''
+        SELECT test, substr(run_date, 1, 10) AS day, COUNT(*) AS runs,
+               SUM(passed) AS passed, AVG(sim_time) AS avg_time, MAX(sim_time) AS max_time
+        FROM runs{clause}
+        GROUP BY test, day
+        ORDER BY test, day''', params).fetchall()
+
+
+def latest_runs(conn):
+    """Most recent run of each test, keyed by test name."""
+    rows = conn.execute('''
+        SELECT r.* FROM runs r
+        JOIN (SELECT test, MAX(id) AS id FROM runs GROUP BY test) latest ON r.id = latest.id
+    ''').fetchall()
+    return {row['test']: row for row in rows}
+
+
+def seed_sim_times(conn):
+    """Average sim time of every (test, seed) over runs that actually simulated."""
+    rows = conn.execute('''
+        SELECT test, seed, AVG(sim_time) AS avg_time FROM runs
+        WHERE status = 'ok' AND sim_time IS NOT NULL
+        GROUP BY test, seed''').fetchall()
+    return {(row['test'], row['seed']): row['avg_time'] for row in rows}
+
+
+def recorded_seeds(conn):
+    """Every seed recorded for each test, as {test: set(seeds)}."""
+    seeds = {}
+    for row in conn.execute('SELECT DISTINCT test, seed FROM runs'):
+        seeds.setdefault(row['test'], set()).add(row['seed'])
+    return seeds
+
+
+def record_bench(conn, row):
+    """Insert one benchmark measurement (a dict of bench_runs columns)."""
+    columns = ', '.join(row)
+    placeholders = ', '.join(f':{c}' for c in row)
+    with conn:
+        return conn.execute(f'INSERT INTO bench_runs ({columns}) VALUES ({placeholders})', row).lastrowid
+
+
+def bench_baseline(conn, packets, mode, drop_en, exclude_session=None, label=None, sessions=5):
+    """Wall times of passing benchmark runs of one point to compare against.
+
+    With label, every run recorded under that label; otherwise the runs of
+    the last `sessions` benchmark sessions of that point other than
+    exclude_session.
+    """
+    if label:
+        rows = conn.execute('''
+            SELECT wall_time FROM bench_runs
+            WHERE label = ? AND packets = ? AND mode = ? AND drop_en = ? AND status = 'ok'
+              AND session != ?''', (label, packets, mode, drop_en, exclude_session or '')).fetchall()
+    else:
+        rows = conn.execute('''
+            SELECT wall_time FROM bench_runs
+            WHERE packets = ? AND mode = ? AND drop_en = ? AND status = 'ok' AND session IN (
+                SELECT DISTINCT session FROM bench_runs
+                WHERE session != ? AND packets = ? AND mode = ? AND drop_en = ? AND status = 'ok'
+                ORDER BY session DESC LIMIT ?)''',
+            (packets, mode, drop_en, exclude_session or '', packets, mode, drop_en, sessions)).fetchall()
+    return [row['wall_time'] for row in rows if row['wall_time'] is not None]
+
+
+def bench_history(conn, sessions=10):
+    """Mean wall time and throughput per point of the last benchmark sessions, newest first."""
+    return conn.execute('''
+        SELECT session, label, source_hash, packets, mode, drop_en, COUNT(*) AS runs,
+               AVG(wall_time) AS wall_time, AVG(packets_per_sec) AS packets_per_sec,
+               MAX(peak_rss_mb) AS peak_rss_mb
+        FROM bench_runs
+        WHERE status = 'ok' AND session IN (
+            SELECT DISTINCT session FROM bench_runs ORDER BY session DESC LIMIT ?)
+        GROUP BY session, packets, mode, drop_en
+        ORDER BY session DESC, packets, mode, drop_en''', (sessions,)).fetchall()
+
+
+def _fmt(value):
+    return 'N/A' if value is None else value
+
+
+def export_test_plan(conn, csv_path):
+    """Refresh Pass/Fail, Errors, date and packet counts in test_plan.csv.
+
+    Only the first row of each Test Class is updated from its latest run.
+    The later rows describe sub-features of the same run (one mode, the
+    drop path, ...) whose counts a run does not report, so they are kept
+    as entered. Test IDs, names and notes are kept.
+    """
+    latest = latest_runs(conn)
+    with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.DictReader(f)
+        fieldnames = reader.fieldnames
+        rows = list(reader)
+
+    seen_classes = set()
+    for row in rows:
+        run = latest.get(row['Test Class'])
+        if run is None or row['Test Class'] in seen_classes:
+            continue
+        seen_classes.add(row['Test Class'])
+        row['Status'] = 'Complete'
+        row['Pass/Fail'] = 'PASS' if run['passed'] else 'FAIL'
+        row['Errors'] = (run['uvm_errors'] or 0) + (run['uvm_fatals'] or 0) + (run['sim_errors'] or 0)
+        row['Date Executed'] = run['run_date'][:10]
+        row['Packets'] = _fmt(run['packets_in'])
+        row['Matched'] = _fmt(run['matched'])
+        row['Mismatched'] = _fmt(run['mismatched'])
+
+    # Keep the file's layout: LF line endings and an always-quoted Notes column
+    with open(csv_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, lineterminator='')
+        writer.writerow(fieldnames)
+        f.write('\n')
+        for row in rows:
+            writer.writerow([row[name] for name in fieldnames[:-1]])
+            notes = row[fieldnames[-1]] or ''
+            f.write(',"' + notes.replace('"', '""') + '"\n')
+    return len(seen_classes)
+
+
+# "505 = 485 + 20" (Accounting row of an analysis CSV: input = output + dropped)
+RE_ACCOUNTING = re.compile(r'^\d+ = \d+ \+ \d+$')
+# "WARNING BREAKDOWN (1 total)" section header
+RE_WARNING_HEADER = re.compile(r'^(WARNING BREAKDOWN) \(\d+ total\)$')
+
+
+def _quotes(note, number):
+    """True if a note states the number (as a whole number, not part of 1.1 or 0x20)."""
+    return re.search(rf'(?<![\w.]){re.escape(str(number))}(?![\w.])', note) is not None
+
+
+def export_analysis(conn, csv_path, test):
+    """Refresh the measured values of a <Test>_analysis.csv in place.
+
+    Rows are matched on (Category, Metric). A rewritten row whose value
+    changes gets a regenerated note where one is known; otherwise its note
+    is kept unless it quotes the old value. Rows the run cannot recompute
+    are left as they are, but a note quoting a packet count that changed
+    is blanked. Message IDs the run did not report become N/A; report IDs
+    not yet listed are appended to the message ID breakdown.
+    """
+    run = latest_runs(conn).get(test)
+    if run is None:
+        return False
+    id_counts = {}
+    for r in conn.execute('SELECT report_id, SUM(count) AS n FROM report_ids WHERE run_id = ? '
+                          'GROUP BY report_id', (run['id'],)):
+        id_counts[r['report_id']] = r['n']
+
+    packets_in, packets_out, matched = run['packets_in'], run['packets_out'], run['matched']
+    dropped, mismatched = run['dropped'], run['mismatched']
+    unmatched = packets_in - packets_out if packets_in is not None and packets_out is not None else None
+    values = {
+        ('Simulator', 'Seed'): run['seed'],
+        ('Timing', 'Wall Clock Elapsed'): f"{run['sim_time']:.0f} seconds" if run['sim_time'] else None,
+        ('Timing', 'Simulation Time'): f"{run['sim_time_ns']:.0f} ns" if run['sim_time_ns'] else None,
+        ('Result', 'Test Name'): run['test'],
+        ('Result', 'Overall Status'): 'PASS' if run['passed'] else 'FAIL',
+        ('Result', 'QuestaSim Exit Errors'): run['sim_errors'],
+        ('UVM Messages', 'UVM_INFO'): run['uvm_infos'],
+        ('UVM Messages', 'UVM_WARNING'): run['uvm_warnings'],
+        ('UVM Messages', 'UVM_ERROR'): run['uvm_errors'],
+        ('UVM Messages', 'UVM_FATAL'): run['uvm_fatals'],
+        ('Packets', 'Total Driven (Accepted)'): packets_in,
+        ('Packets', 'Total Output (Matched)'): matched,
+        ('Packets', 'Intentionally Dropped'): dropped,
+        ('Packets', 'Monitor Unmatched'): unmatched,
+        ('Packets', 'Mismatched'): mismatched,
+        ('Packet Callback', 'Total Packets Tracked'): packets_in,
+        ('Scoreboard', 'Total Input Tracked'): packets_in,
+        ('Scoreboard', 'Total Output Matched'): matched,
+        ('Scoreboard', 'Total Dropped'): dropped,
+        ('Scoreboard', 'Mismatched Packets'): mismatched,
+        ('Warning Total', ''): run['uvm_warnings'],
+    }
+
+    def count_note(n, what, none):
+        return none if not n else f"{n} {what}"
+
+    errors, fatals = run['uvm_errors'] or 0, run['uvm_fatals'] or 0
+    notes = {
+        ('Timing', 'Simulation Time'): f"~{run['sim_time_ns'] / 1000:.1f} us total" if run['sim_time_ns'] else '',
+        ('Result', 'Overall Status'): f"{errors} UVM_ERROR / {fatals} UVM_FATAL"
+                                      + ("" if run['passed'] or errors or fatals else f" (status {run['status']})"),
+        ('Result', 'QuestaSim Exit Errors'): count_note(run['sim_errors'], "simulator error(s)", "Clean simulation"),
+        ('UVM Messages', 'UVM_WARNING'): count_note(run['uvm_warnings'], "warning(s)", "No warnings"),
+        ('Warning Total', ''): count_note(run['uvm_warnings'], "warning(s)", "No warnings"),
+        ('UVM Messages', 'UVM_ERROR'): count_note(errors, "verification error(s)", "No verification errors"),
+        ('UVM Messages', 'UVM_FATAL'): count_note(fatals, "fatal error(s)", "No fatal errors"),
+        ('Packets', 'Monitor Unmatched'): (f"{unmatched} dropped packets = expected" if unmatched == dropped
+                                           else f"{unmatched} unmatched, {dropped} dropped"),
+        ('Packets', 'Mismatched'): count_note(mismatched, "mismatched packet(s)", "No data corruption detected"),
+        ('Scoreboard', 'Mismatched Packets'): count_note(mismatched, "mismatched packet(s)", "Zero data corruption"),
+    }
+    counts = (packets_in, matched, dropped)
+
+    with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+        rows = list(csv.reader(f))
+
+    # Packet counts this export replaces; other rows' notes quoting them are stale
+    replaced = set()
+    listed_ids = set()
+    last_id_row = None
+    for i, row in enumerate(rows):
+        if len(row) < 5:
+            continue
+        header = RE_WARNING_HEADER.match(row[0])
+        if header and run['uvm_warnings'] is not None:
+            row[0] = f"{header.group(1)} ({run['uvm_warnings']} total)"
+            continue
+        key = (row[1], row[2])
+        if key in values and values[key] is not None:
+            old, new = row[3], str(values[key])
+            if old == new:
+                continue
+            row[3] = new
+            if key in notes:
+                row[4] = notes[key]
+            elif _quotes(row[4], old):
+                row[4] = ''
+            if row[1] in ('Packets', 'Packet Callback', 'Scoreboard') and old.isdigit() and int(old) > 0:
+                replaced.add(old)
+        elif row[1] == 'Accounting' and RE_ACCOUNTING.match(row[2]) and None not in counts:
+            replaced.update(n for n in row[2].replace('=', ' ').replace('+', ' ').split() if int(n) > 0)
+            row[2] = f"{packets_in} = {matched} + {dropped}"
+            row[3] = 'VERIFIED' if packets_in == matched + dropped else 'MISMATCH'
+        elif row[1] == 'Message IDs':
+            listed_ids.add(row[2])
+            last_id_row = i
+            row[3] = id_counts.get(row[2], 'N/A')
+
+    replaced -= {str(n) for n in counts + (unmatched, mismatched)}
+    for row in rows:
+        if len(row) >= 5 and (row[1], row[2]) not in values and row[1] != 'Accounting':
+            if any(_quotes(row[4], n) for n in replaced):
+                row[4] = ''
+
+    if last_id_row is not None:
+        new_rows = [['', 'Message IDs', rid, n, ''] for rid, n in sorted(id_counts.items())
+                    if rid not in listed_ids]
+        rows[last_id_row + 1:last_id_row + 1] = new_rows
+
+    with open(csv_path, 'w', encoding='utf-8', newline='') as f:
+        csv.writer(f, lineterminator='\n').writerows(rows)
+    return True
+
+
+def run_resources(conn, run_id):
+    """Resource time series of one run, oldest sample first."""
+    return conn.execute('SELECT * FROM resource_samples WHERE run_id = ? ORDER BY t', (run_id,)).fetchall()
+
+
+def print_runs(rows):
+    print(f"{'Id':>6}  {'Date':<20}{'Test':<20}{'Seed':>8}  {'Status':<10}{'Sim (s)':>9}"
+          f"{'In':>7}{'Out':>7}{'Drop':>6}{'Err':>5}{'RSS MB':>8}  Hash")
+    for r in rows:
+        errors = (r['uvm_errors'] or 0) + (r['uvm_fatals'] or 0) + (r['sim_errors'] or 0)
+        sim_time = f"{r['sim_time']:.1f}" if r['sim_time'] is not None else '-'
+        rss = f"{r['peak_rss_mb']:.0f}" if r['peak_rss_mb'] is not None else '-'
+        print(f"{r['id']:>6}  {r['run_date']:<20}{r['test']:<20}{r['seed']:>8}  {r['status']:<10}{sim_time:>9}"
+              f"{_fmt(r['packets_in']):>7}{_fmt(r['packets_out']):>7}{_fmt(r['dropped']):>6}{errors:>5}{rss:>8}"
+              f"  {(r['source_hash'] or '-')[:10]}")
+        if not r['passed'] and r['first_error']:
+            print(f"{'':<28}{r['first_error']}")
+
+
+def print_stats(rows):
+    print(f"{'Test':<20}{'Day':<12}{'Runs':>6}{'Pass':>6}{'Rate':>8}{'Avg (s)':>10}{'Max (s)':>10}")
+    for r in rows:
+        rate = 100.0 * r['passed'] / r['runs'] if r['runs'] else 0
+        print(f"{r['test']:<20}{r['day']:<12}{r['runs']:>6}{r['passed']:>6}{rate:>7.1f}%"
+              f"{r['avg_time'] or 0:>10.1f}{r['max_time'] or 0:>10.1f}")
+
+
+def print_resources(run, samples):
+    print(f"Run {run['id']}: {run['test']} seed={run['seed']} ({run['status']})")
+    if not samples:
+        print("[*] No resource samples recorded for this run")
+        return
+    print(f"Peak RSS {run['peak_rss_mb'] or 0:.0f} MB, CPU {run['cpu_time'] or 0:.1f}s, "
+          f"read {run['read_mb'] or 0:.1f} MB, written {run['write_mb'] or 0:.1f} MB")
+    print(f"{'Time (s)':>10}{'RSS MB':>10}{'CPU (s)':>10}{'Read MB':>10}{'Write MB':>10}")
+    for r in samples:
+        print(f"{r['t']:>10.1f}{r['rss_mb']:>10.1f}{r['cpu_time']:>10.1f}{r['read_mb']:>10.1f}{r['write_mb']:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the CPM regression results database")
+    parser.add_argument('--db', type=Path, default=DEFAULT_DB, help="Results database path.")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    q = sub.add_parser('query', help="List runs, newest first.")
+    q.add_argument('--test', help="Only this UVM test.")
+    q.add_argument('--seed', type=int, help="Only this seed.")
+    q.add_argument('--failed', action='store_true', help="Only failing runs.")
+    q.add_argument('--since', help="Only runs on/after this date (YYYY-MM-DD).")
+    q.add_argument('--limit', type=int, default=50, help="Maximum number of rows.")
+
+    s = sub.add_parser('stats', help="Pass rate and sim time per test and day.")
+    s.add_argument('--test', help="Only this UVM test.")
+    s.add_argument('--since', help="Only runs on/after this date (YYYY-MM-DD).")
+
+    e = sub.add_parser('export-csv', help="Regenerate the tracking CSVs from the latest runs.")
+    e.add_argument('--tracking-dir', type=Path, default=PROJECT_ROOT / "tracking")
+
+    r = sub.add_parser('resources', help="RSS/CPU/I/O time series of one run (ids from 'query').")
+    r.add_argument('run_id', type=int, help="Run id.")
+    r.add_argument('--csv', type=Path, help="Write the samples to this CSV instead of printing them.")
+
+    args = parser.parse_args()
+    if not args.db.exists():
+        print(f"[!] No results database found: {args.db}")
+        return 1
+    conn = connect(args.db)
+
+    if args.command == 'query':
+        print_runs(query_runs(conn, args.test, args.seed, args.failed, args.since, args.limit))
+    elif args.command == 'stats':
+        print_stats(test_stats(conn, args.test, args.since))
+    elif args.command == 'resources':
+        run = conn.execute('SELECT * FROM runs WHERE id = ?', (args.run_id,)).fetchone()
+        if run is None:
+            print(f"[!] No run with id {args.run_id}")
+            return 1
+        samples = run_resources(conn, args.run_id)
+        if args.csv:
+            with open(args.csv, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(['t', 'rss_mb', 'cpu_time', 'read_mb', 'write_mb'])
+                writer.writerows([tuple(r)[1:] for r in samples])
+            print(f"[+] Wrote {len(samples)} samples to {args.csv}")
+        else:
+            print_resources(run, samples)
+    elif args.command == 'export-csv':
+        test_plan = args.tracking_dir / "test_plan.csv"
+        if test_plan.exists():
+            count = export_test_plan(conn, test_plan)
+            print(f"[+] Updated {test_plan} ({count} test classes)")
+        for analysis in sorted(args.tracking_dir.glob("*_analysis.csv")):
+            test = analysis.stem[:-len('_analysis')]
+            if export_analysis(conn, analysis, test):
+                print(f"[+] Updated {analysis}")
+            else:
+                print(f"[*] No runs of {test} recorded, {analysis} left unchanged")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
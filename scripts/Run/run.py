@@ -1,3 +1,4 @@
+import atexit
 import os
 import sys
 import argparse
@@ -5,10 +6,31 @@ import signal
 import time
 from pathlib import Path
 
+import checkpoint
+import compile_cache
+from log_analyzer import UvmLogAnalyzer, combine
+import proc_sampler
+import planner
+import profiler
+import regression
+import result_cache
+import results_db
+import saturation
+import scheduler
+import sim_pool
+import sim_process
+import ucdb_merge
+import wave_window
+
 # --- Constants for Compilation/Elaboration ---
 CMD_COMPILE = "vsim -c -do compile.do"
 CMD_ELABORATE = "vsim -c -do elaborate.do"
 
+# --- Optimized snapshots built by elaborate.do ---
+# Regressions run the fast one; single runs, GUI and failure reruns the debug one
+SNAPSHOT_FAST = "tb_top_fast"
+SNAPSHOT_DEBUG = "tb_top_debug"
+
 def run_command(command, step_name, cwd=None):
     """Runs a shell command and exits if it fails."""
     print(f"\n--- INFO: Starting Step: {step_name} ---")
@@ -17,25 +39,500 @@ def run_command(command, step_name, cwd=None):
     if cwd:
         print(f"Working directory: {cwd}")
     
-    return_code = os.system(command) 
+    with profiler.span(step_name, step_name.lower(), cmd=command) as meta:
+        return_code = os.system(command)
+        meta['returncode'] = return_code
     
     if return_code != 0:
         print(f"\n--- ERROR: Step '{step_name}' failed! ---")
         sys.exit(1)
 
-# --- Main Script Execution Block ---
-try:
+def build_sim_args(test, seed, verbosity='UVM_MEDIUM', plusargs=(), snapshot=SNAPSHOT_DEBUG, coverage=True):
+    """Builds the vsim design/test arguments for one test/seed (no output files)."""
+    # -coverage enables code coverage collection
+    args = f"{snapshot} +UVM_TESTNAME={test} +UVM_VERBOSITY={verbosity}"
+    if coverage:
+        args = "-coverage " + args
+    if snapshot == SNAPSHOT_DEBUG:
+        args += " -voptargs=+acc"
+    args += f" -sv_seed {seed}"
+    for plusarg in plusargs:
+        args += f' +{plusarg}'
+    return args
+
+def build_sim_command(test, seed, log_file, wlf_file, ucdb_file, project_root, gui=False,
+                      verbosity='UVM_MEDIUM', plusargs=(), snapshot=SNAPSHOT_DEBUG, coverage=True,
+                      run_do="run -all"):
+    """Builds the vsim command line for one test/seed.
+
+    The fast snapshot writes no waveform file. run_do replaces the batch
+    'run -all' (e.g. wave_window.run_commands for a failure rerun).
+    """
+    # Note: vsim must be run from project root to find work library
+    cmd = f"vsim {build_sim_args(test, seed, verbosity, plusargs, snapshot, coverage)} "
+    
+    if gui:
+        cmd += ' -gui'
+        cmd += ' -do "add wave -r /*; run -all"' 
+    else: 
+        cmd += ' -c'
+        # Use relative paths from project_root for -do commands (avoids Windows path escaping issues)
+        rel_log = Path(log_file).relative_to(project_root).as_posix()
+        rel_wlf = Path(wlf_file).relative_to(project_root).as_posix()
+        rel_ucdb = Path(ucdb_file).relative_to(project_root).as_posix()
+        cmd += f' -logfile {rel_log}'
+        do = ""
+        if snapshot == SNAPSHOT_DEBUG:
+            cmd += f' -wlf {rel_wlf}'
+        if coverage:
+            # Save coverage data to UCDB file after simulation
+            do += f"coverage save -onexit {rel_ucdb}; "
+        cmd += f' -do "{do}{run_do}; quit -f"' 
+    return cmd
+
+def write_trace(trace_file):
+    """Saves the profiler trace and prints the time spent per step category."""
+    profiler.save(trace_file)
+    print(f"\n--- INFO: Profile (wall time per step) ---")
+    for cat, (count, wall) in sorted(profiler.summary().items(), key=lambda item: -item[1][1]):
+        print(f"{cat:<14}{count:>6} span(s){wall:>10.2f}s")
+    print(f"Trace: {trace_file} (open in chrome://tracing or https://ui.perfetto.dev)")
+
+def open_results_db(args):
+    """Opens the results database unless recording is disabled."""
+    if args.no_db:
+        return None
+    return results_db.connect(args.results_db)
+
+def make_scheduler(args, build, tests):
+    """Job scheduler for a batch of tests, or None with --no-schedule.
+
+    Durations and peak memory come from the results database (read even
+    with --no-db, which only stops recording).
+    """
+    if args.no_schedule:
+        return None
+    history = {}
+    if Path(args.results_db).exists():
+        conn = results_db.connect(args.results_db)
+        history = scheduler.load_history(conn, tests, build.get('design_hash'))
+        conn.close()
+    mem_budget = args.mem_budget if args.mem_budget is not None else scheduler.default_mem_budget_mb()
+    return scheduler.JobScheduler(history, scheduler.parse_priorities(args.priority),
+                                  mem_budget or None, args.licenses)
+
+def cache_key(args, build, test, seed, snapshot, checkpoint_file=None, coverage=True):
+    """Result cache key for a run, or None when caching does not apply.
+
+    The snapshot key covers the design and its vopt options; the vsim
+    arguments (snapshot, coverage, -voptargs, plusargs) and, for a run
+    restored from a checkpoint, the checkpoint it starts from are folded
+    in. A tb_top_debug run records a waveform, a tb_top_fast run does not,
+    so one must not stand in for the other.
+    """
+    if args.no_result_cache or args.gui:
+        return None
+    options = [f"snapshot={snapshot}",
+               f"vsim={build_sim_args(test, seed, args.verbosity, args.plusarg, snapshot, coverage)}"]
+    if checkpoint_file is not None:
+        options.append(f"restore={Path(checkpoint_file).name}:{checkpoint.CHECKPOINT_SEED}")
+    if not coverage:
+        options.append('no-coverage')
+    return result_cache.make_key(build['snapshots'].get(snapshot), test, seed, args.verbosity, args.plusarg,
+                                 options)
+
+def prepare_checkpoints(args, build, project_root, tests, snapshot=SNAPSHOT_DEBUG, coverage=True):
+    """Finds or creates the post-configuration checkpoint of each test.
+
+    Returns {test: checkpoint file} for the tests that have one.
+    """
+    checkpoints = {}
+    if not args.checkpoint:
+        return checkpoints
+    for test in tests:
+        cpt_file = checkpoint.checkpoint_path(project_root, build['snapshots'].get(snapshot), test,
+                                              args.verbosity, args.plusarg, snapshot, coverage)
+        if cpt_file is None:
+            print(f"\n--- WARNING: Elaborated snapshot unknown (compile first), checkpoints disabled ---")
+            break
+        sim_args = build_sim_args(test, checkpoint.CHECKPOINT_SEED, args.verbosity, args.plusarg,
+                                  snapshot, coverage)
+        if checkpoint.ensure_checkpoint(cpt_file, sim_args, project_root, args.timeout):
+            checkpoints[test] = cpt_file
+    return checkpoints
+
+def rerun_failures(args, build, project_root, results):
+    """Reruns failing seeds on the debug snapshot with waves around the first error.
+
+    Only the --wave-scope hierarchy is logged, from --wave-before ns ahead
+    of the first error to --wave-after ns past it, where the rerun stops.
+    Timeouts are not rerun (they would only hang again). Each rerun is
+    attached to its original job as job['debug'].
+    """
+    failed = [j for j in results if not j['passed'] and j['status'] not in ('timeout', 'idle', 'budget')]
+    if not failed:
+        return
+    if args.deadline is not None and time.time() >= args.deadline:
+        print(f"\n--- WARNING: Time budget used up, {len(failed)} failing seed(s) not rerun with waveforms ---")
+        return
+    scopes = args.wave_scope or wave_window.DEFAULT_SCOPES
+    print(f"\n--- INFO: Rerunning {len(failed)} failing seed(s) on {SNAPSHOT_DEBUG} with waveforms ---")
+    checkpoints = prepare_checkpoints(args, build, project_root, list(dict.fromkeys(j['test'] for j in failed)))
+    reruns = []
+    for job in failed:
+        seed = job['seed'] if args.regress else None
+        suffix = f"_shard{job['shard']}_debug" if 'shard' in job else '_debug'
+        log_file, wlf_file, ucdb_file = regression.get_job_paths(project_root, job['test'], seed, suffix)
+        window = wave_window.error_window(job['analyzer'].first_error, args.wave_before, args.wave_after)
+        start_time = 0.0
+        if job['test'] in checkpoints:
+            # The restored run starts at the checkpoint, not at 0
+            start_time = checkpoint.stop_time(checkpoints[job['test']])
+            if start_time is None:
+                window, start_time = None, 0.0
+        reruns.append({'test': job['test'], 'seed': job['seed'], 'log': log_file, 'wlf': wlf_file,
+                       'ucdb': ucdb_file, 'window': wave_window.describe(window, scopes),
+                       'run_do': wave_window.run_commands(window, scopes, start_time),
+                       'plusargs': job.get('plusargs', []), 'original': job})
+    
+    def build_debug_cmd(job):
+        if job['test'] in checkpoints:
+            return checkpoint.restore_command(checkpoints[job['test']], job['seed'], job['log'], job['wlf'],
+                                              job['ucdb'], project_root, job['run_do'])
+        return build_sim_command(job['test'], job['seed'], job['log'], job['wlf'], job['ucdb'], project_root,
+                                 verbosity=args.verbosity, plusargs=args.plusarg + job['plusargs'],
+                                 run_do=job['run_do'])
+    
+    # No fail-fast: the rerun must reach the end of the window
+    for rerun in regression.run_regression(reruns, build_debug_cmd, project_root, args.jobs,
+                                           timeout=args.timeout, idle_timeout=args.idle_timeout,
+                                           category='debug_rerun',
+                                           scheduler=make_scheduler(args, build, [j['test'] for j in failed]),
+                                           deadline=args.deadline):
+        rerun['original']['debug'] = rerun
+
+def plan_tests(args, build, tests):
+    """Replaces the seed counts of a test list with a plan for the time left in --budget.
+
+    The planned seeds are ones not yet run (planner.fresh_seeds), from --seed up.
+    """
+    budget = max(0.0, args.deadline - time.time())
+    cores = scheduler.JobScheduler(licenses=args.licenses).workers(args.jobs)
+    tests = list(dict.fromkeys(t for t, _, _ in tests))
+    print(f"\n--- INFO: Planning {budget / 60:.1f} min of regression ---")
+    result = planner.make_plan(tests, budget, cores, args.results_db, source_hash=build.get('design_hash'),
+                               jobs=args.jobs, base_seed=args.seed)
+    planner.print_plan(result, budget, cores)
+    return [(test, len(seeds), seeds) for test, seeds in result['seeds'].items()]
+
+def run_regress(args, run_dir, project_root, build):
+    """Runs every test/seed in the regression list through a bounded job pool."""
+    list_path = Path(args.regress)
+    if not list_path.is_absolute():
+        list_path = run_dir / list_path
+    tests = regression.parse_test_list(list_path)
+    if args.plan:
+        tests = plan_tests(args, build, tests)
+    jobs = regression.expand_jobs(tests, args.seed, project_root)
+    
+    # Regressions run the fast snapshot: no +acc (but traffic_seed), no waveform file
+    coverage = not args.no_coverage
+    checkpoints = prepare_checkpoints(args, build, project_root, list(dict.fromkeys(t for t, _, _ in tests)),
+                                      SNAPSHOT_FAST, coverage)
+    
+    def build_cmd(job):
+        if job['test'] in checkpoints:
+            return checkpoint.restore_command(checkpoints[job['test']], job['seed'], job['log'], None,
+                                              job['ucdb'] if coverage else None, project_root)
+        return build_sim_command(job['test'], job['seed'], job['log'], job['wlf'], job['ucdb'], project_root,
+                                 verbosity=args.verbosity, plusargs=args.plusarg,
+                                 snapshot=SNAPSHOT_FAST, coverage=coverage)
+    
+    print(f"Test list: {list_path}")
+    for test, count, seeds in tests:
+        print(f"  {test}: {count} seed(s)" + (f" {seeds}" if seeds else ""))
+    
+    conn = open_results_db(args)
+    
+    # Passing UCDBs are folded into coverage/merged.ucdb while sims still run
+    merger = None
+    if args.merge:
+        coverage_dir = project_root / "coverage"
+        merger = ucdb_merge.IncrementalMerger(coverage_dir / "merged.ucdb", coverage_dir / "merge_tmp",
+                                              args.merge_fan_in, args.merge_jobs)
+    
+    # Seeds of a test stop being started once its coverage stops growing
+    detector = None
+    if args.saturation is not None:
+        detector = saturation.SaturationDetector(args.saturation, args.saturation_min_seeds, args.merge_jobs)
+    
+    def collect(job):
+        if merger is not None and job['passed'] and Path(job['ucdb']).is_file():
+            merger.add(job['ucdb'])
+        if detector is not None:
+            detector.add(job)
+    
+    def saturated(job):
+        if detector is not None and detector.saturated(job['test']):
+            return f"{job['test']} coverage saturated"
+        return None
+    
+    def record(job):
+        if conn is not None:
+            results_db.record_run(conn, job, job['analyzer'], build)
+        result_cache.store(args.result_cache, job['cache_key'], job, args.result_cache_size)
+        collect(job)
+    
+    start_time = time.time()
+    # Seeds that already passed on this snapshot are restored, not re-run
+    results = []
+    pending = []
+    for job in jobs:
+        job['cache_key'] = cache_key(args, build, job['test'], job['seed'], SNAPSHOT_FAST,
+                                     checkpoints.get(job['test']), coverage)
+        entry = result_cache.lookup(args.result_cache, job['cache_key'])
+        if entry is None:
+            pending.append(job)
+            continue
+        with profiler.span(f"{job['test']} seed={job['seed']}", 'cached', test=job['test'], seed=job['seed']):
+            result_cache.restore(entry, job)
+        results.append(job)
+        if conn is not None:
+            results_db.record_run(conn, job, job['analyzer'], build)
+        collect(job)
+    if results:
+        print(f"\n--- INFO: Result cache: {len(results)}/{len(jobs)} jobs already passed on this build ---")
+    if pending:
+        # Warm sessions load the design in long-lived vsim shells instead of
+        # starting a new vsim per job
+        job_scheduler = make_scheduler(args, build, list(dict.fromkeys(t for t, _, _ in tests)))
+        session_pool = None
+        if args.warm_sessions:
+            workers = job_scheduler.workers(args.jobs) if job_scheduler else args.jobs
+            session_pool = sim_pool.SessionPool(
+                min(workers, len(pending)), project_root,
+                lambda job: build_sim_args(job['test'], job['seed'], args.verbosity, args.plusarg,
+                                           SNAPSHOT_FAST, coverage),
+                project_root / "sim" / "sessions", args.session_jobs)
+        try:
+            results += regression.run_regression(pending, build_cmd, project_root, args.jobs,
+                                                 timeout=args.timeout, idle_timeout=args.idle_timeout,
+                                                 fail_fast=args.fail_fast, on_done=record,
+                                                 session_pool=session_pool, scheduler=job_scheduler,
+                                                 deadline=args.deadline, skip=saturated)
+        finally:
+            if session_pool is not None:
+                session_pool.close()
+    elapsed_time = time.time() - start_time
+    
+    if not args.no_debug_rerun:
+        rerun_failures(args, build, project_root, results)
+    
+    all_passed = regression.print_summary(results)
+    print(f"Elapsed time: {elapsed_time:.2f}s")
+    
+    # A restore that did not take the new traffic_seed replays one stream for every seed
+    for test, seed, other in checkpoint.repeated_traffic([j for j in results if j['test'] in checkpoints]):
+        print(f"\n--- ERROR: {test} seeds {seed} and {other} restored from "
+              f"{Path(checkpoints[test]).name} drove identical traffic ---")
+        all_passed = False
+    
+    if detector is not None:
+        detector.finish()
+        detector.report()
+    
+    if merger is not None:
+        print(f"\n--- INFO: Finishing Coverage Merge ---")
+        start_time = time.time()
+        if merger.finish():
+            print(f"Merged coverage: {merger.output} ({len(merger.inputs)} UCDBs, "
+                  f"{time.time() - start_time:.2f}s after the last sim)")
+        else:
+            print(f"\n--- ERROR: Coverage merge failed! ---")
+            all_passed = False
+    return all_passed
+
+def run_sharded(args, project_root, build):
+    """Runs one test as --shards parallel sims that split its --stress-packets.
+
+    Only regression.SHARDABLE_TESTS (reset, configure and stress) are split.
+    The shards run on the fast snapshot with derived seeds; their UCDBs are
+    merged into coverage/<test>.ucdb and their results combined into one
+    run, which is what the results database records.
+    """
+    jobs = regression.shard_jobs(args.test, args.seed, args.shards, args.stress_packets, project_root)
+    print(f"\n--- INFO: Sharding {args.test} seed={args.seed}: {args.stress_packets} stress packets "
+          f"over {args.shards} simulations ---")
+    
+    def build_cmd(job):
+        return build_sim_command(job['test'], job['seed'], job['log'], job['wlf'], job['ucdb'], project_root,
+                                 verbosity=args.verbosity, plusargs=args.plusarg + job['plusargs'],
+                                 snapshot=SNAPSHOT_FAST)
+    
+    start_time = time.time()
+    results = regression.run_regression(jobs, build_cmd, project_root, args.jobs, timeout=args.timeout,
+                                        idle_timeout=args.idle_timeout, fail_fast=args.fail_fast,
+                                        deadline=args.deadline)
+    results.sort(key=lambda j: j['shard'])
+    elapsed_time = time.time() - start_time
+    
+    print(f"\n--- INFO: Shards ---")
+    print(f"{'Shard':>5}{'Seed':>12}{'Packets':>9}  {'Status':<10}{'Sim (s)':>9}  Log")
+    for job in results:
+        print(f"{job['shard']:>5}{job['seed']:>12}{job['packets']:>9}  {job['status']:<10}{job['elapsed']:>9.1f}"
+              f"  {job['log']}")
+    
+    analyzer = combine([job['analyzer'] for job in results])
+    print(f"\n--- INFO: Log Analysis ({len(results)} shards combined) ---")
+    print(analyzer.report())
+    
+    # The shards' coverage becomes the run's coverage
+    ucdb_file = project_root / "coverage" / f"{args.test}.ucdb"
+    ucdbs = [job['ucdb'] for job in results if Path(job['ucdb']).is_file()]
+    merged = bool(ucdbs) and ucdb_merge.merge_ucdbs(ucdb_file, ucdbs)
+    
+    passed = len(results) == len(jobs) and all(job['passed'] for job in results)
+    failed = next((job for job in results if not job['passed']), None)
+    job = {'test': args.test, 'seed': args.seed, 'elapsed': elapsed_time, 'passed': passed,
+           'status': 'ok' if passed else (failed['status'] if failed else 'budget'),
+           'returncode': 0 if passed else (failed['returncode'] if failed else None),
+           'log': results[0]['log'] if results else None, 'ucdb': ucdb_file if merged else None}
+    conn = open_results_db(args)
+    if conn is not None:
+        results_db.record_run(conn, job, analyzer, build)
+    
+    if not args.no_debug_rerun:
+        rerun_failures(args, build, project_root, results)
+        for shard in results:
+            if shard.get('debug'):
+                print(f"Debug rerun of shard {shard['shard']} ({shard['debug']['status']}): "
+                      f"{shard['debug']['log']}  waves: {shard['debug']['wlf']} ({shard['debug']['window']})")
+    
+    if ucdbs and not merged:
+        print(f"\n--- ERROR: Merging the shard UCDBs failed! ---")
+        return False
+    if not passed:
+        print(f"\n--- ERROR: {sum(1 for j in results if not j['passed'])} of {len(jobs)} shard(s) failed! ---")
+        return False
+    
+    print(f"\n--- INFO: Simulation completed ---")
+    print(f"Coverage: {ucdb_file} (merged from {len(ucdbs)} shards)")
+    print(f"Elapsed time: {elapsed_time:.2f}s")
+    return True
+
+def main():
     parser = argparse.ArgumentParser(description="Run QuestaSim simulation for CPM Verification")
     parser.add_argument('--gui', action='store_true', help="Run simulation in GUI mode.")
-    parser.add_argument('--seed', type=int, default=1, help="Set the random number seed.")
+    parser.add_argument('--seed', type=int, default=1, help="Set the random number seed (first seed in --regress mode).")
     parser.add_argument('--test', type=str, default='CpmSmokeTest', help="UVM Test name.")
+    parser.add_argument('--verbosity', type=str, default='UVM_MEDIUM', help="UVM verbosity (+UVM_VERBOSITY).")
+    parser.add_argument('--plusarg', action='append', default=[], metavar='NAME[=VALUE]',
+                        help="Extra plusarg passed to vsim as +NAME[=VALUE] (repeatable).")
     parser.add_argument('--timeout', type=int, default=300, help="Simulation timeout in seconds.")
+    parser.add_argument('--idle-timeout', type=int, default=0,
+                        help="Abort a simulation whose log has not grown for this many seconds (0 = off).")
+    parser.add_argument('--fail-fast', action='store_true',
+                        help="Kill the simulation at the first UVM_ERROR/UVM_FATAL or scoreboard mismatch.")
     parser.add_argument('--no-compile', action='store_true', help="Skip compilation and elaboration.")
     parser.add_argument('--clean', action='store_true', help="Clean work directory before compilation.")
+    parser.add_argument('--full-compile', action='store_true',
+                        help="Ignore the compile cache and run compile.do and elaborate.do in full.")
+    parser.add_argument('--compile-jobs', type=int, default=os.cpu_count(),
+                        help="Maximum number of parallel vlog processes per dependency level.")
     parser.add_argument('--coverage-report', action='store_true', help="Generate code coverage report after simulation.")
     parser.add_argument('--modern-report', action='store_true', help="Generate modern HTML coverage report.")
+    parser.add_argument('--regress', nargs='?', const='regress.list', metavar='LIST',
+                        help="Run a regression from a test list file (default: regress.list).")
+    parser.add_argument('--results-db', type=Path, default=results_db.DEFAULT_DB,
+                        help="SQLite database every run is recorded in.")
+    parser.add_argument('--no-db', action='store_true', help="Do not record results in the database.")
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count(),
+                        help="Maximum number of parallel simulations in --regress mode.")
+    parser.add_argument('--licenses', type=int, default=None,
+                        help="Maximum number of simultaneous simulators (vsim licenses) in --regress mode.")
+    parser.add_argument('--mem-budget', type=float, default=None, metavar='MB',
+                        help="Start jobs only while their historical peak RSS fits this many MB "
+                             "(default: 90%% of physical memory, 0 = off).")
+    parser.add_argument('--priority', action='append', default=[], metavar='TEST=CLASS',
+                        help="Priority class of a test: smoke, normal or low (repeatable; "
+                             "tests named *Smoke* default to smoke).")
+    parser.add_argument('--no-schedule', action='store_true',
+                        help="Start regression jobs in list order, without history, memory or license limits.")
+    parser.add_argument('--budget', type=float, default=None, metavar='MINUTES',
+                        help="Wall-clock budget of the whole run: no job starts that would not finish in it, "
+                             "and sims still running at the end are stopped.")
+    parser.add_argument('--plan', action='store_true',
+                        help="With --regress and --budget: pick the tests and seed counts with the most "
+                             "expected coverage in the budget (see planner.py).")
+    parser.add_argument('--saturation', nargs='?', type=float, const=saturation.DEFAULT_THRESHOLD,
+                        metavar='BINS',
+                        help="Stop starting seeds of a test once one more seed is expected to add fewer than "
+                             f"BINS new functional bins (default {saturation.DEFAULT_THRESHOLD}).")
+    parser.add_argument('--saturation-min-seeds', type=int, default=saturation.DEFAULT_MIN_SEEDS,
+                        help="Seeds of a test that always run before it can be called saturated.")
+    parser.add_argument('--stress-packets', type=int, default=None, metavar='N',
+                        help="Stress step size of the test's virtual sequence (+CPM_STRESS_PACKETS).")
+    parser.add_argument('--shards', type=int, default=1,
+                        help="Split one run's --stress-packets over this many parallel sims with derived "
+                             "seeds, then merge their coverage and scoreboard results (stress-only tests: "
+                             f"{', '.join(regression.SHARDABLE_TESTS)}).")
+    parser.add_argument('--no-coverage', action='store_true',
+                        help="Do not collect code coverage in --regress mode (no UCDBs).")
+    parser.add_argument('--no-debug-rerun', action='store_true',
+                        help="Do not rerun failing seeds on the debug snapshot with waveforms.")
+    parser.add_argument('--wave-before', type=float, default=wave_window.DEFAULT_BEFORE,
+                        help="Failure rerun: start logging waves this many ns before the first error.")
+    parser.add_argument('--wave-after', type=float, default=wave_window.DEFAULT_AFTER,
+                        help="Failure rerun: stop this many ns after the first error.")
+    parser.add_argument('--wave-scope', action='append', metavar='PATH',
+                        help="Failure rerun: hierarchy to log (repeatable, default: /tb_top/stream_if and /tb_top/reg_if).")
+    parser.add_argument('--warm-sessions', action='store_true',
+                        help="Run regression jobs in a pool of long-lived vsim -c sessions.")
+    parser.add_argument('--session-jobs', type=int, default=sim_pool.DEFAULT_RECYCLE,
+                        help="Recycle a warm vsim session after this many jobs.")
+    parser.add_argument('--checkpoint', action='store_true',
+                        help="Run seeds from a post-configuration checkpoint saved once per build and test.")
+    parser.add_argument('--merge', action='store_true',
+                        help="Merge passing regression UCDBs into coverage/merged.ucdb as they finish.")
+    parser.add_argument('--merge-jobs', type=int, default=2,
+                        help="Maximum number of parallel vcover merges during a regression.")
+    parser.add_argument('--merge-fan-in', type=int, default=ucdb_merge.DEFAULT_FAN_IN,
+                        help="UCDBs combined per vcover merge.")
+    parser.add_argument('--result-cache', type=Path, default=result_cache.DEFAULT_DIR,
+                        help="Directory passing results are memoized in.")
+    parser.add_argument('--result-cache-size', type=int, default=result_cache.DEFAULT_MAX_MB,
+                        help="Result cache size cap in MB (least recently used entries are evicted).")
+    parser.add_argument('--no-result-cache', action='store_true',
+                        help="Always simulate; do not read or write the result cache.")
+    parser.add_argument('--sample-interval', type=float, default=sim_process.SAMPLE_INTERVAL, metavar='SECONDS',
+                        help="Sample simulator RSS, CPU and I/O from /proc this often (0 = off).")
+    parser.add_argument('--trace', nargs='?', type=Path, const=Path('logs/trace.json'), metavar='FILE',
+                        help="Write a Chrome trace of every step (default: logs/trace.json, relative to the project root).")
     
     args = parser.parse_args()
+    if args.checkpoint and args.warm_sessions:
+        parser.error("--checkpoint cannot be combined with --warm-sessions")
+    try:
+        scheduler.parse_priorities(args.priority)
+    except ValueError as e:
+        parser.error(f"--priority: {e}")
+    if args.saturation is not None and args.no_coverage:
+        parser.error("--saturation needs coverage (remove --no-coverage)")
+    if args.plan and not (args.regress and args.budget):
+        parser.error("--plan needs --regress and --budget")
+    if args.shards > 1:
+        if not args.stress_packets:
+            parser.error("--shards needs --stress-packets (the total to split)")
+        if args.regress or args.gui or args.checkpoint:
+            parser.error("--shards cannot be combined with --regress, --gui or --checkpoint")
+        if args.test not in regression.SHARDABLE_TESTS:
+            parser.error(f"--shards only splits stress-only tests ({', '.join(regression.SHARDABLE_TESTS)}); "
+                         f"{args.test} would repeat its other steps in every shard")
+    elif args.stress_packets:
+        args.plusarg.append(f"CPM_STRESS_PACKETS={args.stress_packets}")
+    sim_process.SAMPLE_INTERVAL = max(0.0, args.sample_interval)
+    # The budget covers the whole run, compile included
+    args.deadline = time.time() + 60 * args.budget if args.budget else None
 
     # Get the Run directory (where this script is located)
     run_dir = Path(__file__).parent.resolve()
@@ -44,6 +541,12 @@ try:
     # Change to Run directory
     os.chdir(run_dir)
     
+    # Per-step spans for chrome://tracing / ui.perfetto.dev, written on any exit
+    if args.trace:
+        trace_file = args.trace if args.trace.is_absolute() else project_root / args.trace
+        profiler.enable()
+        atexit.register(write_trace, trace_file)
+    
     # --- 1. Clean up ---
     if args.clean:
         print("\n--- INFO: Cleaning up previous run files... ---")
@@ -51,15 +554,36 @@ try:
         sim_dir = project_root / "sim"
         if os.name == 'nt':
             os.system(f'del /f /q "{logs_clean}\\*.log" "{logs_clean}\\*.wlf" 2>nul')
-            os.system(f'rmdir /s /q "{sim_dir}\\work" "{sim_dir}\\tb_top_opt" 2>nul')
+            os.system(f'rmdir /s /q "{sim_dir}\\work" 2>nul')
         else:
             os.system(f'rm -rf "{logs_clean}"/*.log "{logs_clean}"/*.wlf')
-            os.system(f'rm -rf "{sim_dir}/work" "{sim_dir}/tb_top_opt"')
+            os.system(f'rm -rf "{sim_dir}/work"')
+        (sim_dir / "compile_cache.json").unlink(missing_ok=True)
     
     # --- 2. Run Compile and Elaborate ---
-    if not args.no_compile:
+    # Only units whose sources (or imported packages) changed are re-vlogged,
+    # independent units in parallel, and vopt is skipped when the design
+    # hash matches the last snapshot.
+    if args.full_compile:
+        (project_root / "sim" / "compile_cache.json").unlink(missing_ok=True)
+        build = {'design_hash': compile_cache.get_design_hash(run_dir, project_root)}
+        start_time = time.time()
         run_command(CMD_COMPILE, "Compile", cwd=str(run_dir))
+        build['compile_time'] = time.time() - start_time
+        start_time = time.time()
         run_command(CMD_ELABORATE, "Elaborate", cwd=str(run_dir))
+        build['elab_time'] = time.time() - start_time
+        build['snapshots'] = compile_cache.snapshot_hashes(
+            compile_cache.parse_elaborate_script(run_dir / "elaborate.do"), build['design_hash'])
+    elif not args.no_compile:
+        build = compile_cache.incremental_build(run_dir, project_root, args.compile_jobs)
+        if not build['ok']:
+            sys.exit(1)
+    else:
+        # Sources or elaborate.do may have changed since the last elaborate;
+        # only the keys of the snapshots actually on disk can key the caches.
+        build = {'design_hash': compile_cache.get_design_hash(run_dir, project_root),
+                 'snapshots': compile_cache.get_snapshot_hashes(run_dir, project_root)}
 
     # --- 3. Build the Simulate Command ---
     # Create logs and coverage folders if they don't exist
@@ -68,68 +592,132 @@ try:
     coverage_dir = project_root / "coverage"
     coverage_dir.mkdir(exist_ok=True)
     
-    log_file = logs_dir / f"{args.test}.log"
-    wlf_file = logs_dir / f"{args.test}.wlf"
-    ucdb_file = coverage_dir / f"{args.test}.ucdb"
+    # Handle interrupts - only the simulators started by this run are killed
+    def signal_handler(sig, frame):
+        print("\n--- INFO: Interrupt received, cleaning up... ---")
+        sim_process.kill_active()
+        sys.exit(0)
     
-    # Build simulation command with test name
-    # Note: vsim must be run from project root to find work library
-    # -coverage enables code coverage collection
-    cmd = ( f"vsim -coverage tb_top_opt +UVM_TESTNAME={args.test} +UVM_VERBOSITY=UVM_MEDIUM -voptargs=+acc -sv_seed {args.seed} ")
+    signal.signal(signal.SIGINT, signal_handler)
+    
+    # --- Regression mode: many tests x seeds through a job pool ---
+    if args.regress:
+        if not run_regress(args, run_dir, project_root, build):
+            sys.exit(1)
+        print(f"\n--- INFO: All steps completed ---")
+        return
+    
+    if args.shards > 1:
+        if not run_sharded(args, project_root, build):
+            sys.exit(1)
+        print(f"\n--- INFO: All steps completed ---")
+        return
     
+    log_file, wlf_file, ucdb_file = regression.get_job_paths(project_root, args.test)
+    
+    # Build simulation command with test name
     if args.gui:
         print("INFO: GUI mode detected. Opening GUI...")
-        cmd += ' -gui'
-        cmd += ' -do "add wave -r /*; run -all"' 
     else: 
         print("INFO: Batch mode detected. Running...")
-        cmd += ' -c'
-        # Use relative paths from project_root for -do commands (avoids Windows path escaping issues)
-        rel_log = log_file.relative_to(project_root).as_posix()
-        rel_wlf = wlf_file.relative_to(project_root).as_posix()
-        rel_ucdb = ucdb_file.relative_to(project_root).as_posix()
-        cmd += f' -logfile {rel_log} -wlf {rel_wlf}'
-        # Save coverage data to UCDB file after simulation
-        cmd += f' -do "coverage save -onexit {rel_ucdb}; run -all; quit -f"' 
+    cmd = build_sim_command(args.test, args.seed, log_file, wlf_file, ucdb_file, project_root, gui=args.gui,
+                            verbosity=args.verbosity, plusargs=args.plusarg)
+    checkpoints = {} if args.gui else prepare_checkpoints(args, build, project_root, [args.test])
+    if args.test in checkpoints:
+        cmd = checkpoint.restore_command(checkpoints[args.test], args.seed, log_file, wlf_file, ucdb_file,
+                                         project_root)
     
     # Run the final command from project root
     print(f"\n--- INFO: Starting Simulation ---")
     print(f"Test: {args.test}")
     print(f"Seed: {args.seed}")
-    print(f"Timeout: {args.timeout}s")
+    print(f"Timeout: {args.timeout}s" + (f", idle timeout: {args.idle_timeout}s" if args.idle_timeout else ""))
     print(f"Command: {cmd}")
     print(f"Working directory: {project_root}")
     
-    # Handle timeout and interrupts
-    def signal_handler(sig, frame):
-        print("\n--- INFO: Interrupt received, cleaning up... ---")
-        if os.name == 'nt':
-            os.system("taskkill /F /IM vsim.exe 2>nul")
-        else:
-            os.system("pkill -9 vsim")
-        sys.exit(0)
-    
-    signal.signal(signal.SIGINT, signal_handler)
-    
     # Change to project root before running vsim
     os.chdir(project_root)
     
-    start_time = time.time()
-    return_code = os.system(cmd)
-    elapsed_time = time.time() - start_time
+    # The simulator runs in its own process group; the watchdog kills that
+    # group (and nothing else) on timeout. GUI sessions are interactive, so
+    # no timeouts apply there.
+    # stdout is teed through the log analyzer for live UVM report counts.
+    # A run that already passed on this snapshot is restored from the
+    # result cache instead.
+    key = cache_key(args, build, args.test, args.seed, SNAPSHOT_DEBUG, checkpoints.get(args.test))
+    entry = result_cache.lookup(args.result_cache, key)
+    job = {'test': args.test, 'seed': args.seed, 'log': log_file, 'ucdb': ucdb_file}
+    if entry is not None:
+        print(f"\n--- INFO: Result cache hit (stored {entry['stored']}), skipping simulation ---")
+        with profiler.span(f"{args.test} seed={args.seed}", 'cached', test=args.test, seed=args.seed):
+            result = result_cache.restore(entry, job, wlf=wlf_file)
+        analyzer = job['analyzer']
+    else:
+        analyzer = UvmLogAnalyzer()
+        
+        def on_line(line):
+            return analyzer.feed(line) and args.fail_fast
+        
+        with profiler.span(f"{args.test} seed={args.seed}", 'simulate', test=args.test, seed=args.seed) as meta:
+            timeout = None if args.gui else args.timeout
+            if args.deadline is not None and not args.gui:
+                remaining = max(1, args.deadline - time.time())
+                timeout = min(timeout, remaining) if timeout else remaining
+            result = sim_process.run_sim(cmd, project_root,
+                                         timeout=timeout,
+                                         idle_timeout=None if args.gui else args.idle_timeout,
+                                         log_file=log_file, on_line=on_line)
+            job.update(result, analyzer=analyzer)
+            if job['status'] == 'ok' and not analyzer.passed():
+                job['status'] = 'uvm_error'
+            job['passed'] = job['status'] == 'ok'
+            meta.update(returncode=job['returncode'], status=job['status'], errors=analyzer.errors)
+    elapsed_time = result['elapsed']
+    
+    print(f"\n--- INFO: Log Analysis ---")
+    print(analyzer.report())
+    resources = proc_sampler.describe(job.get('resources'))
+    if resources:
+        print(f"Resources: {resources}")
+    
+    # Record the run (GUI sessions are interactive debug, not results)
+    conn = None if args.gui else open_results_db(args)
+    if conn is not None:
+        results_db.record_run(conn, job, analyzer, build)
+    if entry is None:
+        result_cache.store(args.result_cache, key, job, args.result_cache_size, wlf=wlf_file)
+    
+    # A failing seed is rerun with waves around its first error
+    if not args.gui and not args.no_debug_rerun:
+        rerun_failures(args, build, project_root, [job])
+        if job.get('debug'):
+            print(f"Debug rerun ({job['debug']['status']}): {job['debug']['log']}")
+            print(f"Debug waveform: {job['debug']['wlf']} ({job['debug']['window']})")
+    
+    if result['status'] == 'aborted':
+        print(f"\n--- ERROR: Fail-fast: simulation aborted at first error ---")
+        sys.exit(1)
     
-    if elapsed_time > args.timeout:
+    if result['status'] == 'timeout' and args.deadline is not None and time.time() >= args.deadline:
+        print(f"\n--- WARNING: Time budget ({args.budget:g} min) used up, simulation stopped ---")
+        sys.exit(1)
+    
+    if result['status'] == 'timeout':
         print(f"\n--- WARNING: Simulation exceeded timeout ({args.timeout}s) ---")
-        if os.name == 'nt':
-            os.system("taskkill /F /IM vsim.exe 2>nul")
-        else:
-            os.system("pkill -9 vsim")
         sys.exit(1)
     
-    if return_code != 0:
+    if result['status'] == 'idle':
+        print(f"\n--- WARNING: Simulation log idle for {args.idle_timeout}s, aborted ---")
+        sys.exit(1)
+    
+    if result['returncode'] != 0:
         print(f"\n--- ERROR: Simulation failed! ---")
         sys.exit(1)
     
+    if not analyzer.passed():
+        print(f"\n--- ERROR: Simulation reported {analyzer.errors} error(s)! ---")
+        sys.exit(1)
+    
     print(f"\n--- INFO: Simulation completed ---")
     print(f"Log file: {log_file}")
     print(f"Waveform: {wlf_file}")
@@ -143,10 +731,12 @@ try:
         report_html = coverage_dir / "html"
         
         # Generate text summary report
-        os.system(f'vcover report -details -output "{report_txt}" "{ucdb_file}"')
+        with profiler.span("vcover report -details", 'report', test=args.test) as meta:
+            meta['returncode'] = os.system(f'vcover report -details -output "{report_txt}" "{ucdb_file}"')
         
         # Generate HTML report (more detailed)
-        os.system(f'vcover report -html -htmldir "{report_html}" "{ucdb_file}"')
+        with profiler.span("vcover report -html", 'report', test=args.test) as meta:
+            meta['returncode'] = os.system(f'vcover report -html -htmldir "{report_html}" "{ucdb_file}"')
         
         print(f"Text report: {report_txt}")
         print(f"HTML report: {report_html}/index.html")
@@ -157,23 +747,27 @@ try:
         modern_script = run_dir.parent / "generate_coverage_report.py"
         if modern_script.exists():
             os.chdir(project_root)
-            os.system(f'python "{modern_script}"')
-            modern_report = coverage_dir / "modern_report.html"
-            print(f"Modern report: {modern_report}")
+            with profiler.span("generate_coverage_report.py", 'report') as meta:
+                meta['returncode'] = os.system(f'python "{modern_script}" --ucdb "{ucdb_file}"')
+            if meta['returncode']:
+                print(f"\n--- WARNING: Modern coverage report failed (see above) ---")
+            else:
+                print(f"Modern report: {coverage_dir / 'modern_report.html'}")
         else:
             print(f"Modern report script not found: {modern_script}")
     
     print(f"\n--- INFO: All steps completed ---")
 
-except KeyboardInterrupt:
-    print("\n--- INFO: Interrupted by user ---")
-    if os.name == 'nt':
-        os.system("taskkill /F /IM vsim.exe 2>nul")
-    else:
-        os.system("pkill -9 vsim")
-    sys.exit(0)
-except Exception as e:
-    print(f"\n--- FATAL ERROR: {e} ---")
-    import traceback
-    traceback.print_exc()
-    sys.exit(1)
+# --- Main Script Execution Block ---
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n--- INFO: Interrupted by user ---")
+        sim_process.kill_active()
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n--- FATAL ERROR: {e} ---")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,199 @@
+"""
+Coverage Saturation Detection
+Follows the functional coverage of each test while a regression runs and
+tells the regression to stop starting seeds of a test that no longer finds
+new bins.
+
+As each seed finishes, its UCDB's functional report is parsed (in the
+background, through the parsed-coverage sidecar cache of
+generate_coverage_report.py) into the bins it hit. The test's cumulative distinct bins after
+n seeds, B(n), is fitted with the saturation curve
+
+    B(n) = plateau * (1 - r^n)
+
+(a grid over r with the least-squares plateau for each), so the expected
+new bins from one more seed are plateau * r^n * (1 - r). Once a test has
+at least min_seeds parsed seeds and that gain is below the threshold, the
+test is saturated and its remaining seeds are skipped.
+
+Seeds are counted in the order they finish, and bins are new relative to
+the same test's earlier seeds.
+
+Author: Assaf Afriat
+Date: 2026-10-16
+"""
+
+import math
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from generate_coverage_report import extract_reports
+
+import profiler
+
+# Expected new bins per seed below which a test is saturated
+DEFAULT_THRESHOLD = 0.5
+# Parsed seeds of a test needed before it can be called saturated
+DEFAULT_MIN_SEEDS = 4
+# Saturation rates tried by the fit
+RATE_GRID = [i / 100.0 for i in range(1, 100)]
+
+
+def functional_bins(ucdb_path):
+    """Return (hit bins, all bins) of a UCDB's covergroups as cg.cp.bin names."""
+    hit = set()
+    every = set()
+    for cg in extract_reports(ucdb_path, ('functional',))['functional']:
+        for cp in cg['coverpoints']:
+            for b in cp['bins']:
+                name = f"{cg['name']}.{cp['name']}.{b['name']}"
+                every.add(name)
+                if b['hits'] > 0:
+                    hit.add(name)
+    return hit, every
+
+
+def fit_saturation(cumulative):
+    """Fit B(n) = plateau * (1 - r^n) to cumulative bins after seeds 1..n.
+
+    Returns (plateau, r), or None with fewer than two points.
+    """
+    if len(cumulative) < 2:
+        return None
+    best = None
+    for r in RATE_GRID:
+        basis = [1.0 - r ** n for n in range(1, len(cumulative) + 1)]
+        plateau = sum(b * f for b, f in zip(cumulative, basis)) / sum(f * f for f in basis)
+        error = sum((b - plateau * f) ** 2 for b, f in zip(cumulative, basis))
+        if best is None or error < best[0]:
+            best = (error, plateau, r)
+    return best[1], best[2]
+
+
+def project(cumulative, threshold=DEFAULT_THRESHOLD, limit=None):
+    """Projection of a test's curve.
+
+    Returns {'seeds', 'bins', 'plateau', 'next_gain', 'seeds_to_saturate'},
+    or None when the curve cannot be fitted yet. seeds_to_saturate is how
+    many more seeds it takes until one adds fewer than threshold bins.
+    limit (the number of bins in the test's covergroups) caps the plateau.
+    """
+    fit = fit_saturation(cumulative)
+    if fit is None:
+        return None
+    plateau, r = fit
+    n = len(cumulative)
+    next_gain = max(0.0, plateau * r ** n * (1 - r))
+    if limit is not None:
+        plateau = min(plateau, limit)
+        next_gain = min(next_gain, limit - cumulative[-1])
+    more = 0
+    if next_gain >= threshold:
+        # plateau * r^(n+k) * (1-r) < threshold
+        more = math.ceil(math.log(threshold / (plateau * (1 - r))) / math.log(r)) - n
+    return {
+        'seeds': n,
+        'bins': cumulative[-1],
+        'plateau': max(plateau, cumulative[-1]),
+        'next_gain': next_gain,
+        'seeds_to_saturate': max(0, more),
+    }
+
+
+class SaturationDetector:
+    """Tracks per-test coverage growth of a running regression.
+
+    add(job) may be called from any thread as jobs finish; passing jobs with
+    a UCDB are parsed by a small background pool. saturated(test) tells the
+    regression whether to start another seed of test.
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, min_seeds=DEFAULT_MIN_SEEDS, jobs=2):
+        self.threshold = threshold
+        self.min_seeds = max(2, min_seeds)
+        self.curves = {}
+        self.bins = {}
+        self.all_bins = set()
+        self.test_bins = {}
+        self.saturated_tests = set()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, jobs), thread_name_prefix='coverage')
+        self._futures = []
+
+    def add(self, job):
+        """Queue a finished job's UCDB for parsing."""
+        if not job.get('passed') or not job.get('ucdb') or not Path(job['ucdb']).is_file():
+            return
+        with self._lock:
+            self._futures.append(self._pool.submit(self._parse, job['test'], job['seed'], job['ucdb']))
+
+    def _parse(self, test, seed, ucdb):
+        try:
+            with profiler.span(f"coverage {test} seed={seed}", 'coverage', test=test, seed=seed):
+                hit, every = functional_bins(ucdb)
+        except RuntimeError as e:
+            # Counting a failed report as a seed with no new bins would fake saturation
+            print(f"--- WARNING: {test} seed={seed} left out of the saturation curve: {e} ---")
+            return
+        with self._lock:
+            self.all_bins |= every
+            self.test_bins.setdefault(test, set()).update(every)
+            covered = self.bins.setdefault(test, set())
+            covered |= hit
+            curve = self.curves.setdefault(test, [])
+            curve.append(len(covered))
+            if test not in self.saturated_tests and len(curve) >= self.min_seeds:
+                projection = project(curve, self.threshold, len(self.test_bins[test]))
+                if projection and projection['next_gain'] < self.threshold:
+                    self.saturated_tests.add(test)
+                    print(f"--- INFO: Coverage of {test} saturated after {len(curve)} seeds "
+                          f"({len(covered)} bins, next seed +{projection['next_gain']:.2f}), "
+                          f"no more seeds started ---")
+
+    def saturated(self, test):
+        with self._lock:
+            return test in self.saturated_tests
+
+    def finish(self):
+        """Wait for the UCDBs still being parsed."""
+        while True:
+            with self._lock:
+                futures = [f for f in self._futures if not f.done()]
+            if not futures:
+                break
+            for future in futures:
+                future.result()
+        self._pool.shutdown()
+
+    def report(self):
+        """Print the per-test curves and the projected closure."""
+        print(f"\n--- INFO: Coverage Saturation ---")
+        print(f"{'Test':<24}{'Seeds':>6}{'Bins':>7}{'Plateau':>9}{'Next seed':>11}  Projection")
+        for test, curve in self.curves.items():
+            projection = project(curve, self.threshold, len(self.test_bins[test]))
+            if projection is None:
+                print(f"{test:<24}{len(curve):>6}{curve[-1]:>7}{'-':>9}{'-':>11}  too few seeds to fit")
+                continue
+            if test in self.saturated_tests or projection['seeds_to_saturate'] == 0:
+                outlook = "saturated"
+            else:
+                outlook = f"saturates in ~{projection['seeds_to_saturate']} more seed(s)"
+            print(f"{test:<24}{projection['seeds']:>6}{projection['bins']:>7}{projection['plateau']:>9.1f}"
+                  f"{projection['next_gain']:>+11.2f}  {outlook}")
+        if not self.all_bins:
+            return
+        covered = set().union(*self.bins.values())
+        # The tests' plateaus overlap; the union can reach at most their sum of missing bins more
+        headroom = sum(max(0.0, p['plateau'] - p['bins'])
+                       for p in (project(c, self.threshold, len(self.test_bins[t])) for t, c in self.curves.items())
+                       if p)
+        projected = min(len(self.all_bins), len(covered) + headroom)
+        print(f"Functional bins covered: {len(covered)}/{len(self.all_bins)} "
+              f"({100.0 * len(covered) / len(self.all_bins):.1f}%), projected closure with more seeds: "
+              f"at most {projected:.0f}/{len(self.all_bins)} ({100.0 * projected / len(self.all_bins):.1f}%)")
+        if projected < len(self.all_bins):
+            print(f"{len(self.all_bins) - projected:.0f} bin(s) are not projected to be hit by these tests; "
+                  f"they need new stimulus, not more seeds")
@@ -0,0 +1,159 @@
+"""
+History-Aware Regression Scheduler
+Decides the order regression jobs start in and how many run at once.
+
+Jobs are started by priority class first (smoke tests report before the
+long tests), then longest-processing-time first within a class, using the
+run times recorded in the results database for the same test on the same
+build (falling back to other builds of the test). Starting the long jobs
+early keeps one late CpmMainTest seed from running alone at the end.
+
+A job only starts while the simulator license count and the memory budget
+(the sum of the running jobs' historical peak RSS) allow it; when the next
+job in order does not fit the memory left, a smaller one may start first.
+
+Author: Assaf Afriat
+Date: 2026-10-16
+"""
+
+import os
+from statistics import median
+
+# Priority classes, reported first to last
+PRIORITY_CLASSES = ('smoke', 'normal', 'low')
+DEFAULT_CLASS = 'normal'
+# Tests whose name contains this go in the smoke class unless overridden
+SMOKE_MARKER = 'Smoke'
+# Runs per (test, build) the estimates are taken from, newest first
+HISTORY_RUNS = 20
+# Statuses whose run time is a real simulation (not cached, aborted or timed out)
+TIMED_STATUSES = ('ok', 'uvm_error')
+# Fraction of physical memory the default budget allows
+DEFAULT_MEM_FRACTION = 0.9
+
+
+def physical_memory_mb():
+    """Total physical memory in MB, or None where sysconf cannot tell."""
+    try:
+        return os.sysconf('SC_PHYS_PAGES') * os.sysconf('SC_PAGE_SIZE') / (1024.0 * 1024.0)
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def default_mem_budget_mb():
+    total = physical_memory_mb()
+    return total * DEFAULT_MEM_FRACTION if total else None
+
+
+def parse_priorities(specs):
+    """Parse --priority TEST=CLASS options into {test: class}."""
+    priorities = {}
+    for spec in specs or ():
+        test, sep, cls = spec.partition('=')
+        if not sep or cls not in PRIORITY_CLASSES:
+            raise ValueError(f"expected TEST=CLASS with CLASS one of {', '.join(PRIORITY_CLASSES)}, got '{spec}'")
+        priorities[test] = cls
+    return priorities
+
+
+def load_history(conn, tests, source_hash=None, runs=HISTORY_RUNS):
+    """Median sim time and peak RSS per test from the results database.
+
+    Returns {test: {'duration', 'peak_rss_mb', 'runs', 'same_build'}}.
+    Runs of source_hash are used when there are any, otherwise the latest
+    runs of the test on any build. Tests without history are left out.
+    """
+    history = {}
+    placeholders = ', '.join('?' for _ in TIMED_STATUSES)
+    for test in tests:
+        rows = conn.execute(
+            f'SELECT source_hash, sim_time, peak_rss_mb FROM runs '
+            f'WHERE test = ? AND status IN ({placeholders}) AND sim_time IS NOT NULL '
+            f'ORDER BY id DESC', (test, *TIMED_STATUSES)).fetchall()
+        same_build = [r for r in rows if source_hash and r['source_hash'] == source_hash]
+        rows = (same_build or rows)[:runs]
+        if not rows:
+            continue
+        rss = [r['peak_rss_mb'] for r in rows if r['peak_rss_mb'] is not None]
+        history[test] = {
+            'duration': median(r['sim_time'] for r in rows),
+            'peak_rss_mb': max(rss) if rss else None,
+            'runs': len(rows),
+            'same_build': bool(same_build),
+        }
+    return history
+
+
+class JobScheduler:
+    """Orders regression jobs and gates their start.
+
+    history: load_history() result. priorities: {test: class} overrides.
+    mem_budget_mb: limit on the summed peak RSS of running jobs (None = off).
+    licenses: maximum simultaneous simulators (None = no limit).
+    """
+
+    def __init__(self, history=None, priorities=None, mem_budget_mb=None, licenses=None):
+        self.history = history or {}
+        self.priorities = priorities or {}
+        self.mem_budget_mb = mem_budget_mb
+        self.licenses = licenses
+        known = [h['duration'] for h in self.history.values()]
+        # Unknown tests are assumed long, so they are not left for the end
+        self.default_duration = max(known) if known else 0.0
+        rss = [h['peak_rss_mb'] for h in self.history.values() if h['peak_rss_mb'] is not None]
+        self.default_rss_mb = max(rss) if rss else 0.0
+
+    def priority(self, test):
+        if test in self.priorities:
+            return self.priorities[test]
+        return 'smoke' if SMOKE_MARKER in test else DEFAULT_CLASS
+
+    def estimate(self, job):
+        """Fill in and return the job's (duration, peak RSS MB) estimate."""
+        known = self.history.get(job['test'])
+        job['estimate'] = known['duration'] if known else self.default_duration
+        rss = known['peak_rss_mb'] if known else None
+        job['estimate_rss_mb'] = rss if rss is not None else self.default_rss_mb
+        return job['estimate'], job['estimate_rss_mb']
+
+    def order(self, jobs):
+        """Jobs in start order: priority class, then longest first."""
+        for job in jobs:
+            self.estimate(job)
+        return sorted(jobs, key=lambda j: (PRIORITY_CLASSES.index(self.priority(j['test'])), -j['estimate']))
+
+    def workers(self, max_workers):
+        """Pool size allowed by the license count."""
+        return max_workers if self.licenses is None else max(1, min(max_workers, self.licenses))
+
+    def next_job(self, pending, running):
+        """Index in pending (from order()) of the next job to start, or None to wait.
+
+        The first job in order that fits the memory left starts; the first
+        job of all always starts when nothing runs, even over the budget.
+        """
+        if not pending or (self.licenses is not None and len(running) >= self.licenses):
+            return None
+        if not running or self.mem_budget_mb is None:
+            return 0
+        free = self.mem_budget_mb - sum(j['estimate_rss_mb'] for j in running)
+        for i, job in enumerate(pending):
+            if job['estimate_rss_mb'] <= free:
+                return i
+        return None
+
+    def describe(self, jobs):
+        """One-line summary of how the jobs are scheduled."""
+        tests = {j['test'] for j in jobs}
+        known = sum(1 for t in tests if t in self.history)
+        parts = [f"longest first from history ({known}/{len(tests)} tests known)"]
+        classes = {}
+        for job in jobs:
+            cls = self.priority(job['test'])
+            classes[cls] = classes.get(cls, 0) + 1
+        parts.append(', '.join(f"{cls}: {classes[cls]}" for cls in PRIORITY_CLASSES if cls in classes))
+        if self.mem_budget_mb is not None:
+            parts.append(f"memory budget {self.mem_budget_mb:.0f} MB")
+        if self.licenses is not None:
+            parts.append(f"{self.licenses} license(s)")
+        return '; '.join(parts)
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Coverage-Based Seed Minimization
+Shrinks a regression to the cheapest set of seeds that still hits every
+coverage item the full set hits.
+
+Each per-seed UCDB from a --regress run (coverage/<test>_<seed>.ucdb) is
+parsed with the generate_coverage_report.py parsers into the functional
+bins it hits and the DUT code items it leaves at zero. That gives a
+seed x item hit matrix; a weighted greedy set cover then keeps picking the
+seed with the most new items per second of sim time (from the results
+database) until nothing new is left. The result is written as a
+regression list with explicit seeds.
+
+Usage:
+    python seed_minimizer.py                        # all coverage/*_<seed>.ucdb
+    python seed_minimizer.py --save-matrix coverage/seed_matrix.json
+    python seed_minimizer.py --matrix coverage/seed_matrix.json -o nightly.list
+
+Author: Assaf Afriat
+Date: 2026-10-16
+"""
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from generate_coverage_report import extract_reports
+
+import regression
+import results_db
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent.resolve()
+
+
+def parse_ucdb_name(ucdb_path):
+    """Return (test, seed) for a regression UCDB named <test>_<seed>.ucdb, else None."""
+    test, _, seed = Path(ucdb_path).stem.rpartition('_')
+    if not test or not seed.isdigit():
+        return None
+    return test, int(seed)
+
+
+def extract_items(ucdb_path):
+    """Parse one UCDB into its hit functional bins and zero-count code items."""
+    data = extract_reports(ucdb_path, ('functional', 'uncovered'))
+    functional = set()
+    for cg in data['functional']:
+        for cp in cg['coverpoints']:
+            for b in cp['bins']:
+                if b['hits'] > 0:
+                    functional.add(f"{cg['name']}.{cp['name']}.{b['name']}")
+    code_zeros = set()
+    for section, items in data['uncovered'].items():
+        for item in items:
+            code_zeros.add(f"{section}:{item['file']}:{item['line']}:{item['detail']}")
+    return {'functional': sorted(functional), 'code_zeros': sorted(code_zeros)}
+
+
+def build_matrix(ucdb_paths, jobs=None):
+    """Parse every per-seed UCDB (vcover calls run in parallel); UCDBs vcover fails on are skipped."""
+    entries = []
+    for path in ucdb_paths:
+        name = parse_ucdb_name(path)
+        if name is None:
+            print(f"[!] Skipping {path}: not named <test>_<seed>.ucdb")
+            continue
+        entries.append({'test': name[0], 'seed': name[1], 'ucdb': str(path)})
+    def extract(ucdb_path):
+        try:
+            return extract_items(ucdb_path)
+        except RuntimeError as e:
+            print(f"[!] Skipping {ucdb_path}: {e}")
+            return None
+
+    parsed = []
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as pool:
+        for entry, items in zip(entries, pool.map(extract, [e['ucdb'] for e in entries])):
+            # A failed vcover report is left out, not taken for a seed that hits nothing
+            if items is not None:
+                entry.update(items)
+                parsed.append(entry)
+    return {'seeds': parsed}
+
+
+def coverage_sets(matrix):
+    """Return {(test, seed): set of covered items} over items some seed misses.
+
+    Code items only appear in a report when they are *not* covered, so a
+    seed covers every code item that some other seed leaves at zero and it
+    does not. Items every seed covers need no particular seed.
+    """
+    code_universe = set()
+    for entry in matrix['seeds']:
+        code_universe.update(entry['code_zeros'])
+    sets = {}
+    for entry in matrix['seeds']:
+        covered = {f"cvg:{b}" for b in entry['functional']}
+        covered |= {f"code:{c}" for c in code_universe.difference(entry['code_zeros'])}
+        sets[(entry['test'], entry['seed'])] = covered
+    return sets
+
+
+def greedy_set_cover(sets, costs):
+    """Weighted greedy set cover: pick the seed with the most new items per unit cost.
+
+    Ties go to the cheaper seed. Returns the chosen keys in pick order.
+    """
+    universe = set().union(*sets.values()) if sets else set()
+    covered = set()
+    chosen = []
+    remaining = set(sets)
+    while covered != universe and remaining:
+        best = max(remaining, key=lambda k: (len(sets[k] - covered) / costs[k], -costs[k]))
+        if not sets[best] - covered:
+            break
+        chosen.append(best)
+        covered |= sets[best]
+        remaining.discard(best)
+    return chosen
+
+
+def get_costs(keys, db_path):
+    """Sim time per (test, seed) from the results database.
+
+    Seeds without a recorded run cost the median of the known times (1.0
+    when nothing is known), so they are neither favoured nor avoided.
+    """
+    times = {}
+    if db_path and Path(db_path).exists():
+        times = results_db.seed_sim_times(results_db.connect(db_path))
+    known = sorted(t for k, t in times.items() if k in keys and t)
+    default = known[len(known) // 2] if known else 1.0
+    return {k: times.get(k) or default for k in keys}
+
+
+def minimize(matrix, costs, keep_all_tests=True):
+    """Return the chosen (test, seed) keys for the matrix."""
+    sets = coverage_sets(matrix)
+    chosen = greedy_set_cover(sets, costs)
+    if keep_all_tests:
+        # A test may check things coverage does not see (e.g. RAL reset values)
+        picked_tests = {test for test, _ in chosen}
+        for test in sorted({test for test, _ in sets} - picked_tests):
+            chosen.append(min((k for k in sets if k[0] == test), key=lambda k: costs[k]))
+    elif not chosen and sets:
+        chosen.append(min(sets, key=lambda k: costs[k]))
+    return chosen
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pick a minimal seed set that keeps the same coverage")
+    parser.add_argument('ucdbs', nargs='*', type=Path,
+                        help="Per-seed UCDBs (default: coverage/<test>_<seed>.ucdb).")
+    parser.add_argument('--matrix', type=Path, help="Load a previously saved hit matrix instead of UCDBs.")
+    parser.add_argument('--save-matrix', type=Path, help="Save the parsed hit matrix as JSON.")
+    parser.add_argument('--db', type=Path, default=results_db.DEFAULT_DB,
+                        help="Results database used for per-seed sim times.")
+    parser.add_argument('--output', '-o', type=Path, default=Path(__file__).parent / "regress_min.list",
+                        help="Regression list to write.")
+    parser.add_argument('--allow-drop-tests', action='store_true',
+                        help="Allow a test to be dropped entirely if other tests cover its items.")
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count(),
+                        help="Maximum number of parallel vcover processes.")
+    args = parser.parse_args()
+
+    if args.matrix:
+        print(f"[*] Reading hit matrix from: {args.matrix}")
+        with open(args.matrix, 'r', encoding='utf-8') as f:
+            matrix = json.load(f)
+    else:
+        ucdbs = args.ucdbs or sorted(p for p in (PROJECT_ROOT / "coverage").glob("*_*.ucdb")
+                                     if parse_ucdb_name(p))
+        if not ucdbs:
+            print("[!] No per-seed UCDBs found. Run a regression with run.py --regress first.")
+            return 1
+        print(f"[*] Parsing {len(ucdbs)} UCDBs...")
+        matrix = build_matrix(ucdbs, args.jobs)
+    if args.save_matrix:
+        args.save_matrix.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.save_matrix, 'w', encoding='utf-8') as f:
+            json.dump(matrix, f, indent=2)
+        print(f"[+] Saved hit matrix: {args.save_matrix}")
+
+    keys = [(e['test'], e['seed']) for e in matrix['seeds']]
+    costs = get_costs(keys, args.db)
+    chosen = minimize(matrix, costs, keep_all_tests=not args.allow_drop_tests)
+
+    sets = coverage_sets(matrix)
+    universe = set().union(*sets.values()) if sets else set()
+    kept = set().union(*(sets[k] for k in chosen)) if chosen else set()
+    full_time = sum(costs.values())
+    min_time = sum(costs[k] for k in chosen)
+
+    seeds_by_test = {}
+    for test, seed in chosen:
+        seeds_by_test.setdefault(test, []).append(seed)
+    header = (f"Minimized regression list generated by seed_minimizer.py\n"
+              f"{len(chosen)}/{len(keys)} seeds, {len(kept)}/{len(universe)} distinguishing coverage items, "
+              f"est. sim time {min_time:.0f}s/{full_time:.0f}s")
+    regression.write_test_list(args.output, seeds_by_test, header)
+
+    print(f"\n[+] Seeds: {len(keys)} -> {len(chosen)}")
+    for test, seeds in seeds_by_test.items():
+        print(f"    {test}: {', '.join(str(s) for s in sorted(seeds))}")
+    print(f"[+] Coverage items kept: {len(kept)}/{len(universe)}")
+    if full_time:
+        print(f"[+] Estimated sim time: {min_time:.1f}s of {full_time:.1f}s "
+              f"({100.0 * (1 - min_time / full_time):.0f}% saved)")
+    print(f"[+] Test list: {args.output}")
+    print(f"    Run it with: python run.py --regress {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+"""
+Warm Simulator Session Pool
+Runs regression jobs in long-lived `vsim -c` sessions instead of starting
+a new simulator process for every test.
+
+Each session is a vsim Tcl shell driven over its stdin. A job switches the
+transcript to the job's log, loads the design with the job's test, seed
+and plusargs, runs it, saves coverage and unloads the design again
+(quit -sim), so the process, license checkout and Tcl/UVM start-up are
+paid once per session. Plusargs and -sv_seed are fixed when a design is
+loaded, which is why jobs reload the design rather than `restart -f`.
+
+A session is recycled after a number of jobs, and killed (then restarted
+by the next job) on timeout, inactivity or fail-fast abort.
+
+Author: Assaf Afriat
+Date: 2026-10-16
+"""
+
+import itertools
+import queue
+import subprocess
+import threading
+import time
+from pathlib import Path
+
+import proc_sampler
+import sim_process
+
+DEFAULT_RECYCLE = 20
+# Printed by the session after each job; built with Tcl so the command
+# echo in the transcript never matches
+DONE_MARKER = "@@CPM_JOB_DONE"
+# Seconds to wait for a session to exit after 'quit -f'
+QUIT_GRACE = 10
+
+
+class VsimSession:
+    """One long-lived vsim -c process."""
+
+    def __init__(self, index, cwd, transcript_dir, recycle_after=DEFAULT_RECYCLE):
+        self.index = index
+        self.cwd = Path(cwd)
+        self.transcript = Path(transcript_dir) / f"session_{index}.log"
+        self.recycle_after = recycle_after
+        self.proc = None
+        self.lines = None
+        self.jobs_run = 0
+        self._ids = itertools.count()
+
+    def start(self):
+        self.transcript.parent.mkdir(parents=True, exist_ok=True)
+        self.proc = subprocess.Popen(['vsim', '-c'], cwd=str(self.cwd), stdin=subprocess.PIPE,
+                                     stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+                                     encoding='utf-8', errors='replace', bufsize=1,
+                                     **sim_process.popen_group_kwargs())
+        sim_process.register(self.proc)
+        self.lines = queue.Queue()
+        threading.Thread(target=self._read, args=(self.proc, self.lines), daemon=True).start()
+        self.jobs_run = 0
+        self._send(['onerror {resume}', f'transcript file {{{self._rel(self.transcript)}}}'])
+
+    @staticmethod
+    def _read(proc, lines):
+        for line in proc.stdout:
+            lines.put(line)
+        lines.put(None)
+
+    def _rel(self, path):
+        return Path(path).resolve().relative_to(self.cwd.resolve()).as_posix()
+
+    def _send(self, commands):
+        self.proc.stdin.write(''.join(f"{c}\n" for c in commands))
+        self.proc.stdin.flush()
+
+    def kill(self):
+        if self.proc is not None:
+            sim_process.kill_group(self.proc)
+            sim_process.unregister(self.proc)
+            self.proc = None
+
+    def close(self):
+        """Quit the session, killing it if it does not exit."""
+        if self.proc is None:
+            return
+        try:
+            self._send(['quit -f'])
+            self.proc.wait(timeout=QUIT_GRACE)
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+        self.kill()
+
+    def run(self, job, vsim_args, on_line=None, timeout=None, idle_timeout=None):
+        """Run one job in this session. Returns the same dict as sim_process.run_sim."""
+        start_time = time.time()
+        if self.proc is None or self.proc.poll() is not None:
+            self.kill()
+            self.start()
+        marker = f"{DONE_MARKER}:{next(self._ids)}"
+        commands = [
+            f'transcript file {{{self._rel(job["log"])}}}',
+            f'vsim -onfinish stop {vsim_args}',
+            'run -all',
+        ]
+        if '-coverage' in vsim_args.split():
+            commands.append(f'coverage save {{{self._rel(job["ucdb"])}}}')
+        commands += [
+            'quit -sim',
+            f'transcript file {{{self._rel(self.transcript)}}}',
+            f'echo [join {{{marker.replace(":", " ")}}} :]',
+        ]
+        try:
+            self._send(commands)
+        except OSError:
+            self.kill()
+            return {'returncode': None, 'elapsed': time.time() - start_time, 'status': 'failed',
+                    'resources': proc_sampler.summarize([], None, 0), 'peak_rss_mb': None}
+        sampler = None
+        if sim_process.SAMPLE_INTERVAL and proc_sampler.available():
+            # The session outlives the job: count CPU and I/O from here
+            sampler = proc_sampler.ResourceSampler(self.proc.pid, sim_process.SAMPLE_INTERVAL,
+                                                   relative=True).start()
+
+        status = None
+        last_line = start_time
+        while status is None:
+            try:
+                line = self.lines.get(timeout=sim_process.POLL_INTERVAL)
+            except queue.Empty:
+                now = time.time()
+                if timeout and now - start_time > timeout:
+                    status = 'timeout'
+                elif idle_timeout and now - last_line > idle_timeout:
+                    status = 'idle'
+                continue
+            if line is None:
+                status = 'failed'
+            elif line.rstrip().endswith(marker):
+                status = 'ok'
+            else:
+                last_line = time.time()
+                if on_line is not None and on_line(line):
+                    status = 'aborted'
+
+        resources = sampler.stop() if sampler is not None else proc_sampler.summarize([], None, 0)
+        if status == 'ok':
+            self.jobs_run += 1
+            if self.jobs_run >= self.recycle_after:
+                self.close()
+        else:
+            # The sim may still be running inside the session; start over
+            self.kill()
+        return {
+            'returncode': 0 if status == 'ok' else None,
+            'elapsed': time.time() - start_time,
+            'status': status,
+            'resources': resources,
+            'peak_rss_mb': resources['peak_rss_mb'],
+        }
+
+
+class SessionPool:
+    """A fixed number of VsimSessions shared by the regression workers.
+
+    build_args(job) returns the vsim arguments (design, plusargs, seed)
+    for a job; output paths are added by the session.
+    """
+
+    def __init__(self, size, cwd, build_args, transcript_dir, recycle_after=DEFAULT_RECYCLE):
+        self.build_args = build_args
+        self._free = queue.Queue()
+        self._sessions = [VsimSession(i, cwd, transcript_dir, recycle_after) for i in range(max(1, size))]
+        for session in self._sessions:
+            self._free.put(session)
+
+    def run(self, job, on_line=None, timeout=None, idle_timeout=None):
+        session = self._free.get()
+        try:
+            return session.run(job, self.build_args(job), on_line, timeout, idle_timeout)
+        finally:
+            self._free.put(session)
+
+    def close(self):
+        for session in self._sessions:
+            session.close()
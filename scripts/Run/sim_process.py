@@ -0,0 +1,205 @@
+"""
+Simulator Process Control
+Launches simulator commands in their own process group and enforces
+wall-clock and log-inactivity timeouts while they run.
+
+Only process groups started here are ever killed, so concurrent jobs and
+other users' vsim sessions on the same host are left alone.
+
+Author: Assaf Afriat
+Date: 2026-10-16
+"""
+
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import proc_sampler
+
+# Seconds between watchdog checks
+POLL_INTERVAL = 0.5
+# Seconds to wait after SIGTERM before escalating to SIGKILL
+KILL_GRACE = 5
+# Seconds between /proc resource samples of a running sim (0 = off)
+SAMPLE_INTERVAL = 1.0
+
+# Processes started by run_sim that have not finished yet
+_active = set()
+_active_lock = threading.Lock()
+
+
+def popen_group_kwargs():
+    """Popen arguments that put the child in a new process group."""
+    if os.name == 'nt':
+        return {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {'start_new_session': True}
+
+
+def kill_group(proc):
+    """Kill a process and everything in its process group.
+
+    The group gets SIGTERM, then SIGKILL if any member is still alive after
+    KILL_GRACE seconds, including when the direct child (e.g. a vsim wrapper
+    script) exited on SIGTERM but the simulator under it did not.
+    """
+    if proc.poll() is not None:
+        return
+    if os.name == 'nt':
+        subprocess.run(['taskkill', '/F', '/T', '/PID', str(proc.pid)],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return
+    # The child leads its group (start_new_session), so the group id is its pid
+    pgid = proc.pid
+    try:
+        os.killpg(pgid, signal.SIGTERM)
+    except ProcessLookupError:
+        return
+    deadline = time.time() + KILL_GRACE
+    try:
+        proc.wait(timeout=KILL_GRACE)
+    except subprocess.TimeoutExpired:
+        pass
+    try:
+        while group_alive(pgid) and time.time() < deadline:
+            time.sleep(min(POLL_INTERVAL, max(0.0, deadline - time.time())))
+        if group_alive(pgid):
+            os.killpg(pgid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+def group_alive(pgid):
+    """True while any process in the group exists (zombies count until reaped)."""
+    try:
+        os.killpg(pgid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def register(proc):
+    """Track a process started outside run_sim so kill_active() reaches it."""
+    with _active_lock:
+        _active.add(proc)
+
+
+def unregister(proc):
+    with _active_lock:
+        _active.discard(proc)
+
+
+def kill_active():
+    """Kill every simulator process group started by this process."""
+    with _active_lock:
+        procs = list(_active)
+    for proc in procs:
+        kill_group(proc)
+
+
+def _log_size(log_file):
+    try:
+        return Path(log_file).stat().st_size
+    except OSError:
+        return -1
+
+
+def _pump_output(proc, on_line, echo, abort):
+    """Tee the child's stdout to the console and the line callback."""
+    for line in proc.stdout:
+        if echo:
+            sys.stdout.write(line)
+            sys.stdout.flush()
+        if on_line(line) and not abort.is_set():
+            abort.set()
+
+
+def run_sim(cmd, cwd, timeout=None, idle_timeout=None, log_file=None, stdout=None,
+            on_line=None, echo=True):
+    """Run a shell command under a wall-clock and inactivity watchdog.
+
+    timeout: kill the process group after this many seconds.
+    idle_timeout: kill it when log_file has not grown for this many seconds.
+    stdout: passed to Popen (None inherits the console).
+    on_line: if given, stdout is piped and every line is passed to
+        on_line(line) (and echoed to the console if echo is set); when it
+        returns True the process group is killed.
+
+    Returns a dict with 'returncode', 'elapsed', 'status', 'resources' and
+    'peak_rss_mb', where status is 'ok', 'failed', 'timeout', 'idle' or
+    'aborted', and resources is the proc_sampler summary of the process
+    group, sampled every SAMPLE_INTERVAL seconds (empty without /proc).
+    """
+    start_time = time.time()
+    popen_kwargs = popen_group_kwargs()
+    if on_line is not None:
+        stdout = subprocess.PIPE
+        popen_kwargs.update(text=True, encoding='utf-8', errors='replace', bufsize=1)
+    proc = subprocess.Popen(cmd, shell=True, cwd=str(cwd), stdout=stdout,
+                            stderr=subprocess.STDOUT if stdout is not None else None,
+                            **popen_kwargs)
+    register(proc)
+    sampler = None
+    if SAMPLE_INTERVAL and os.name != 'nt' and proc_sampler.available():
+        sampler = proc_sampler.ResourceSampler(proc.pid, SAMPLE_INTERVAL).start()
+
+    abort = threading.Event()
+    reader = None
+    if on_line is not None:
+        reader = threading.Thread(target=_pump_output, args=(proc, on_line, echo, abort), daemon=True)
+        reader.start()
+
+    status = None
+    last_size = _log_size(log_file) if log_file else -1
+    last_growth = start_time
+    try:
+        while True:
+            try:
+                proc.wait(timeout=POLL_INTERVAL)
+                break
+            except subprocess.TimeoutExpired:
+                pass
+            now = time.time()
+            if abort.is_set():
+                status = 'aborted'
+                kill_group(proc)
+                break
+            if timeout and now - start_time > timeout:
+                status = 'timeout'
+                kill_group(proc)
+                break
+            if log_file and idle_timeout:
+                size = _log_size(log_file)
+                if size != last_size:
+                    last_size = size
+                    last_growth = now
+                elif now - last_growth > idle_timeout:
+                    status = 'idle'
+                    kill_group(proc)
+                    break
+    finally:
+        if proc.poll() is None:
+            # Interrupted (e.g. KeyboardInterrupt) - never leave the sim behind
+            kill_group(proc)
+        unregister(proc)
+
+    returncode = proc.wait()
+    resources = sampler.stop() if sampler is not None else proc_sampler.summarize([], None, 0)
+    if reader is not None:
+        reader.join()
+    if status is None and abort.is_set():
+        status = 'aborted'
+    if status is None:
+        status = 'ok' if returncode == 0 else 'failed'
+    return {
+        'returncode': returncode,
+        'elapsed': time.time() - start_time,
+        'status': status,
+        'resources': resources,
+        'peak_rss_mb': resources['peak_rss_mb'],
+    }
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Parallel UCDB Merge
+Merges many per-seed UCDBs into one with a k-ary tree of vcover merges.
+
+A single `vcover merge` over hundreds of UCDBs runs on one core. Here the
+inputs are merged fan_in at a time on a worker pool, and the partial
+results are merged again until one database is left.
+
+IncrementalMerger does the same while a regression is still running:
+finished UCDBs are added as they arrive and merged in the background, so
+only the last few partials are left to combine when the last sim ends.
+
+Usage:
+    python ucdb_merge.py -o coverage/merged.ucdb coverage/*_*.ucdb --jobs 8
+
+Author: Assaf Afriat
+Date: 2026-10-16
+"""
+
+import argparse
+import itertools
+import os
+import shutil
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import profiler
+
+DEFAULT_FAN_IN = 4
+
+
+def merge_command(output, inputs):
+    """vcover merge command for one node of the merge tree."""
+    return ['vcover', 'merge', str(output)] + [str(p) for p in inputs]
+
+
+def merge_ucdbs(output, inputs):
+    """Run one vcover merge. Returns True on success."""
+    with profiler.span(f"vcover merge {Path(output).name}", 'merge', inputs=len(inputs)) as meta:
+        result = subprocess.run(merge_command(output, inputs), capture_output=True, text=True)
+        meta['returncode'] = result.returncode
+    if result.returncode != 0:
+        print(f"--- ERROR: vcover merge into {output} failed ---")
+        print(result.stdout + result.stderr, end='')
+        return False
+    return True
+
+
+def _finalize(source, output, keep_source):
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    if keep_source:
+        shutil.copyfile(source, output)
+    else:
+        Path(source).replace(output)
+
+
+def tree_merge(inputs, output, work_dir, fan_in=DEFAULT_FAN_IN, jobs=None):
+    """Merge inputs into output as a k-ary tree, one level at a time.
+
+    Each level merges groups of fan_in databases in parallel; partial
+    results go to work_dir. Returns True on success.
+    """
+    inputs = [Path(p) for p in inputs]
+    if not inputs:
+        return False
+    fan_in = max(2, fan_in)
+    work_dir = Path(work_dir)
+    work_dir.mkdir(parents=True, exist_ok=True)
+
+    level = 0
+    current = inputs
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 1, thread_name_prefix='merge') as pool:
+        while len(current) > 1:
+            groups = [current[i:i + fan_in] for i in range(0, len(current), fan_in)]
+            outputs = [work_dir / f"level{level}_{i}.ucdb" for i in range(len(groups))]
+            print(f"[*] Merge level {level}: {len(current)} -> {len(groups)} databases")
+            results = list(pool.map(lambda node: merge_ucdbs(*node) if len(node[1]) > 1 else True,
+                                    zip(outputs, groups)))
+            if not all(results):
+                return False
+            # A lone leftover database moves up a level unmerged
+            current = [out if len(group) > 1 else group[0] for out, group in zip(outputs, groups)]
+            level += 1
+    _finalize(current[0], output, keep_source=current[0] in inputs)
+    shutil.rmtree(work_dir, ignore_errors=True)
+    return True
+
+
+class IncrementalMerger:
+    """Folds UCDBs into a running merge while they are still being produced.
+
+    add(ucdb) may be called from any thread as simulations finish. Whenever
+    fan_in databases are waiting, they are merged in the background and the
+    partial result goes back into the queue. finish() merges what is left
+    into the output.
+    """
+
+    def __init__(self, output, work_dir, fan_in=DEFAULT_FAN_IN, jobs=2):
+        self.output = Path(output)
+        self.work_dir = Path(work_dir)
+        self.fan_in = max(2, fan_in)
+        self.pending = []
+        self.inputs = set()
+        self.failed = False
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, jobs), thread_name_prefix='merge')
+        self._futures = []
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+        self.work_dir.mkdir(parents=True)
+
+    def add(self, ucdb):
+        """Queue a finished UCDB for merging."""
+        with self._lock:
+            self.inputs.add(Path(ucdb))
+            self.pending.append(Path(ucdb))
+            self._schedule()
+
+    def _schedule(self):
+        # Called with the lock held
+        while len(self.pending) >= self.fan_in and not self.failed:
+            group, self.pending = self.pending[:self.fan_in], self.pending[self.fan_in:]
+            output = self.work_dir / f"partial_{next(self._ids)}.ucdb"
+            self._futures.append(self._pool.submit(self._merge, output, group))
+
+    def _merge(self, output, group):
+        ok = merge_ucdbs(output, group)
+        with self._lock:
+            if not ok:
+                self.failed = True
+                return
+            # Partials are only inputs to the next merge
+            for ucdb in group:
+                if ucdb not in self.inputs:
+                    ucdb.unlink(missing_ok=True)
+            self.pending.append(output)
+            self._schedule()
+
+    def finish(self):
+        """Wait for the background merges and produce the output. Returns True on success."""
+        while True:
+            with self._lock:
+                futures = [f for f in self._futures if not f.done()]
+            if not futures:
+                break
+            for future in futures:
+                future.result()
+        self._pool.shutdown()
+        if self.failed or not self.pending:
+            return False
+        ok = tree_merge(self.pending, self.output, self.work_dir / "final", self.fan_in, self.fan_in)
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+        return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge UCDBs with a parallel k-ary tree of vcover merges")
+    parser.add_argument('ucdbs', nargs='+', type=Path, help="UCDBs to merge.")
+    parser.add_argument('--output', '-o', type=Path, required=True, help="Merged UCDB to write.")
+    parser.add_argument('--fan-in', type=int, default=DEFAULT_FAN_IN, help="UCDBs per vcover merge.")
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count(),
+                        help="Maximum number of parallel vcover merges.")
+    args = parser.parse_args()
+
+    ucdbs = [p for p in args.ucdbs if p.resolve() != args.output.resolve()]
+    print(f"[*] Merging {len(ucdbs)} UCDBs into {args.output} (fan-in {args.fan_in})")
+    if not tree_merge(ucdbs, args.output, args.output.parent / "merge_tmp", args.fan_in, args.jobs):
+        print("[!] Merge failed")
+        return 1
+    print(f"[+] Merged coverage: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+"""
+Windowed Waveform Capture
+Builds the vsim run commands for a failure rerun that logs waves only
+around the first error.
+
+The first UVM_ERROR/UVM_FATAL or simulator error (e.g. an assertion in
+CpmStreamIf) found by UvmLogAnalyzer gives the sim time of the failure.
+The rerun runs silently up to `before` ns ahead of it, logs the interface
+hierarchy (tb_top/stream_if and tb_top/reg_if by default) until `after` ns
+past it, and quits, so the WLF only holds that window.
+
+Author: Assaf Afriat
+Date: 2026-10-16
+"""
+
+from log_analyzer import to_ns
+
+DEFAULT_SCOPES = ('/tb_top/stream_if', '/tb_top/reg_if')
+DEFAULT_BEFORE = 1000
+DEFAULT_AFTER = 200
+# Unit of the windows and of the vsim run commands; error times are
+# converted to it from the unit they were logged in
+TIME_UNIT = 'ns'
+
+
+def error_window(first_error, before=DEFAULT_BEFORE, after=DEFAULT_AFTER):
+    """Return (start, end) in ns around the first error, or None if its time is unknown."""
+    if not first_error or first_error.get('time') is None:
+        return None
+    time = to_ns(first_error['time'], first_error.get('unit'))
+    return max(0.0, time - before), time + after
+
+
+def run_commands(window, scopes=DEFAULT_SCOPES, start_time=0.0):
+    """vsim -do commands that log scopes over window and stop at its end.
+
+    start_time is the sim time the run starts at (non-zero after a
+    checkpoint restore). Without a window the scopes are logged for the
+    whole run.
+    """
+    log = "log -r " + " ".join(f"{scope.rstrip('/')}/*" for scope in scopes)
+    if window is None:
+        return f"{log}; run -all"
+    start, end = window
+    commands = []
+    if start > start_time:
+        commands.append(f"run {start - start_time:g} {TIME_UNIT}")
+    commands.append(log)
+    commands.append(f"run {end - max(start, start_time):g} {TIME_UNIT}")
+    return "; ".join(commands)
+
+
+def describe(window, scopes=DEFAULT_SCOPES):
+    """Short text for the summary, e.g. '800-1400 ns of /tb_top/stream_if /tb_top/reg_if'."""
+    span = "whole run" if window is None else f"{window[0]:g}-{window[1]:g} {TIME_UNIT}"
+    return f"{span} of {' '.join(scopes)}"
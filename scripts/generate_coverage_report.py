@@ -7,21 +7,347 @@ Author: Assaf Afriat
 Date: 2026-02-01
 """
 
+import argparse
+import gzip
+import hashlib
+import json
 import os
 import re
 import subprocess
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
-def run_vcover(args):
-    """Run vcover command and return output."""
-    result = subprocess.run(['vcover'] + args, capture_output=True, text=True)
-    return result.stdout
+# vcover report options behind each view of the report. The views need
+# different report modes and -du scopes, so they are separate vcover runs.
+REPORTS = {
+    'summary': ['report', '-summary'],
+    'dut': ['report', '-summary', '-du=cpm'],
+    'uncovered': ['report', '-zeros', '-details', '-du=cpm'],
+    'functional': ['report', '-cvg', '-details'],
+}
+
+def iter_vcover(args):
+    """Run a vcover command and yield its output lines as they are written.
+
+    The report is never held in memory as a whole, and the caller parses
+    while vcover is still writing. Raises RuntimeError, with the end of
+    vcover's stderr, once the output is read if vcover failed, so a failed
+    report is never taken for an empty one; also if vcover cannot be
+    started (not installed or not executable).
+    """
+    with tempfile.TemporaryFile('w+', encoding='utf-8', errors='replace') as stderr:
+        try:
+            proc = subprocess.Popen(['vcover'] + args, stdout=subprocess.PIPE, stderr=stderr, text=True, bufsize=1)
+        except OSError as e:
+            raise RuntimeError(f"vcover {' '.join(args)} could not be started: {e}") from e
+        try:
+            for line in proc.stdout:
+                yield line.rstrip('\n')
+        finally:
+            proc.stdout.close()
+            proc.wait()
+        if proc.returncode != 0:
+            stderr.seek(0)
+            message = stderr.read().strip().splitlines()[-3:]
+            raise RuntimeError(f"vcover {' '.join(args)} failed (exit {proc.returncode})"
+                               + (f": {' / '.join(message)}" if message else ""))
+
+def save_lines(lines, path):
+    """Pass lines through while writing them to path."""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        for line in lines:
+            f.write(line + '\n')
+            yield line
+
+def parse_report(name, lines):
+    """Parse the lines of one of the REPORTS with its parser."""
+    return PARSERS[name](lines)
+
+def extract_reports(ucdb_path, names=tuple(REPORTS), cache=True, cache_mb=None, save_dir=None):
+    """Stream the named REPORTS of one UCDB concurrently through their parsers; returns {name: data}.
+
+    With cache, views already parsed from the same UCDB content come from
+    its sidecar (see load_sidecar) and only the missing ones run vcover.
+    With save_dir, every view runs vcover and its text is also written to
+    save_dir/<name>.txt for read_text_reports.
+
+    Raises RuntimeError if a vcover run fails. The views that did parse
+    are still cached; a failed one never is.
+    """
+    stamp = ucdb_stamp(ucdb_path) if cache and not save_dir else None
+    data = load_sidecar(ucdb_path, stamp) if stamp else {}
+    missing = [name for name in names if name not in data]
+    if missing:
+        def extract(name):
+            lines = iter_vcover(REPORTS[name] + [str(ucdb_path)])
+            if save_dir:
+                lines = save_lines(lines, Path(save_dir) / f"{name}.txt")
+            return parse_report(name, lines)
+        with ThreadPoolExecutor(max_workers=len(missing)) as pool:
+            futures = {name: pool.submit(extract, name) for name in missing}
+        errors = []
+        for name, future in futures.items():
+            try:
+                data[name] = future.result()
+            except RuntimeError as e:
+                errors.append(str(e))
+        # A UCDB rewritten while vcover read it is not cached
+        if stamp and len(errors) < len(missing) and ucdb_stamp(ucdb_path) == stamp:
+            save_sidecar(ucdb_path, stamp, data, CACHE_MAX_MB if cache_mb is None else cache_mb)
+        if errors:
+            raise RuntimeError("; ".join(errors))
+    return {name: data[name] for name in names}
+
+def extract_coverage(ucdb_path, cache=True, cache_mb=None, save_dir=None):
+    """Return (overall, dut, uncovered, func_cov) of a UCDB from concurrent vcover reports."""
+    data = extract_reports(ucdb_path, cache=cache, cache_mb=cache_mb, save_dir=save_dir)
+    return data['summary'], data['dut'], data['uncovered'], data['functional']
+
+# --- Parsed-coverage cache ---
+# The parsed views of a UCDB are kept in a gzipped JSON sidecar next to it
+# (merged.ucdb -> merged.ucdb.parsed.json.gz), keyed by the UCDB's size,
+# mtime and SHA-256. Same size and mtime reload without reading the UCDB;
+# a new mtime (e.g. a copy restored from the result cache) is checked
+# against the content hash. Sidecars of a directory are evicted least
+# recently used first once they exceed CACHE_MAX_MB.
+SIDECAR_SUFFIX = '.parsed.json.gz'
+CACHE_MAX_MB = 64
+# Parsed views depend on the parsers, so any edit to this file drops the cache
+CACHE_VERSION = hashlib.sha256(Path(__file__).read_bytes()).hexdigest()[:16]
+
+def sidecar_path(ucdb_path):
+    ucdb_path = Path(ucdb_path)
+    return ucdb_path.with_name(ucdb_path.name + SIDECAR_SUFFIX)
+
+def ucdb_stamp(ucdb_path):
+    """Return (size, mtime_ns) of a UCDB, or None if it cannot be read."""
+    try:
+        st = os.stat(ucdb_path)
+    except OSError:
+        return None
+    return (st.st_size, st.st_mtime_ns)
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def load_sidecar(ucdb_path, stamp):
+    """Return the cached {name: data} of a UCDB, or {} when its sidecar is missing or stale."""
+    path = sidecar_path(ucdb_path)
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            entry = json.load(f)
+    except (OSError, ValueError, EOFError):
+        return {}
+    if entry.get('version') != CACHE_VERSION or entry.get('size') != stamp[0]:
+        return {}
+    if entry.get('mtime_ns') != stamp[1]:
+        try:
+            if file_hash(ucdb_path) != entry.get('sha256'):
+                return {}
+        except OSError:
+            return {}
+        # Same content under a new mtime: record it so the next load skips the hash
+        entry['mtime_ns'] = stamp[1]
+        write_sidecar(path, entry)
+    else:
+        try:
+            # A hit refreshes the sidecar's access time for LRU eviction
+            os.utime(path)
+        except OSError:
+            pass
+    return entry['reports']
+
+def save_sidecar(ucdb_path, stamp, reports, max_mb=CACHE_MAX_MB):
+    """Store parsed views of a UCDB (merged with any already cached) and enforce the size cap."""
+    try:
+        entry = {
+            'version': CACHE_VERSION,
+            'size': stamp[0],
+            'mtime_ns': stamp[1],
+            'sha256': file_hash(ucdb_path),
+            'reports': reports,
+        }
+    except OSError:
+        return False
+    if not write_sidecar(sidecar_path(ucdb_path), entry):
+        return False
+    evict_sidecars(Path(ucdb_path).parent, max_mb, keep=sidecar_path(ucdb_path))
+    return True
+
+def write_sidecar(path, entry):
+    # Written beside its final name so readers never see half of it
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=6) as f:
+            json.dump(entry, f, separators=(',', ':'))
+        tmp_path.replace(path)
+    except OSError as e:
+        print(f"[!] Could not cache parsed coverage in {path}: {e}")
+        tmp_path.unlink(missing_ok=True)
+        return False
+    return True
+
+def evict_sidecars(directory, max_mb=CACHE_MAX_MB, keep=None):
+    """Remove sidecars of deleted UCDBs, then least recently used ones until the rest fit in max_mb.
+
+    Returns the number of sidecars removed.
+    """
+    entries = []
+    removed = 0
+    for path in Path(directory).glob('*' + SIDECAR_SUFFIX):
+        try:
+            if not path.with_name(path.name[:-len(SIDECAR_SUFFIX)]).exists():
+                path.unlink()
+                removed += 1
+                continue
+            st = path.stat()
+        except OSError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    max_bytes = max_mb * 1024 * 1024
+    for _, size, path in sorted(entries, key=lambda e: e[0]):
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        path.unlink(missing_ok=True)
+        total -= size
+        removed += 1
+    return removed
+
+# --- Report line tokenizer ---
+# Each line is classified once: by its first word through TOKEN_KINDS, or
+# as an uncovered (***0***) row, and a single precompiled pattern pulls out
+# all of its fields.
+METRICS = ('Assertions', 'Branches', 'Conditions', 'Expressions', 'Statements', 'Toggles')
+SECTIONS = {'Branch': 'branches', 'Condition': 'conditions', 'Statement': 'statements', 'Toggle': 'toggles'}
+SECTION_HEADERS = tuple(f"{word} Coverage" for word in SECTIONS)
+TOKEN_KINDS = dict.fromkeys(METRICS, 'metric')
+TOKEN_KINDS.update(dict.fromkeys(SECTIONS, 'section'))
+TOKEN_KINDS.update({
+    'Covergroups': 'covergroups',
+    'Total': 'total',
+    'File': 'file',
+    'TYPE': 'covergroup',
+    'Coverpoint': 'coverpoint',
+    'Cross': 'cross',
+    'bin': 'bin',
+    '===': 'header',
+})
+# First words of the lines each view uses, and their first characters:
+# iter_tokens() drops every other line without tokenizing it
+VIEW_KEYWORDS = {
+    'summary': METRICS + ('Covergroups', 'Total'),
+    'dut': METRICS + ('Total',),
+    'uncovered': SECTION_HEADERS + ('File',),
+    'functional': ('TYPE', 'Coverpoint', 'Cross', 'bin'),
+}
+VIEW_INITIALS = {view: frozenset(word[0] for word in words) for view, words in VIEW_KEYWORDS.items()}
+ZERO_MARK = '***0***'
+
+#     Toggles                        124       117         7    94.35%
+RE_METRIC = re.compile(r'\s*(\w+)\D*?(\d+)\D+(\d+).*?(\d+\.\d+)%')
+RE_PCT = re.compile(r'(\d+\.\d+)%')
+#   File verification/interfaces/CpmStreamIf.sv
+RE_FILE = re.compile(r'\s*File\s+(.+)')
+#  TYPE /CpmTestPkg/CpmPacketCoverage/cg_packet          80.00%        100          -    Uncovered
+RE_TYPE = re.compile(r'\s*TYPE\s+(\S*?(cg_\w+)\S*)(?:.*?(\d+\.\d+)%)?')
+#     Coverpoint cp_mode                                100.00%        100          -    Covered
+RE_POINT = re.compile(r'\s*(?:Coverpoint|Cross)\s+(cp_\w+)(?:.*?(\d+\.\d+)%)?')
+#     106                                  ***0***     Count coming in to IF
+RE_NUMBER = re.compile(r'\d+')
+# === Instance: /tb_top/dut   /   === Design Unit: work.cpm
+RE_HEADER = re.compile(r'\s*=== (Instance|Design Unit):\s+(\S+)')
+
+def tokenize(line):
+    """Classify one report line.
+
+    Returns (kind, fields...) or None for lines no parser uses:
+        ('metric', name, total, covered, pct)     ('covergroups', pct)
+        ('total', line)                            ('section', key)
+        ('file', path)                             ('zero', line number, detail)
+        ('covergroup', path, name, pct)            ('coverpoint' | 'cross', name, pct, status)
+        ('bin', name, hits)                        ('instance', path)    ('design_unit', name)
+    """
+    stripped = line.lstrip()
+    word = stripped.partition(' ')[0]
+    kind = TOKEN_KINDS.get(word)
+    # Bins are most of the lines the functional view keeps; split, no regex:
+    #         bin opcode[5]                                      46          1          -    Covered
+    if kind == 'bin':
+        fields = stripped.split(None, 3)
+        if len(fields) < 3 or not fields[2].isdigit():
+            return None
+        return ('bin', fields[1], int(fields[2]))
+    if kind == 'section' and stripped.startswith(SECTION_HEADERS):
+        return ('section', SECTIONS[word])
+    if kind is None or kind == 'section':
+        if ZERO_MARK in line:
+            number = RE_NUMBER.search(line)
+            return ('zero', number.group(0) if number else None, stripped.rstrip())
+        return None
+    if kind == 'metric':
+        match = RE_METRIC.match(line)
+        if match is None or 'totals' in line.lower():
+            return None
+        return ('metric', match.group(1), int(match.group(2)), int(match.group(3)), float(match.group(4)))
+    if kind == 'covergroups':
+        match = RE_PCT.search(line)
+        return ('covergroups', float(match.group(1))) if match else None
+    if kind == 'total':
+        return ('total', line)
+    if kind == 'file':
+        match = RE_FILE.match(line)
+        return ('file', match.group(1).strip()) if match else None
+    if kind == 'covergroup':
+        match = RE_TYPE.match(line)
+        if match is None:
+            return None
+        return ('covergroup', match.group(1), match.group(2), float(match.group(3)) if match.group(3) else 0)
+    if kind == 'header':
+        match = RE_HEADER.match(line)
+        if match is None:
+            return None
+        return ('instance' if match.group(1) == 'Instance' else 'design_unit', match.group(2))
+    match = RE_POINT.match(line)
+    if match is None:
+        return None
+    return (kind, match.group(1), float(match.group(2)) if match.group(2) else 0,
+            'Covered' if 'Covered' in line else 'Uncovered')
+
+def iter_tokens(lines, view, zeros=False):
+    """Tokens of the lines that start with one of VIEW_KEYWORDS[view].
+
+    Most lines are rejected on their first character alone, before any
+    prefix or regex work. With zeros, '***0***' lines (which start with a
+    line number or signal name) are tokenized too.
+    """
+    keywords = VIEW_KEYWORDS[view]
+    initials = VIEW_INITIALS[view]
+    for line in lines:
+        stripped = line.lstrip()
+        if (stripped[:1] in initials and stripped.startswith(keywords)) or (zeros and ZERO_MARK in stripped):
+            token = tokenize(stripped)
+            if token is not None:
+                yield token
 
 def get_coverage_summary(ucdb_path):
     """Extract overall coverage summary."""
-    output = run_vcover(['report', '-summary', str(ucdb_path)])
-    
+    return parse_report('summary', iter_vcover(REPORTS['summary'] + [str(ucdb_path)]))
+
+def parse_coverage_summary(lines):
+    """Parse `vcover report -summary` output lines."""
     data = {
         'assertions': {'covered': 0, 'total': 0, 'pct': 0},
         'branches': {'covered': 0, 'total': 0, 'pct': 0},
@@ -33,24 +359,14 @@ def get_coverage_summary(ucdb_path):
         'total': 0
     }
     
-    for line in output.split('\n'):
-        for metric in ['Assertions', 'Branches', 'Conditions', 'Expressions', 'Statements', 'Toggles']:
-            if metric in line and 'totals' not in line.lower():
-                nums = re.findall(r'(\d+)', line)
-                pct_match = re.search(r'(\d+\.\d+)%', line)
-                if len(nums) >= 2 and pct_match:
-                    key = metric.lower()
-                    data[key] = {
-                        'total': int(nums[0]),
-                        'covered': int(nums[1]),
-                        'pct': float(pct_match.group(1))
-                    }
-        if 'Covergroups' in line:
-            pct_match = re.search(r'(\d+\.\d+)%', line)
-            if pct_match:
-                data['covergroups']['pct'] = float(pct_match.group(1))
-        if 'Total coverage' in line:
-            pct_match = re.search(r'(\d+\.\d+)%', line)
+    for token in iter_tokens(lines, 'summary'):
+        kind = token[0]
+        if kind == 'metric':
+            data[token[1].lower()] = {'total': token[2], 'covered': token[3], 'pct': token[4]}
+        elif kind == 'covergroups':
+            data['covergroups']['pct'] = token[1]
+        elif kind == 'total' and 'Total coverage' in token[1]:
+            pct_match = RE_PCT.search(token[1])
             if pct_match:
                 data['total'] = float(pct_match.group(1))
     
@@ -58,8 +374,10 @@ def get_coverage_summary(ucdb_path):
 
 def get_dut_coverage(ucdb_path):
     """Extract DUT-specific coverage."""
-    output = run_vcover(['report', '-summary', '-du=cpm', str(ucdb_path)])
-    
+    return parse_report('dut', iter_vcover(REPORTS['dut'] + [str(ucdb_path)]))
+
+def parse_dut_coverage(lines):
+    """Parse `vcover report -summary -du=cpm` output lines."""
     data = {
         'branches': {'covered': 0, 'total': 0, 'pct': 0},
         'conditions': {'covered': 0, 'total': 0, 'pct': 0},
@@ -69,20 +387,12 @@ def get_dut_coverage(ucdb_path):
         'total': 0
     }
     
-    for line in output.split('\n'):
-        for metric in ['Branches', 'Conditions', 'Expressions', 'Statements', 'Toggles']:
-            if metric in line and 'totals' not in line.lower():
-                nums = re.findall(r'(\d+)', line)
-                pct_match = re.search(r'(\d+\.\d+)%', line)
-                if len(nums) >= 2 and pct_match:
-                    key = metric.lower()
-                    data[key] = {
-                        'total': int(nums[0]),
-                        'covered': int(nums[1]),
-                        'pct': float(pct_match.group(1))
-                    }
-        if 'Total Coverage By Design Unit' in line:
-            pct_match = re.search(r'(\d+\.\d+)%', line)
+    for token in iter_tokens(lines, 'dut'):
+        kind = token[0]
+        if kind == 'metric' and token[1] != 'Assertions':
+            data[token[1].lower()] = {'total': token[2], 'covered': token[3], 'pct': token[4]}
+        elif kind == 'total' and 'Total Coverage By Design Unit' in token[1]:
+            pct_match = RE_PCT.search(token[1])
             if pct_match:
                 data['total'] = float(pct_match.group(1))
     
@@ -90,8 +400,10 @@ def get_dut_coverage(ucdb_path):
 
 def get_uncovered_items(ucdb_path):
     """Extract uncovered items for detailed view."""
-    output = run_vcover(['report', '-zeros', '-details', '-du=cpm', str(ucdb_path)])
-    
+    return parse_report('uncovered', iter_vcover(REPORTS['uncovered'] + [str(ucdb_path)]))
+
+def parse_uncovered_items(lines):
+    """Parse `vcover report -zeros -details -du=cpm` output lines."""
     uncovered = {
         'branches': [],
         'conditions': [],
@@ -102,34 +414,28 @@ def get_uncovered_items(ucdb_path):
     current_section = None
     current_file = None
     
-    for line in output.split('\n'):
-        if 'Branch Coverage' in line:
-            current_section = 'branches'
-        elif 'Condition Coverage' in line:
-            current_section = 'conditions'
-        elif 'Statement Coverage' in line:
-            current_section = 'statements'
-        elif 'Toggle Coverage' in line:
-            current_section = 'toggles'
-        elif 'File ' in line:
-            file_match = re.search(r'File\s+(.+)', line)
-            if file_match:
-                current_file = file_match.group(1).strip()
-        elif '***0***' in line and current_section:
-            line_match = re.search(r'(\d+)', line)
-            if line_match and current_file:
+    for token in iter_tokens(lines, 'uncovered', zeros=True):
+        kind = token[0]
+        if kind == 'section':
+            current_section = token[1]
+        elif kind == 'file':
+            current_file = token[1]
+        elif kind == 'zero' and current_section:
+            if token[1] and current_file:
                 uncovered[current_section].append({
                     'file': current_file,
-                    'line': line_match.group(1),
-                    'detail': line.strip()
+                    'line': token[1],
+                    'detail': token[2]
                 })
     
     return uncovered
 
 def get_functional_coverage(ucdb_path):
     """Extract functional coverage details."""
-    output = run_vcover(['report', '-cvg', '-details', str(ucdb_path)])
-    
+    return parse_report('functional', iter_vcover(REPORTS['functional'] + [str(ucdb_path)]))
+
+def parse_functional_coverage(lines):
+    """Parse `vcover report -cvg -details` output lines."""
     # Use dict to deduplicate covergroups by full path
     covergroups_dict = {}
     current_cg = None
@@ -137,79 +443,182 @@ def get_functional_coverage(ucdb_path):
     
     skip_until_next_cg = False
     
-    for line in output.split('\n'):
+    for token in iter_tokens(lines, 'functional'):
+        kind = token[0]
         # Match covergroup definition (TYPE line)
-        if 'TYPE' in line and 'cg_' in line:
-            # Extract full path to use as unique key
-            path_match = re.search(r'TYPE\s+(\S+)', line)
-            name_match = re.search(r'(cg_\w+)', line)
-            pct_match = re.search(r'(\d+\.\d+)%', line)
-            if name_match and path_match:
-                full_path = path_match.group(1)
-                # Skip if we already have this covergroup
-                if full_path in covergroups_dict:
-                    current_cg = None
-                    current_cp = None
-                    skip_until_next_cg = True
-                    continue
-                
-                skip_until_next_cg = False
-                current_cg = {
-                    'name': name_match.group(1),
-                    'pct': float(pct_match.group(1)) if pct_match else 0,
-                    'coverpoints': []
-                }
-                covergroups_dict[full_path] = current_cg
+        if kind == 'covergroup':
+            _, full_path, name, pct = token
+            # Skip if we already have this covergroup
+            if full_path in covergroups_dict:
+                current_cg = None
                 current_cp = None
+                skip_until_next_cg = True
+                continue
+            
+            skip_until_next_cg = False
+            current_cg = {
+                'name': name,
+                'pct': pct,
+                'coverpoints': []
+            }
+            covergroups_dict[full_path] = current_cg
+            current_cp = None
         
         # Skip all content until we hit a new covergroup
-        if skip_until_next_cg:
+        elif skip_until_next_cg:
             continue
         
-        # Match coverpoint (starts with "Coverpoint cp_")
-        elif current_cg and line.strip().startswith('Coverpoint cp_'):
-            name_match = re.search(r'Coverpoint\s+(cp_\w+)', line)
-            pct_match = re.search(r'(\d+\.\d+)%', line)
-            status = 'Covered' if 'Covered' in line else 'Uncovered'
-            if name_match:
-                current_cp = {
-                    'name': name_match.group(1),
-                    'pct': float(pct_match.group(1)) if pct_match else 0,
-                    'status': status,
-                    'bins': []
-                }
-                current_cg['coverpoints'].append(current_cp)
-        
-        # Match cross coverage
-        elif current_cg and line.strip().startswith('Cross cp_'):
-            name_match = re.search(r'Cross\s+(cp_\w+)', line)
-            pct_match = re.search(r'(\d+\.\d+)%', line)
-            status = 'Covered' if 'Covered' in line else 'Uncovered'
-            if name_match:
-                current_cp = {
-                    'name': name_match.group(1),
-                    'pct': float(pct_match.group(1)) if pct_match else 0,
-                    'status': status,
-                    'bins': [],
-                    'is_cross': True
-                }
-                current_cg['coverpoints'].append(current_cp)
+        # Match coverpoint / cross coverage
+        elif current_cg and kind in ('coverpoint', 'cross'):
+            _, name, pct, status = token
+            current_cp = {
+                'name': name,
+                'pct': pct,
+                'status': status,
+                'bins': []
+            }
+            if kind == 'cross':
+                current_cp['is_cross'] = True
+            current_cg['coverpoints'].append(current_cp)
         
         # Match individual bins
-        elif current_cp and line.strip().startswith('bin '):
-            bin_match = re.search(r'bin\s+(\S+)\s+(\d+)', line)
-            if bin_match:
-                hits = int(bin_match.group(2))
-                status = 'ZERO' if hits == 0 else 'Covered'
-                current_cp['bins'].append({
-                    'name': bin_match.group(1),
-                    'hits': hits,
-                    'status': status
-                })
+        elif current_cp and kind == 'bin':
+            _, name, hits = token
+            current_cp['bins'].append({
+                'name': name,
+                'hits': hits,
+                'status': 'ZERO' if hits == 0 else 'Covered'
+            })
     
     # Return unique covergroups as list
     return list(covergroups_dict.values())
 
+# Parser of each of the REPORTS
+PARSERS = {
+    'summary': parse_coverage_summary,
+    'dut': parse_dut_coverage,
+    'uncovered': parse_uncovered_items,
+    'functional': parse_functional_coverage,
+}
+
+# --- Offline mode: saved text reports ---
+# The views are parsed from text reports saved earlier, by the same parsers,
+# so the HTML can be rendered where there is no vcover or license. A
+# directory holds one <view>.txt per REPORTS entry (--save-reports writes
+# them) and gives the same HTML as the live run. Any other file is taken as
+# an instance report (e.g. `vcover report -details` or `-assert -details`):
+# the DUT views come from the instances of the -du design unit, and the
+# summary adds up every instance's bins as vcover -summary does.
+DUT_UNIT = next(arg.partition('=')[2] for arg in REPORTS['dut'] if arg.startswith('-du='))
+
+def split_instances(lines):
+    """Split an instance report into [(instance, design unit, lines)].
+
+    Lines before the first instance header and the report's closing
+    'Total Coverage' line go in blocks of instance None.
+    """
+    blocks = [(None, None, [])]
+    for line in lines:
+        token = tokenize(line)
+        kind = token[0] if token else None
+        if kind == 'instance':
+            blocks.append((token[1], None, []))
+        elif kind == 'design_unit':
+            blocks[-1] = (blocks[-1][0], token[1], blocks[-1][2])
+        elif kind == 'total' and 'Total Coverage' in line:
+            blocks.append((None, None, [line]))
+        else:
+            blocks[-1][2].append(line)
+    return blocks
+
+def truncate_pct(covered, total):
+    # vcover truncates percentages to two decimals (8 of 9 is 88.88%)
+    return int(10000 * covered / total) / 100.0 if total else 0
+
+def summarize_instances(blocks):
+    """Coverage summary of instance blocks: each metric's bins summed over the instances.
+
+    An instance found in several reports counts once. The total is the
+    'Total Coverage' line of the report with the most instances (e.g. not
+    that of an assertion-only report), else the mean of the metric
+    percentages, which is how vcover totals them.
+    """
+    summary = parse_coverage_summary([])
+    instances = {}
+    report_total = None
+    count = 0
+    for instance, _, lines in blocks:
+        if instance is None:
+            for line in lines:
+                match = RE_PCT.search(line) if 'Total Coverage' in line else None
+                if match:
+                    if report_total is None or count > report_total[0]:
+                        report_total = (count, float(match.group(1)))
+                    count = 0
+            continue
+        count += 1
+        merged = instances.setdefault(instance, {})
+        for key, value in parse_coverage_summary(lines).items():
+            if isinstance(value, dict) and (value.get('total') or value['pct']):
+                merged[key] = value
+    pcts = []
+    for merged in instances.values():
+        for key, value in merged.items():
+            if key == 'covergroups':
+                summary[key]['pct'] = max(summary[key]['pct'], value['pct'])
+            else:
+                summary[key]['total'] += value['total']
+                summary[key]['covered'] += value['covered']
+    for key, value in summary.items():
+        if key == 'covergroups' and value['pct']:
+            pcts.append(value['pct'])
+        elif isinstance(value, dict) and value.get('total'):
+            value['pct'] = truncate_pct(value['covered'], value['total'])
+            pcts.append(value['pct'])
+    if report_total is not None:
+        summary['total'] = report_total[1]
+    elif pcts:
+        summary['total'] = truncate_pct(sum(pcts), 100 * len(pcts))
+    return summary
+
+def read_text_reports(paths):
+    """Parse saved text reports (directories of <view>.txt or instance reports) into {view: data}."""
+    views = {}
+    blocks = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            for name in REPORTS:
+                view_path = path / f"{name}.txt"
+                if name not in views and view_path.is_file():
+                    with open(view_path, 'r', encoding='utf-8', errors='replace') as f:
+                        views[name] = parse_report(name, (line.rstrip('\n') for line in f))
+                    print(f"[*] {name:<11} {view_path}")
+        else:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                blocks.extend(split_instances(line.rstrip('\n') for line in f))
+            print(f"[*] {'instances':<11} {path}")
+
+    dut_blocks = [b for b in blocks if b[1] and b[1].rpartition('.')[2] == DUT_UNIT]
+    dut_lines = [line for _, _, lines in dut_blocks for line in lines]
+    for name in REPORTS:
+        if name in views:
+            continue
+        if not blocks:
+            print(f"[!] No {name} report given; that part of the report is empty")
+            views[name] = parse_report(name, [])
+        elif name == 'summary':
+            views[name] = summarize_instances(blocks)
+        elif name == 'dut':
+            summary = summarize_instances(dut_blocks)
+            views[name] = {key: summary[key] for key in parse_dut_coverage([])}
+        elif name == 'uncovered':
+            views[name] = parse_report(name, dut_lines)
+        else:
+            views[name] = parse_report(name, (line for _, _, lines in blocks for line in lines))
+    if blocks and not dut_blocks:
+        print(f"[!] No instance of design unit {DUT_UNIT} in the instance reports")
+    return views
+
 def generate_html_report(overall, dut, uncovered, func_cov, output_path, test_name="All Tests"):
     """Generate a comprehensive light-theme HTML report."""
     
@@ -1230,29 +1639,66 @@ def generate_uncovered_table(items):
                     </table>'''
 
 def main():
+    parser = argparse.ArgumentParser(description="Generate the modern HTML coverage report")
+    parser.add_argument('--reports', nargs='+', type=Path, metavar='PATH',
+                        help="Render from saved text reports instead of running vcover: directories of "
+                             "<view>.txt (from --save-reports) and/or instance reports (vcover report -details).")
+    parser.add_argument('--save-reports', type=Path, metavar='DIR',
+                        help="Also save the text of each vcover report in DIR, for --reports on another host.")
+    parser.add_argument('--ucdb', type=Path,
+                        help="UCDB to report (default: coverage/merged.ucdb, else coverage/CpmMainTest.ucdb).")
+    parser.add_argument('--output', '-o', type=Path, help="HTML file to write (default: coverage/modern_report.html).")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Always run vcover; do not read or write the parsed-coverage sidecar.")
+    parser.add_argument('--cache-size', type=int, default=CACHE_MAX_MB,
+                        help="Cap in MB on the sidecars in a coverage directory (least recently used go first).")
+    args = parser.parse_args()
+    if args.reports and (args.save_reports or args.ucdb):
+        parser.error("--save-reports and --ucdb need vcover; they cannot be combined with --reports")
+
     project_root = Path(__file__).parent.parent
     coverage_dir = project_root / "coverage"
+    output_path = args.output or coverage_dir / "modern_report.html"
+
+    if args.reports:
+        missing = [str(p) for p in args.reports if not p.exists()]
+        if missing:
+            print(f"[!] Report not found: {', '.join(missing)}")
+            return 1
+        print(f"[*] Reading saved text reports (no vcover)")
+        views = read_text_reports(args.reports)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        generate_html_report(views['summary'], views['dut'], views['uncovered'], views['functional'],
+                             output_path, "Merged Tests")
+        print(f"\n[+] Open in browser: {output_path}")
+        return
     
     # Use merged UCDB if available
-    ucdb_path = coverage_dir / "merged.ucdb"
-    if not ucdb_path.exists():
+    ucdb_path = args.ucdb or coverage_dir / "merged.ucdb"
+    if not ucdb_path.exists() and not args.ucdb:
         ucdb_path = coverage_dir / "CpmMainTest.ucdb"
     
     if not ucdb_path.exists():
-        print("[!] No coverage database found. Run tests with --coverage-report first.")
-        return
+        print(f"[!] No coverage database found ({ucdb_path}). Run tests with --coverage-report first.")
+        return 1
     
     print(f"[*] Reading coverage data from: {ucdb_path}")
     
-    overall = get_coverage_summary(ucdb_path)
-    dut = get_dut_coverage(ucdb_path)
-    uncovered = get_uncovered_items(ucdb_path)
-    func_cov = get_functional_coverage(ucdb_path)
+    # The four vcover reports run side by side, unless the sidecar already has them
+    try:
+        overall, dut, uncovered, func_cov = extract_coverage(ucdb_path, not args.no_cache, args.cache_size,
+                                                             args.save_reports)
+    except RuntimeError as e:
+        print(f"[!] {e}")
+        return 1
+    if args.save_reports:
+        print(f"[+] Text reports saved in: {args.save_reports}")
     
-    output_path = coverage_dir / "modern_report.html"
-    generate_html_report(overall, dut, uncovered, func_cov, output_path, "Merged Tests")
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    generate_html_report(overall, dut, uncovered, func_cov, output_path,
+                         args.ucdb.stem if args.ucdb else "Merged Tests")
     
     print(f"\n[+] Open in browser: {output_path}")
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Coverage Report Parser Micro-Benchmark
+Times each generate_coverage_report.py report parser (prefix filter,
+tokenizer and parse) over a saved vcover text report, and prints the cost
+per line.
+
+The report is read into memory once, so only parsing is timed (no vcover,
+no disk). Every parser is fed the whole file, so most lines are ones its
+view rejects.
+
+Usage:
+    python parser_benchmark.py
+    python parser_benchmark.py --report my_coverage.txt --repeat 20
+
+Author: Assaf Afriat
+Date: 2026-10-16
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from generate_coverage_report import PARSERS
+
+PROJECT_ROOT = Path(__file__).parent.parent.resolve()
+DEFAULT_REPORT = PROJECT_ROOT / "deliverables" / "Coverage ans SVA report" / "CpmMainTest_coverage.txt"
+
+
+def best_time(func, lines, repeat):
+    """Fastest of repeat runs of func(lines), in seconds."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(lines)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the coverage report parsers per line")
+    parser.add_argument('--report', type=Path, default=DEFAULT_REPORT, help="vcover text report to parse.")
+    parser.add_argument('--repeat', type=int, default=10, help="Runs per parser; the fastest is reported.")
+    args = parser.parse_args()
+
+    if not args.report.exists():
+        print(f"[!] Report not found: {args.report}")
+        return 1
+    with open(args.report, 'r', encoding='utf-8', errors='replace') as f:
+        lines = [line.rstrip('\n') for line in f]
+    if not lines:
+        print(f"[!] Report is empty: {args.report}")
+        return 1
+
+    print(f"[*] {args.report.name}: {len(lines)} lines, best of {args.repeat}")
+    print(f"    {'Parser':<12}{'Total ms':>10}{'us/line':>10}")
+    for name, func in PARSERS.items():
+        seconds = best_time(func, lines, max(1, args.repeat))
+        print(f"    {name:<12}{seconds * 1e3:>10.2f}{seconds * 1e6 / len(lines):>10.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
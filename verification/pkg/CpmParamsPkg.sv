@@ -87,6 +87,11 @@ package CpmParamsPkg;
     // ============================================================================
     parameter int CPM_PIPELINE_DEPTH = 2;  // 2-slot pipeline buffer
 
+    // ============================================================================
+    // Clock
+    // ============================================================================
+    parameter int CPM_CLK_PERIOD_NS = 10;  // 100MHz (tb_top clock)
+
     // ============================================================================
     // Coverage Targets (MANDATORY)
     // ============================================================================
@@ -108,6 +113,8 @@ package CpmParamsPkg;
     parameter string EVT_TRAFFIC_COMPLETE   = "cpm_traffic_complete";    // Virtual sequence finished sending traffic
     parameter string EVT_DRAIN_TIMEOUT_MS   = "cpm_drain_timeout";       // Timeout value for drain operations (10ms default)
     parameter string EVT_SOFT_RESET         = "cpm_soft_reset";          // DUT soft reset triggered (clears pipeline)
+    parameter string EVT_POST_CONFIG        = "cpm_post_config";         // Reset + RAL configuration done (checkpoint point)
+    parameter string EVT_RESUME_TRAFFIC     = "cpm_resume_traffic";      // Checkpoint taken/restored, traffic may start
 
     // Default timeout for event waits (in simulation time units, assuming 1ns timescale)
     // 1ms is sufficient for pipeline drain; event-based sync handles normal cases
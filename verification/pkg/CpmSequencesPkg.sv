@@ -30,5 +30,6 @@ package CpmSequencesPkg;
     
     // Virtual Sequences
     `include "sequences/virtual/CpmTopVirtualSeq.sv"
+    `include "sequences/virtual/CpmBenchVirtualSeq.sv"
 
 endpackage : CpmSequencesPkg
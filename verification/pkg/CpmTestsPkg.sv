@@ -27,5 +27,6 @@ package CpmTestsPkg;
     `include "tests/CpmMainTest.sv"
     `include "tests/CpmRalResetTest.sv"
     `include "tests/CpmSmokeTest.sv"
+    `include "tests/CpmBenchTest.sv"
 
 endpackage : CpmTestsPkg
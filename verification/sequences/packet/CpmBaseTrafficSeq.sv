@@ -18,6 +18,9 @@ class CpmBaseTrafficSeq extends uvm_sequence #(CpmPacketTxn);
     // ============================================================================
     int m_num_packets = 100;
 
+    // Running hash of the packets sent, so runs can tell their traffic apart
+    bit [31:0] m_signature;
+
     // ============================================================================
     // Constructor
     // ============================================================================
@@ -34,6 +37,7 @@ class CpmBaseTrafficSeq extends uvm_sequence #(CpmPacketTxn);
             txn = CpmPacketTxn::type_id::create("txn");
             start_item(txn);
             assert(txn.randomize());
+            m_signature = {m_signature[26:0], m_signature[31:27]} ^ {txn.m_id, txn.m_opcode, txn.m_payload};
             finish_item(txn);
         end
     endtask
@@ -0,0 +1,49 @@
+/**
+ * @file CpmBenchVirtualSeq.sv
+ * @brief CPM Benchmark Virtual Sequence
+ *
+ * Throughput benchmark flow: reset, configure one MODE (drop on or off),
+ * then a single CpmStressSeq of m_num_stress_packets and a drain.
+ * Reports the simulated cycles with a [BENCH] message for benchmark.py.
+ *
+ * @author Assaf Afriat
+ * @date 2026-10-16
+ */
+
+class CpmBenchVirtualSeq extends CpmTopVirtualSeq;
+
+    `uvm_object_utils(CpmBenchVirtualSeq)
+
+    // ============================================================================
+    // Constructor
+    // ============================================================================
+    function new(string name = "CpmBenchVirtualSeq");
+        super.new(name);
+    endfunction
+
+    // ============================================================================
+    // body
+    // 1. Reset
+    // 2. Configure (MODE, drop enable via RAL)
+    // 3. Stress (m_num_stress_packets back-to-back)
+    // 4. Drain
+    // ============================================================================
+    virtual task body();
+        time traffic_start;
+
+        `uvm_info("VIRT_SEQ", "Starting benchmark virtual sequence", UVM_MEDIUM)
+
+        do_reset();
+        do_configure();
+
+        traffic_start = $time;
+        do_stress();
+        do_drain();
+
+        `uvm_info("BENCH", $sformatf(
+            "packets=%0d mode=%s drop=%0b cycles=%0d traffic_cycles=%0d",
+            m_num_stress_packets, m_initial_mode.name(), m_initial_drop_en,
+            $time / CPM_CLK_PERIOD_NS, ($time - traffic_start) / CPM_CLK_PERIOD_NS), UVM_LOW)
+    endtask
+
+endclass : CpmBenchVirtualSeq
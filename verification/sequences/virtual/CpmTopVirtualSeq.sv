@@ -32,6 +32,7 @@ class CpmTopVirtualSeq extends uvm_sequence;
     cpm_mode_e m_initial_mode = CPM_MODE_XOR;
     bit [15:0] m_initial_mask = 16'hAAAA;
     bit [15:0] m_initial_add_const = 16'h1234;
+    bit m_initial_drop_en = 1'b0;
     bit [3:0] m_drop_opcode = 4'h5;
 
     // ============================================================================
@@ -62,6 +63,9 @@ class CpmTopVirtualSeq extends uvm_sequence;
         // 2. Configure (via RAL)
         do_configure();
 
+        // Optional checkpoint point (+CPM_CHECKPOINT)
+        do_checkpoint();
+
         // 3. Traffic
         do_traffic();
 
@@ -118,17 +122,44 @@ class CpmTopVirtualSeq extends uvm_sequence;
         config_seq.m_mode = m_initial_mode;
         config_seq.m_mask = m_initial_mask;
         config_seq.m_add_const = m_initial_add_const;
-        config_seq.m_drop_en = 1'b0;
-        config_seq.m_drop_opcode = 4'h0;
+        config_seq.m_drop_en = m_initial_drop_en;
+        config_seq.m_drop_opcode = m_initial_drop_en ? m_drop_opcode : 4'h0;
         config_seq.start(m_reg_seqr);
     endtask
 
+    virtual task do_checkpoint();
+        uvm_event resume_event;
+        int unsigned seed;
+        if (!$test$plusargs("CPM_CHECKPOINT")) return;
+
+        // tb_top stops the simulation for the checkpoint, then resumes us
+        resume_event = uvm_event_pool::get_global_pool().get(EVT_RESUME_TRAFFIC);
+        uvm_event_pool::get_global_pool().get(EVT_POST_CONFIG).trigger();
+        resume_event.wait_trigger();
+
+        // Reseed so each restored run gets its own traffic. Items are reseeded
+        // by start_item() (uvm_object::reseed) from uvm_global_random_seed plus
+        // their name, not from this thread, and the checkpoint froze both the
+        // global seed and the per-name seed table; replace the one and clear
+        // the other, or every restored seed replays the same packets.
+        if (uvm_config_db#(int unsigned)::get(null, "", "traffic_seed", seed) && seed != 0) begin
+            uvm_pkg::uvm_global_random_seed = seed;
+            uvm_pkg::uvm_random_seed_table_lookup.delete();
+            process::self().srandom(seed);
+            this.srandom(seed);
+            `uvm_info("VIRT_SEQ", $sformatf("Traffic reseeded with %0d", seed), UVM_MEDIUM)
+        end
+    endtask
+
     virtual task do_traffic();
         CpmBaseTrafficSeq traffic_seq;
         `uvm_info("VIRT_SEQ", "Step 3: Traffic", UVM_MEDIUM)
         traffic_seq = CpmBaseTrafficSeq::type_id::create("traffic_seq");
         traffic_seq.m_num_packets = m_num_traffic_packets;
         traffic_seq.start(m_packet_seqr);
+        // Restored seeds must drive different traffic; the run script compares this
+        `uvm_info("TRAFFIC", $sformatf("Traffic signature %08h (%0d packets)",
+            traffic_seq.m_signature, traffic_seq.m_num_packets), UVM_MEDIUM)
     endtask
 
     virtual task do_reconfigure();
@@ -160,6 +191,8 @@ class CpmTopVirtualSeq extends uvm_sequence;
     virtual task do_stress();
         CpmStressSeq stress_seq;
         `uvm_info("VIRT_SEQ", "Step 5: Stress", UVM_MEDIUM)
+        // +CPM_STRESS_PACKETS=<n> overrides the test's stress size (run.py --stress-packets / --shards)
+        void'($value$plusargs("CPM_STRESS_PACKETS=%d", m_num_stress_packets));
         stress_seq = CpmStressSeq::type_id::create("stress_seq");
         stress_seq.m_num_packets = m_num_stress_packets;
         stress_seq.start(m_packet_seqr);
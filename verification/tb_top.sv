@@ -30,7 +30,7 @@ module tb_top;
     // Clock generation
     initial begin
         clk = 0;
-        forever #5 clk = ~clk; // 100MHz
+        forever #(CPM_CLK_PERIOD_NS / 2) clk = ~clk; // 100MHz
     end
 
     // Reset generation
@@ -134,10 +134,34 @@ module tb_top;
     );
 
 
+    // ============================================================================
+    // Post-Configuration Checkpoint (+CPM_CHECKPOINT)
+    // The virtual sequence triggers EVT_POST_CONFIG once reset and RAL
+    // configuration are done. The simulation stops there so the run script
+    // can save a checkpoint; runs restored from it set traffic_seed (Tcl
+    // 'change') before continuing, and the traffic is reseeded with it.
+    // ============================================================================
+    int unsigned traffic_seed = 0;
+
+    initial begin
+        if ($test$plusargs("CPM_CHECKPOINT")) begin
+            uvm_event_pool::get_global_pool().get(EVT_POST_CONFIG).wait_trigger();
+            `uvm_info("CHECKPOINT", $sformatf("[TB_TOP] Post-configuration checkpoint at time %0t", $time), UVM_MEDIUM);
+            $stop;
+            `uvm_info("CHECKPOINT", $sformatf("[TB_TOP] Resuming with traffic seed %0d", traffic_seed), UVM_MEDIUM);
+            uvm_config_db#(int unsigned)::set(null, "*", "traffic_seed", traffic_seed);
+            uvm_event_pool::get_global_pool().get(EVT_RESUME_TRAFFIC).trigger();
+        end
+    end
+
     // ============================================================================
     // UVM Test
     // ============================================================================
     initial begin
+        // UVM prints report times with %0t, which is otherwise in the
+        // simulation precision (1ps); print them in ns with the unit so
+        // the run scripts read the times correctly (e.g. "@ 1234 ns:")
+        $timeformat(-9, 0, " ns", 0);
         `uvm_info("TB_TOP", "[TB_TOP] Starting UVM testbench at time %0t", UVM_MEDIUM);
         
         // Set the interfaces in the config_db
@@ -0,0 +1,88 @@
+/**
+ * @file CpmBenchTest.sv
+ * @brief CPM Throughput Benchmark Test
+ *
+ * Runs CpmBenchVirtualSeq with its size and configuration taken from
+ * plusargs, so scripts/Run/benchmark.py can sweep them:
+ *   +CPM_BENCH_PACKETS=<n>              CpmStressSeq m_num_packets (default 1000)
+ *   +CPM_BENCH_MODE=<PASS|XOR|ADD|ROT>  MODE register (default PASS)
+ *   +CPM_BENCH_DROP=<0|1>               DROP_CFG enable (default 0)
+ *
+ * @author Assaf Afriat
+ * @date 2026-10-16
+ */
+
+class CpmBenchTest extends CpmBaseTest;
+
+    `uvm_component_utils(CpmBenchTest)
+
+    // ============================================================================
+    // Virtual Sequence
+    // ============================================================================
+    CpmBenchVirtualSeq m_virt_seq;
+
+    // ============================================================================
+    // Constructor
+    // ============================================================================
+    function new(string name = "CpmBenchTest", uvm_component parent = null);
+        super.new(name, parent);
+    endfunction
+
+    // ============================================================================
+    // build_phase
+    // Read the benchmark plusargs into the virtual sequence knobs
+    // ============================================================================
+    virtual function void build_phase(uvm_phase phase);
+        int num_packets = 1000;
+        int drop_en = 0;
+        string mode_name = "PASS";
+
+        super.build_phase(phase);
+
+        void'($value$plusargs("CPM_BENCH_PACKETS=%d", num_packets));
+        void'($value$plusargs("CPM_BENCH_MODE=%s", mode_name));
+        void'($value$plusargs("CPM_BENCH_DROP=%d", drop_en));
+
+        m_virt_seq = CpmBenchVirtualSeq::type_id::create("m_virt_seq");
+        m_virt_seq.m_num_stress_packets = num_packets;
+        m_virt_seq.m_initial_drop_en = (drop_en != 0);
+        case (mode_name.toupper())
+            "PASS": m_virt_seq.m_initial_mode = CPM_MODE_PASS;
+            "XOR":  m_virt_seq.m_initial_mode = CPM_MODE_XOR;
+            "ADD":  m_virt_seq.m_initial_mode = CPM_MODE_ADD;
+            "ROT":  m_virt_seq.m_initial_mode = CPM_MODE_ROT;
+            default: `uvm_fatal("TEST", $sformatf("Unknown +CPM_BENCH_MODE=%s (PASS, XOR, ADD or ROT)", mode_name))
+        endcase
+
+        m_env_cfg.m_num_packets = num_packets;
+
+        `uvm_info("TEST", $sformatf("Benchmark: %0d packets, MODE=%s, drop=%0d",
+            num_packets, m_virt_seq.m_initial_mode.name(), m_virt_seq.m_initial_drop_en), UVM_LOW)
+    endfunction
+
+    // ============================================================================
+    // connect_phase
+    // ============================================================================
+    virtual function void connect_phase(uvm_phase phase);
+        super.connect_phase(phase);
+
+        m_virt_seq.m_packet_seqr = m_env.m_packet_agent.m_sequencer;
+        m_virt_seq.m_reg_seqr = m_env.m_reg_agent.m_sequencer;
+        m_virt_seq.m_reg_model = m_env.m_reg_model;
+    endfunction
+
+    // ============================================================================
+    // run_phase
+    // ============================================================================
+    virtual task run_phase(uvm_phase phase);
+        phase.raise_objection(this);
+
+        m_virt_seq.start(null);
+
+        // Check counter invariant (MANDATORY)
+        m_env.m_scoreboard.check_counter_invariant();
+
+        phase.drop_objection(this);
+    endtask
+
+endclass : CpmBenchTest